@@ -1,4 +1,5 @@
-from flask_restx import Namespace, Resource, fields
+from flask import current_app
+from flask_restx import Namespace, Resource, fields, reqparse
 from app.services import facade
 
 api = Namespace('places', description='Place operations')
@@ -59,6 +60,63 @@ class PlaceList(Resource):
         return [place.to_dict() for place in places], 200
 
 
+nearby_parser = reqparse.RequestParser()
+nearby_parser.add_argument('lat', type=float, required=True, location='args')
+nearby_parser.add_argument('lng', type=float, required=True, location='args')
+nearby_parser.add_argument('radius_km', type=float, default=10.0, location='args')
+nearby_parser.add_argument('limit', type=int, default=20, location='args')
+
+
+@api.route('/nearby')
+class PlaceNearby(Resource):
+    @api.expect(nearby_parser)
+    @api.response(200, 'Places sorted by distance retrieved successfully')
+    @api.response(400, 'Invalid search parameters')
+    def get(self):
+        """Find the places within radius_km of (lat, lng), closest first"""
+        args = nearby_parser.parse_args()
+        max_radius_km = current_app.config['NEARBY_MAX_RADIUS_KM']
+        if args['radius_km'] > max_radius_km:
+            return {"error": f"Le rayon ne peut pas dépasser {max_radius_km} km"}, 400
+        try:
+            results = facade.get_places_nearby(
+                args['lat'], args['lng'], args['radius_km'], args['limit'])
+        except ValueError as e:
+            return {"error": str(e)}, 400
+
+        places = []
+        for distance, place in results:
+            place_data = place.to_dict()
+            place_data['distance_km'] = round(distance, 3)
+            places.append(place_data)
+        return places, 200
+
+
+search_parser = reqparse.RequestParser()
+search_parser.add_argument('q', type=str, required=True, location='args')
+search_parser.add_argument('offset', type=int, default=0, location='args')
+search_parser.add_argument('limit', type=int, default=20, location='args')
+
+
+@api.route('/search')
+class PlaceSearch(Resource):
+    @api.expect(search_parser)
+    @api.response(200, 'Matching places retrieved successfully, best match first')
+    def get(self):
+        """Full-text search over place titles and descriptions"""
+        args = search_parser.parse_args()
+        results = facade.search_places(
+            args['q'], offset=max(args['offset'], 0), limit=max(args['limit'], 1))
+
+        places = []
+        for place, score, snippets in results:
+            place_data = place.to_dict()
+            place_data['score'] = score
+            place_data['snippets'] = snippets
+            places.append(place_data)
+        return places, 200
+
+
 @api.route('/<place_id>')
 class PlaceResource(Resource):
     @api.response(200, 'Place details retrieved successfully')
@@ -45,12 +45,7 @@ class UserList(Resource):
     @api.response(404, 'No users found')
     def get(self):
         """Get the list of users"""
-<<<<<<< HEAD
-        users = facade.get_all_users(
-        )  # Vous devez implémenter cette méthode pour récupérer la liste des utilisateurs
-=======
         users = facade.get_all_users()
->>>>>>> c9e823084413968b15508581761c01dc2470b038
         if not users:
             return {'message': 'No users found'}, 404
         return [{'id': user.id, 'first_name': user.first_name, 'last_name': user.last_name, 'email': user.email} for user in users], 200
@@ -73,15 +68,6 @@ class UserResource(Resource):
     @api.response(200, 'User successfully updated')
     def put(self, user_id):
         """Update user details"""
-<<<<<<< HEAD
-        user_data = api.payload  # Récupérer les données envoyées dans la requête
-
-        # Vérifier que les données envoyées sont valides (par exemple, les champs ne sont pas vides)
-        if not user_data.get('first_name') or not user_data.get('last_name') or not user_data.get('email'):
-            return {'error': 'Invalid input data'}, 400
-
-        # Appeler la fonction facade pour récupérer l'utilisateur à mettre à jour
-=======
         user_data = api.payload
 
         # Vérifier que les champs ne sont pas vides
@@ -94,22 +80,13 @@ class UserResource(Resource):
         except ValueError as e:
             return {'error': str(e)}, 400
 
->>>>>>> c9e823084413968b15508581761c01dc2470b038
         user = facade.get_user(user_id)
         if not user:
             return {'error': 'User not found'}, 404
 
-<<<<<<< HEAD
-        # Appeler la fonction facade pour mettre à jour l'utilisateur
-=======
->>>>>>> c9e823084413968b15508581761c01dc2470b038
         updated_user = facade.update_user(user_id, user_data)
 
         if not updated_user:
             return {'error': 'Failed to update user'}, 500
 
-<<<<<<< HEAD
-        # Retourner l'utilisateur mis à jour
-=======
->>>>>>> c9e823084413968b15508581761c01dc2470b038
         return {'id': updated_user.id, 'first_name': updated_user.first_name, 'last_name': updated_user.last_name, 'email': updated_user.email}, 200
@@ -11,6 +11,8 @@ class Review(BaseModel):
         self.rating = rating
         self.place = place
         self.user = user
+        # Identifiant du lieu, indexé par le repository des reviews
+        self.place_id = place.id if isinstance(place, Place) else None
         self.validate()  # Appel à la méthode de validation
 
     def validate(self):
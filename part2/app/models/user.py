@@ -5,7 +5,7 @@ from app.models.BaseModel import BaseModel
 
 class User(BaseModel):
 
-    existing_emails = []
+    existing_emails = set()
 
     def __init__(self, first_name, last_name, email, is_admin=False):
         super().__init__()
@@ -16,7 +16,7 @@ class User(BaseModel):
         self.validate_email(email)
         self.validate_name(first_name, last_name)
         self.check_email_uniqueness(email)
-        User.existing_emails.append(email)
+        User.existing_emails.add(email)
 
     def validate_email(self, email):
         email_regex = r"([A-Za-z0-9]+[.-_])*[A-Za-z0-9]+@[A-Za-z0-9-]+(\.[A-Z|a-z]{2,})+"
@@ -26,13 +26,94 @@ class Repository(ABC):
     def get_by_attribute(self, attr_name, attr_value):
         pass
 
+    @abstractmethod
+    def add_many(self, objs):
+        pass
+
+    @abstractmethod
+    def update_many(self, updates):
+        pass
+
+    @abstractmethod
+    def delete_many(self, obj_ids):
+        pass
+
 
 class InMemoryRepository(Repository):
-    def __init__(self):
+    """
+    Stockage en mémoire avec index de hachage optionnels.
+
+    indexes: attributs indexés non uniques (valeur -> plusieurs objets)
+    unique_indexes: attributs indexés uniques (valeur -> un seul objet)
+    geo_index: index spatial (voir spatial.GridIndex) sur latitude/longitude
+    text_index: index plein texte (voir search.InvertedIndex)
+
+    Les index sont maintenus par add, update et delete, ce qui rend
+    get_by_attribute et get_all_by_attribute en O(1) sur ces attributs.
+    """
+
+    def __init__(self, indexes=None, unique_indexes=None, geo_index=None,
+                 text_index=None):
         self._storage = {}
+        self._geo_index = geo_index
+        self._text_index = text_index
+        # attribut -> valeur -> {obj_id: None} (dict pour garder l'ordre d'insertion)
+        self._indexes = {attr: {} for attr in indexes or []}
+        # attribut -> valeur -> obj_id
+        self._unique_indexes = {attr: {} for attr in unique_indexes or []}
+        # obj_id -> {attribut: valeur indexée}, pour désindexer même si
+        # l'objet a été modifié avant l'appel à update
+        self._indexed_values = {}
+
+    def _check_unique(self, obj_id, values):
+        for attr, value in values.items():
+            # Comme en SQL, plusieurs objets peuvent avoir une valeur None
+            if value is None:
+                continue
+            owner_id = self._unique_indexes[attr].get(value)
+            if owner_id is not None and owner_id != obj_id:
+                raise ValueError(
+                    f"La valeur '{value}' de '{attr}' est déjà utilisée.")
+
+    def _index(self, obj):
+        values = {attr: getattr(obj, attr, None)
+                  for attr in (*self._indexes, *self._unique_indexes)}
+        for attr in self._indexes:
+            self._indexes[attr].setdefault(values[attr], {})[obj.id] = None
+        for attr in self._unique_indexes:
+            if values[attr] is not None:
+                self._unique_indexes[attr][values[attr]] = obj.id
+        self._indexed_values[obj.id] = values
+        if self._geo_index is not None:
+            latitude = getattr(obj, 'latitude', None)
+            longitude = getattr(obj, 'longitude', None)
+            if latitude is not None and longitude is not None:
+                self._geo_index.insert(obj.id, latitude, longitude)
+        if self._text_index is not None:
+            self._text_index.insert(obj.id, obj)
+
+    def _unindex(self, obj_id):
+        if self._geo_index is not None:
+            self._geo_index.remove(obj_id)
+        if self._text_index is not None:
+            self._text_index.remove(obj_id)
+        values = self._indexed_values.pop(obj_id, {})
+        for attr in self._indexes:
+            bucket = self._indexes[attr].get(values.get(attr))
+            if bucket is not None:
+                bucket.pop(obj_id, None)
+                if not bucket:
+                    del self._indexes[attr][values.get(attr)]
+        for attr in self._unique_indexes:
+            if self._unique_indexes[attr].get(values.get(attr)) == obj_id:
+                del self._unique_indexes[attr][values.get(attr)]
 
     def add(self, obj):
+        self._check_unique(obj.id, {attr: getattr(obj, attr, None)
+                                    for attr in self._unique_indexes})
+        self._unindex(obj.id)
         self._storage[obj.id] = obj
+        self._index(obj)
 
     def get(self, obj_id):
         return self._storage.get(obj_id)
@@ -43,11 +124,90 @@ class InMemoryRepository(Repository):
     def update(self, obj_id, data):
         obj = self.get(obj_id)
         if obj:
-            obj.update(data)
+            self._check_unique(obj_id, {attr: data[attr] for attr in data
+                                        if attr in self._unique_indexes})
+            self._unindex(obj_id)
+            try:
+                obj.update(data)
+            finally:
+                self._index(obj)
 
     def delete(self, obj_id):
         if obj_id in self._storage:
+            self._unindex(obj_id)
             del self._storage[obj_id]
 
+    def add_many(self, objs):
+        """
+        Ajoute plusieurs objets en tout ou rien: les contraintes d'unicité
+        sont vérifiées sur tout le lot (y compris entre ses éléments) avant
+        la moindre insertion.
+        """
+        seen = {attr: {} for attr in self._unique_indexes}
+        for obj in objs:
+            values = {attr: getattr(obj, attr, None) for attr in self._unique_indexes}
+            self._check_unique(obj.id, values)
+            for attr, value in values.items():
+                if value is not None and seen[attr].setdefault(value, obj.id) != obj.id:
+                    raise ValueError(
+                        f"La valeur '{value}' de '{attr}' est déjà utilisée.")
+        for obj in objs:
+            self._unindex(obj.id)
+            self._storage[obj.id] = obj
+            self._index(obj)
+
+    def update_many(self, updates):
+        """Applique {obj_id: données} et retourne les objets modifiés"""
+        updated = []
+        for obj_id, data in updates.items():
+            if obj_id in self._storage:
+                self.update(obj_id, data)
+                updated.append(self._storage[obj_id])
+        return updated
+
+    def delete_many(self, obj_ids):
+        """Supprime les objets et retourne les ids effectivement supprimés"""
+        deleted = []
+        for obj_id in dict.fromkeys(obj_ids):
+            if obj_id in self._storage:
+                self.delete(obj_id)
+                deleted.append(obj_id)
+        return deleted
+
     def get_by_attribute(self, attr_name, attr_value):
+        if attr_name in self._unique_indexes:
+            obj_id = self._unique_indexes[attr_name].get(attr_value)
+            return self._storage.get(obj_id) if obj_id is not None else None
+        if attr_name in self._indexes:
+            bucket = self._indexes[attr_name].get(attr_value, {})
+            return self._storage.get(next(iter(bucket), None))
         return next((obj for obj in self._storage.values() if getattr(obj, attr_name) == attr_value), None)
+
+    def get_all_by_attribute(self, attr_name, attr_value):
+        """Retourne tous les objets dont l'attribut vaut attr_value"""
+        if attr_name in self._unique_indexes:
+            obj = self.get_by_attribute(attr_name, attr_value)
+            return [obj] if obj else []
+        if attr_name in self._indexes:
+            bucket = self._indexes[attr_name].get(attr_value, {})
+            return [self._storage[obj_id] for obj_id in bucket]
+        return [obj for obj in self._storage.values() if getattr(obj, attr_name) == attr_value]
+
+    def get_nearby(self, latitude, longitude, radius_km, limit=None):
+        """Retourne [(distance_km, obj)] à moins de radius_km, les plus proches d'abord"""
+        if self._geo_index is None:
+            raise ValueError("Ce repository n'a pas d'index spatial")
+        return [(distance, self._storage[obj_id]) for distance, obj_id
+                in self._geo_index.nearby(latitude, longitude, radius_km, limit)]
+
+    def search(self, query, offset=0, limit=20):
+        """
+        Recherche plein texte: retourne [(obj, score, extraits)] du rang
+        offset au rang offset + limit, les plus pertinents d'abord.
+        """
+        if self._text_index is None:
+            raise ValueError("Ce repository n'a pas d'index plein texte")
+        ranked = self._text_index.search(query)[offset:offset + limit]
+        return [(self._storage[obj_id], score,
+                 self._text_index.snippets(obj_id, query))
+                for score, obj_id in ranked]
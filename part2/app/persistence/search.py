@@ -0,0 +1,112 @@
+import html
+import math
+import re
+import unicodedata
+
+
+def tokenize(text):
+    """Découpe un texte en mots minuscules sans accents"""
+    text = unicodedata.normalize('NFKD', text or '')
+    text = ''.join(char for char in text if not unicodedata.combining(char))
+    return re.findall(r"\w+", text.lower())
+
+
+class InvertedIndex:
+    """
+    Index inversé en mémoire avec classement BM25, pour InMemoryRepository.
+
+    fields associe chaque attribut indexé à son poids dans le score
+    (par exemple {'title': 10.0, 'description': 1.0}). Le dernier mot de la
+    requête est cherché en préfixe, comme dans la recherche SQLite FTS5.
+    """
+
+    K1 = 1.2
+    B = 0.75
+
+    def __init__(self, fields):
+        self.fields = dict(fields)
+        self._postings = {field: {} for field in self.fields}
+        self._lengths = {field: {} for field in self.fields}
+        self._total_lengths = {field: 0 for field in self.fields}
+        self._texts = {}
+
+    def insert(self, obj_id, obj):
+        self.remove(obj_id)
+        self._texts[obj_id] = {}
+        for field in self.fields:
+            text = getattr(obj, field, '') or ''
+            self._texts[obj_id][field] = text
+            tokens = tokenize(text)
+            self._lengths[field][obj_id] = len(tokens)
+            self._total_lengths[field] += len(tokens)
+            for token in tokens:
+                postings = self._postings[field].setdefault(token, {})
+                postings[obj_id] = postings.get(obj_id, 0) + 1
+
+    def remove(self, obj_id):
+        texts = self._texts.pop(obj_id, None)
+        if texts is None:
+            return
+        for field in self.fields:
+            self._total_lengths[field] -= self._lengths[field].pop(obj_id, 0)
+            # Seuls les mots du texte indexé ont une entrée pour cet objet
+            for token in set(tokenize(texts[field])):
+                postings = self._postings[field][token]
+                postings.pop(obj_id, None)
+                if not postings:
+                    del self._postings[field][token]
+
+    def _expand(self, field, term, prefix):
+        if not prefix:
+            return [term] if term in self._postings[field] else []
+        return [token for token in self._postings[field] if token.startswith(term)]
+
+    def search(self, query):
+        """Retourne [(score, obj_id)] triés par pertinence décroissante"""
+        terms = tokenize(query)
+        if not terms:
+            return []
+        document_count = len(self._texts)
+        scores = {}
+        matched_terms = {}
+        for position, term in enumerate(terms):
+            prefix = position == len(terms) - 1
+            for field, weight in self.fields.items():
+                lengths = self._lengths[field]
+                average = self._total_lengths[field] / len(lengths) if lengths else 0
+                for token in self._expand(field, term, prefix):
+                    postings = self._postings[field][token]
+                    idf = math.log(1 + (document_count - len(postings) + 0.5)
+                                   / (len(postings) + 0.5))
+                    for obj_id, frequency in postings.items():
+                        norm = self.K1 * (1 - self.B + self.B * lengths[obj_id] / (average or 1))
+                        score = weight * idf * frequency * (self.K1 + 1) / (frequency + norm)
+                        scores[obj_id] = scores.get(obj_id, 0.0) + score
+                        matched_terms.setdefault(obj_id, set()).add(position)
+
+        # Tous les mots de la requête sont requis
+        results = [(score, obj_id) for obj_id, score in scores.items()
+                   if len(matched_terms[obj_id]) == len(terms)]
+        results.sort(key=lambda item: (-item[0], item[1]))
+        return results
+
+    def snippets(self, obj_id, query, marker=('<mark>', '</mark>')):
+        """
+        Textes indexés d'un objet en HTML échappé (un titre peut contenir
+        des balises), avec les mots recherchés surlignés
+        """
+        terms = tokenize(query)
+        texts = self._texts.get(obj_id, {})
+
+        def highlight(match):
+            word = match.group(0)
+            token = ''.join(tokenize(word))
+            hit = token and any(
+                token == term or (i == len(terms) - 1 and token.startswith(term))
+                for i, term in enumerate(terms))
+            word = html.escape(word)
+            return f"{marker[0]}{word}{marker[1]}" if hit else word
+
+        # Les mots et ce qui les sépare sont échappés morceau par morceau
+        return {field: re.sub(r"\w+|\W+", highlight, text)
+                for field, text in texts.items()}
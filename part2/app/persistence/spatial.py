@@ -0,0 +1,88 @@
+import math
+
+EARTH_RADIUS_KM = 6371.0088
+
+
+def haversine_km(lat1, lng1, lat2, lng2):
+    """Distance orthodromique en kilomètres entre deux positions"""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lng2 - lng1)
+    a = (math.sin(d_phi / 2) ** 2
+         + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+class GridIndex:
+    """
+    Index spatial en grille: chaque objet est rangé dans la cellule de
+    cell_degrees x cell_degrees qui contient sa position. Une recherche par
+    rayon ne parcourt que les cellules de la boîte englobante, puis trie les
+    candidats par distance haversine exacte.
+    """
+
+    def __init__(self, cell_degrees=0.1):
+        self.cell_degrees = cell_degrees
+        self._lat_cells = int(round(180 / cell_degrees))
+        self._lng_cells = int(round(360 / cell_degrees))
+        self._cells = {}
+        self._positions = {}
+
+    def _cell(self, latitude, longitude):
+        row = min(int((latitude + 90) / self.cell_degrees), self._lat_cells - 1)
+        col = int((longitude + 180) / self.cell_degrees) % self._lng_cells
+        return row, col
+
+    def insert(self, obj_id, latitude, longitude):
+        self.remove(obj_id)
+        cell = self._cell(latitude, longitude)
+        self._cells.setdefault(cell, set()).add(obj_id)
+        self._positions[obj_id] = (latitude, longitude)
+
+    def remove(self, obj_id):
+        position = self._positions.pop(obj_id, None)
+        if position is None:
+            return
+        cell = self._cell(*position)
+        bucket = self._cells.get(cell)
+        bucket.discard(obj_id)
+        if not bucket:
+            del self._cells[cell]
+
+    def _candidate_cells(self, latitude, longitude, radius_km):
+        """Lignes et colonnes de la boîte englobante du cercle"""
+        angle = radius_km / EARTH_RADIUS_KM
+        d_lat = math.degrees(angle)
+        cos_lat = math.cos(math.radians(latitude))
+        min_row, _ = self._cell(max(-90.0, latitude - d_lat), 0)
+        max_row, _ = self._cell(min(90.0, latitude + d_lat), 0)
+
+        # Boîte englobante exacte en longitude, toutes les colonnes près d'un pôle
+        if angle >= math.pi / 2 or math.sin(angle) >= cos_lat:
+            columns = range(self._lng_cells)
+        else:
+            d_lng = math.degrees(math.asin(math.sin(angle) / cos_lat))
+            _, first = self._cell(0, (longitude - d_lng + 180) % 360 - 180)
+            span = int(math.ceil(2 * d_lng / self.cell_degrees)) + 1
+            columns = [(first + i) % self._lng_cells
+                       for i in range(min(span, self._lng_cells))]
+        return range(min_row, max_row + 1), columns
+
+    def nearby(self, latitude, longitude, radius_km, limit=None):
+        """Retourne [(distance_km, obj_id)] triés par distance croissante"""
+        rows, columns = self._candidate_cells(latitude, longitude, radius_km)
+        if len(rows) * len(columns) > len(self._cells):
+            # Grand rayon: moins de cellules occupées que de cellules de la
+            # boîte, le coût reste borné par le nombre d'objets indexés
+            cells = self._cells.values()
+        else:
+            cells = (self._cells.get((row, col), ()) for row in rows for col in columns)
+        results = []
+        for bucket in cells:
+            for obj_id in bucket:
+                distance = haversine_km(latitude, longitude,
+                                        *self._positions[obj_id])
+                if distance <= radius_km:
+                    results.append((distance, obj_id))
+        results.sort()
+        return results[:limit] if limit else results
@@ -1,4 +1,7 @@
+import math
 from app.persistence.repository import InMemoryRepository
+from app.persistence.spatial import GridIndex
+from app.persistence.search import InvertedIndex
 from app.models.user import User
 from app.models.amenity import Amenity
 from app.models.place import Place
@@ -7,9 +10,12 @@ from app.models.review import Review
 
 class HBnBFacade:
     def __init__(self):
-        self.user_repo = InMemoryRepository()
-        self.place_repo = InMemoryRepository()
-        self.review_repo = InMemoryRepository()
+        # Index sur les attributs recherchés à chaque requête
+        self.user_repo = InMemoryRepository(unique_indexes=['email'])
+        self.place_repo = InMemoryRepository(
+            geo_index=GridIndex(),
+            text_index=InvertedIndex({'title': 10.0, 'description': 1.0}))
+        self.review_repo = InMemoryRepository(indexes=['place_id'])
         self.amenity_repo = InMemoryRepository()
 
     def create_user(self, user_data):
@@ -71,6 +77,21 @@ class HBnBFacade:
         """Récupère tous les lieux"""
         return self.place_repo.get_all()
 
+    def get_places_nearby(self, latitude, longitude, radius_km, limit=20):
+        """Retourne les lieux proches sous forme de tuples (distance_km, place)"""
+        if not (-90.0 <= latitude <= 90.0):
+            raise ValueError("La latitude doit être entre -90 et 90.")
+        if not (-180.0 <= longitude <= 180.0):
+            raise ValueError("La longitude doit être entre -180 et 180.")
+        # nan et inf échappent aux comparaisons (nan <= 0 est faux)
+        if not math.isfinite(radius_km) or radius_km <= 0:
+            raise ValueError("Le rayon doit être un nombre positif")
+        return self.place_repo.get_nearby(latitude, longitude, radius_km, limit)
+
+    def search_places(self, query, offset=0, limit=20):
+        """Recherche plein texte sur le titre et la description des lieux"""
+        return self.place_repo.search(query, offset=offset, limit=limit)
+
     def update_place(self, place_id, place_data):
         """Met à jour un lieu par ID"""
         place = self.get_place(place_id)
@@ -168,9 +189,9 @@ class HBnBFacade:
 
     def get_reviews_by_place(self, place_id):
         """Récupère tous les avis pour un lieu spécifique."""
-        reviews = self.review_repo.get_all()
-        # Filtre les avis pour ne garder que ceux liés au lieu spécifié
-        return [review.to_dict() for review in reviews if review.place_id == place_id]
+        # Lecture directe dans l'index place_id du repository
+        reviews = self.review_repo.get_all_by_attribute('place_id', place_id)
+        return [review.to_dict() for review in reviews]
 
     def update_review(self, review_id, review_data):
         """Met à jour un avis existant."""
@@ -4,6 +4,8 @@ import os
 class Config:
     SECRET_KEY = os.getenv('SECRET_KEY', 'default_secret_key')
     DEBUG = False
+    # Rayon maximal (km) accepté par /places/nearby
+    NEARBY_MAX_RADIUS_KM = 100
 
 
 class DevelopmentConfig(Config):
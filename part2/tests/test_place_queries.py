@@ -0,0 +1,65 @@
+import unittest
+from app import create_app
+
+
+class TestPlaceQueryAPI(unittest.TestCase):
+    """Recherche de proximité et plein texte, avec le client de test Flask."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.client = create_app().test_client()
+        user = cls.client.post("/api/v1/users/", json={
+            "first_name": "Query",
+            "last_name": "Owner",
+            "email": "query.owner@example.com"
+        }).get_json()
+        cls.places = {}
+        for title, description, latitude, longitude in [
+                ("Louvre flat", "Quiet flat near the museum", 48.8606, 2.3376),
+                ("Versailles house", "House close to the palace", 48.8049, 2.1204),
+                ("Lyon loft", "Bright loft near the river", 45.7640, 4.8357)]:
+            response = cls.client.post("/api/v1/places/", json={
+                "title": title, "description": description, "price": 80.0,
+                "latitude": latitude, "longitude": longitude,
+                "owner_id": user["id"], "amenities": []
+            })
+            cls.places[title] = response.get_json()["id"]
+
+    def test_nearby_sorted_by_distance(self):
+        """Test des lieux proches triés par distance."""
+        response = self.client.get(
+            "/api/v1/places/nearby?lat=48.8566&lng=2.3522&radius_km=30")
+        self.assertEqual(response.status_code, 200)
+        titles = [place["title"] for place in response.get_json()]
+        self.assertEqual(titles, ["Louvre flat", "Versailles house"])
+        self.assertLess(response.get_json()[0]["distance_km"], 2)
+
+    def test_nearby_rejects_invalid_coordinates(self):
+        """Test d'une latitude hors limites."""
+        response = self.client.get("/api/v1/places/nearby?lat=95&lng=2.35")
+        self.assertEqual(response.status_code, 400)
+
+    def test_nearby_rejects_radius_above_cap(self):
+        """Test du rayon maximal NEARBY_MAX_RADIUS_KM."""
+        response = self.client.get(
+            "/api/v1/places/nearby?lat=48.8566&lng=2.3522&radius_km=20000")
+        self.assertEqual(response.status_code, 400)
+
+    def test_nearby_rejects_non_finite_radius(self):
+        """Test d'un rayon nan, infini ou négatif"""
+        for radius in ("nan", "inf", "-inf", "0", "-5"):
+            response = self.client.get(
+                f"/api/v1/places/nearby?lat=48.8566&lng=2.3522&radius_km={radius}")
+            self.assertEqual(response.status_code, 400, radius)
+
+    def test_search_ranks_and_highlights(self):
+        """Test de la recherche plein texte par l'API."""
+        response = self.client.get("/api/v1/places/search?q=loft")
+        self.assertEqual(response.status_code, 200)
+        results = response.get_json()
+        self.assertEqual([place["id"] for place in results], [self.places["Lyon loft"]])
+        self.assertEqual(results[0]["snippets"]["title"], "Lyon <mark>loft</mark>")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,207 @@
+import time
+import unittest
+from app.models.BaseModel import BaseModel
+from app.persistence.repository import InMemoryRepository
+from app.persistence.spatial import GridIndex
+from app.persistence.search import InvertedIndex
+
+
+class Item(BaseModel):
+    def __init__(self, email, category):
+        super().__init__()
+        self.email = email
+        self.category = category
+
+
+class TestInMemoryRepositoryIndexes(unittest.TestCase):
+
+    def setUp(self):
+        self.repo = InMemoryRepository(indexes=['category'],
+                                       unique_indexes=['email'])
+        self.first = Item("a@example.com", "house")
+        self.second = Item("b@example.com", "house")
+        self.repo.add(self.first)
+        self.repo.add(self.second)
+
+    def test_unique_index_lookup(self):
+        """Test de recherche par attribut unique indexé."""
+        self.assertIs(self.repo.get_by_attribute("email", "b@example.com"),
+                      self.second)
+        self.assertIsNone(self.repo.get_by_attribute("email", "x@example.com"))
+
+    def test_unique_index_rejects_duplicates(self):
+        """Test du refus d'une valeur déjà présente dans un index unique."""
+        with self.assertRaises(ValueError):
+            self.repo.add(Item("a@example.com", "flat"))
+        with self.assertRaises(ValueError):
+            self.repo.update(self.second.id, {"email": "a@example.com"})
+
+    def test_non_unique_index_lookup(self):
+        """Test de recherche de tous les objets d'une valeur indexée."""
+        self.assertEqual(self.repo.get_all_by_attribute("category", "house"),
+                         [self.first, self.second])
+
+    def test_update_maintains_indexes(self):
+        """Test de la mise à jour des index lors d'un update."""
+        self.repo.update(self.first.id, {"email": "c@example.com",
+                                         "category": "flat"})
+        self.assertIsNone(self.repo.get_by_attribute("email", "a@example.com"))
+        self.assertIs(self.repo.get_by_attribute("email", "c@example.com"),
+                      self.first)
+        self.assertEqual(self.repo.get_all_by_attribute("category", "house"),
+                         [self.second])
+
+    def test_update_after_direct_mutation(self):
+        """Test de la désindexation quand l'objet a été modifié avant update."""
+        self.first.category = "flat"
+        self.repo.update(self.first.id, {"category": "flat"})
+        self.assertEqual(self.repo.get_all_by_attribute("category", "flat"),
+                         [self.first])
+        self.assertEqual(self.repo.get_all_by_attribute("category", "house"),
+                         [self.second])
+
+    def test_delete_maintains_indexes(self):
+        """Test de la suppression des entrées d'index lors d'un delete."""
+        self.repo.delete(self.first.id)
+        self.assertIsNone(self.repo.get_by_attribute("email", "a@example.com"))
+        self.assertEqual(self.repo.get_all_by_attribute("category", "house"),
+                         [self.second])
+        self.repo.add(Item("a@example.com", "flat"))
+
+
+class Spot(BaseModel):
+    def __init__(self, latitude, longitude):
+        super().__init__()
+        self.latitude = latitude
+        self.longitude = longitude
+
+
+class TestInMemoryRepositoryGeoIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.repo = InMemoryRepository(geo_index=GridIndex())
+        self.louvre = Spot(48.8606, 2.3376)
+        self.montmartre = Spot(48.8867, 2.3431)
+        self.lyon = Spot(45.7640, 4.8357)
+        for spot in (self.lyon, self.montmartre, self.louvre):
+            self.repo.add(spot)
+
+    def test_nearby_sorted_by_distance(self):
+        """Test de la recherche par rayon triée par distance."""
+        results = self.repo.get_nearby(48.8600, 2.3400, 5)
+        self.assertEqual([spot for _, spot in results],
+                         [self.louvre, self.montmartre])
+        self.assertLess(results[0][0], results[1][0])
+
+    def test_nearby_follows_updates_and_deletes(self):
+        """Test de la maintenance de l'index spatial."""
+        self.repo.update(self.lyon.id, {"latitude": 48.8610,
+                                        "longitude": 2.3380})
+        self.repo.delete(self.montmartre.id)
+        results = self.repo.get_nearby(48.8600, 2.3400, 5)
+        self.assertEqual({spot.id for _, spot in results},
+                         {self.louvre.id, self.lyon.id})
+
+    def test_nearby_across_antimeridian(self):
+        """Test d'une recherche à cheval sur l'antiméridien."""
+        east = Spot(-17.0, 179.99)
+        self.repo.add(east)
+        results = self.repo.get_nearby(-17.0, -179.99, 10)
+        self.assertEqual([spot for _, spot in results], [east])
+
+
+    def test_nearby_large_radius_scans_occupied_cells(self):
+        """Test d'un rayon couvrant la Terre: coût borné par les objets."""
+        start = time.perf_counter()
+        results = self.repo.get_nearby(48.8600, 2.3400, 20000)
+        self.assertLess(time.perf_counter() - start, 0.1)
+        self.assertEqual([spot for _, spot in results],
+                         [self.louvre, self.montmartre, self.lyon])
+
+
+class TestInMemoryRepositoryBulk(unittest.TestCase):
+
+    def setUp(self):
+        self.repo = InMemoryRepository(indexes=["category"], unique_indexes=["email"])
+
+    def test_add_many_is_all_or_nothing(self):
+        """Test qu'un doublon dans le lot n'insère aucun objet."""
+        first, second = Item("a@x.com", "loft"), Item("a@x.com", "loft")
+        with self.assertRaises(ValueError):
+            self.repo.add_many([first, second])
+        self.assertEqual(self.repo.get_all(), [])
+
+        self.repo.add_many([first, Item("b@x.com", "loft")])
+        self.assertEqual(len(self.repo.get_all()), 2)
+        self.assertIs(self.repo.get_by_attribute("email", "a@x.com"), first)
+
+    def test_update_and_delete_many(self):
+        """Test des mises à jour et suppressions groupées avec les index."""
+        items = [Item(f"{i}@x.com", "loft") for i in range(3)]
+        self.repo.add_many(items)
+        updated = self.repo.update_many({items[0].id: {"category": "villa"},
+                                         "missing": {"category": "villa"}})
+        self.assertEqual(updated, [items[0]])
+        self.assertEqual(self.repo.get_all_by_attribute("category", "villa"), [items[0]])
+
+        deleted = self.repo.delete_many([items[1].id, "missing"])
+        self.assertEqual(deleted, [items[1].id])
+        self.assertEqual(self.repo.get_all_by_attribute("category", "loft"), [items[2]])
+
+
+class Listing(BaseModel):
+    def __init__(self, title, description):
+        super().__init__()
+        self.title = title
+        self.description = description
+
+
+class TestInMemoryRepositoryTextIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.repo = InMemoryRepository(
+            text_index=InvertedIndex({'title': 10.0, 'description': 1.0}))
+        self.loft = Listing("Cozy loft", "A quiet apartment near the canal")
+        self.villa = Listing("Seaside villa", "Large villa, cozy rooms")
+        self.chalet = Listing("Mountain chalet", "Wooden chalet near the lifts")
+        for listing in (self.loft, self.villa, self.chalet):
+            self.repo.add(listing)
+
+    def test_search_ranks_title_matches_first(self):
+        """Test du classement BM25 pondéré par champ."""
+        results = self.repo.search("cozy")
+        self.assertEqual([obj for obj, _, _ in results], [self.loft, self.villa])
+        self.assertEqual(results[0][2]["title"], "<mark>Cozy</mark> loft")
+
+    def test_snippets_escape_markup(self):
+        """Test de l'échappement HTML des extraits."""
+        evil = Listing("Evil <img src=x onerror=alert(1)> flat", "<b>evil</b>")
+        self.repo.add(evil)
+        results = self.repo.search("evil")
+        self.assertEqual(results[0][2]["title"],
+                         "<mark>Evil</mark> &lt;img src=x onerror=alert(1)&gt; flat")
+        self.assertEqual(results[0][2]["description"],
+                         "&lt;b&gt;<mark>evil</mark>&lt;/b&gt;")
+
+    def test_search_requires_all_words_and_prefix(self):
+        """Test de la recherche ET avec préfixe sur le dernier mot."""
+        results = self.repo.search("near cha")
+        self.assertEqual([obj for obj, _, _ in results], [self.chalet])
+
+    def test_search_follows_updates_and_deletes(self):
+        """Test de la maintenance de l'index plein texte."""
+        self.repo.update(self.chalet.id, {"title": "Alpine hut"})
+        self.repo.delete(self.loft.id)
+        self.assertEqual([obj for obj, _, _ in self.repo.search("cozy")],
+                         [self.villa])
+        self.assertEqual([obj for obj, _, _ in self.repo.search("alpine")],
+                         [self.chalet])
+
+    def test_search_pagination(self):
+        """Test de la pagination des résultats."""
+        self.assertEqual([obj for obj, _, _ in self.repo.search("cozy", offset=1)],
+                         [self.villa])
+
+
+if __name__ == "__main__":
+    unittest.main()
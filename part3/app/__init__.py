@@ -1,44 +1,82 @@
+from importlib import import_module
 from flask import Flask
-from flask_restx import Api
 from config import DevelopmentConfig
-from app.extensions import db, jwt, bcrypt
-from app.api.v1.users import api as users_ns
-from app.api.v1.amenities import api as amenities_ns
-from app.api.v1.places import api as places_ns
-from app.api.v1.reviews import api as reviews_ns
-from app.api.v1.auth import api as auth_ns
-from app.api.v1.protected import api as protected_ns
-from app.extensions import db, jwt, bcrypt
+
+# Imports faits dans create_app: importer un module du paquet (par exemple
+# app.passwords dans les processus du pool de hachage) ne charge ni
+# SQLAlchemy ni les namespaces de l'API
+
+# Namespaces de l'API: (module, chemin)
+NAMESPACES = [
+    ('app.api.v1.users', '/api/v1/users'),
+    ('app.api.v1.amenities', '/api/v1/amenities'),
+    ('app.api.v1.places', '/api/v1/places'),
+    ('app.api.v1.reviews', '/api/v1/reviews'),
+    ('app.api.v1.auth', '/api/v1/auth'),
+    ('app.api.v1.protected', '/api/v1'),
+    ('app.api.v1.stats', '/api/v1/stats'),
+    ('app.api.v1.export', '/api/v1/export'),
+]
 
 
 def create_app(config_class=DevelopmentConfig):
     app = Flask(__name__)
     app.config.from_object(config_class)
     app.config['SECRET_KEY'] = 'your_secret_key'
+    from app.extensions import db, jwt, bcrypt
     bcrypt.init_app(app)
     jwt.init_app(app)
     db.init_app(app)
 
-    # Créer les tables de la base de données
-    with app.app_context():
-        db.create_all()
+    # Réplicas en lecture, puis PRAGMA SQLite avant la première connexion
+    from app.persistence import routing, sqlite
+    routing.init_app(app)
+    sqlite.init_app(app)
+
+    # Compression des réponses, appliquée après le commit de la requête
+    from app import compression
+    compression.init_app(app)
+
+    # Une transaction par requête, commitée une fois à la fin
+    from app.persistence import unit_of_work
+    unit_of_work.init_app(app)
+
+    # Cache des lectures par id, invalidé à chaque commit
+    from app.persistence import cache
+    cache.init_app(app)
+
+    # Hachage bcrypt dans un pool de processus borné
+    from app import passwords
+    passwords.init_app(app)
+
+    # Principal (id, is_admin) des tokens, en cache par jti
+    from app import principals
+    principals.init_app(app)
+
+    # Révocation des tokens: filtre de Bloom devant la base
+    from app import revocation
+    revocation.init_app(app)
+
+    # Les façades sont partagées entre les requêtes (et les threads)
+    from app.services import init_facade
+    init_facade(app)
+
+    from app.commands import hbnb_cli
+    app.cli.add_command(hbnb_cli)
 
     # Initialiser l'API
+    from flask_restx import Api
     api = Api(app, version='1.0', title='HBnB API',
               description='HBnB Application API', doc='/api/v1/')
+    for module, path in NAMESPACES:
+        api.add_namespace(import_module(module).api, path=path)
 
-    api.add_namespace(users_ns, path='/api/v1/users')
-    api.add_namespace(amenities_ns, path='/api/v1/amenities')
-    api.add_namespace(places_ns, path='/api/v1/places')
-    api.add_namespace(reviews_ns, path='/api/v1/reviews')
-    api.add_namespace(auth_ns, path='/api/v1/auth')
-    api.add_namespace(protected_ns, path='/api/v1')
-
-    # Initialiser l'admin dans un contexte d'application
-    with app.app_context():
-        from app.services import get_facade
-        facade = get_facade()
-        user_facade = facade.user_facade
-        user_facade.initialize_admin()
+    # Schéma et admin par défaut: au démarrage seulement avec
+    # BOOTSTRAP_ON_STARTUP, sinon par flask hbnb init-db / seed-admin
+    if app.config.get('BOOTSTRAP_ON_STARTUP', False):
+        from app.commands import init_db, seed_admin
+        with app.app_context():
+            init_db()
+            seed_admin()
 
     return app
@@ -2,7 +2,14 @@ from flask_restx import Namespace, Resource, fields
 from app.services import facade
 from flask import request
 from app.services import get_facade
-from flask_jwt_extended import jwt_required, get_jwt
+from app.models.amenity import Amenity
+from app.models.place import Place
+from app.api.v1.pagination import pagination_parser, get_page_args, page_response
+from app.api.v1.bulk import get_bulk_operations
+from app.api.v1.http_cache import conditional_response, make_etag, row_versions
+from app.api.v1.fieldsets import add_fieldset_arguments, fieldset_parser, get_fieldset
+from flask_jwt_extended import jwt_required
+from app.principals import current_principal
 
 api = Namespace('amenities', description='Amenity operations')
 
@@ -12,6 +19,14 @@ amenity_model = api.model('Amenity', {
     'description': fields.String(description='Description of the amenity')
 })
 
+# Corps des opérations groupées (il n'existe pas de suppression d'amenity)
+amenity_bulk_model = api.model('AmenityBulk', {
+    'create': fields.List(fields.Nested(amenity_model), description='Amenities to create'),
+    'update': fields.List(fields.Raw, description='Amenities to update: id, name, description')
+})
+
+amenity_list_parser = add_fieldset_arguments(pagination_parser.copy())
+
 
 @api.route('/')
 class AmenityList(Resource):
@@ -23,8 +38,7 @@ class AmenityList(Resource):
     def post(self):
         facade = get_facade()
         """Register a new amenity (Admin only)"""
-        claims = get_jwt()
-        if not claims.get("is_admin"):
+        if not current_principal().is_admin:
             return {'message': 'Admin privileges required'}, 403
 
         try:
@@ -45,26 +59,74 @@ class AmenityList(Resource):
         except ValueError as e:
             return {'message': str(e)}, 400
 
+    @api.expect(amenity_list_parser)
     @api.response(200, 'List of amenities retrieved successfully')
+    @api.response(400, 'Invalid pagination or fields parameters')
     def get(self):
         facade = get_facade()
-        """Retrieve a list of all amenities"""
-        amenities = facade.amenity_facade.get_all_amenities()
-        return [amenity.to_dict() for amenity in amenities], 200
+        """Retrieve a page of amenities"""
+        try:
+            args, after, limit = get_page_args(amenity_list_parser)
+            fields, _ = get_fieldset(args, Amenity)
+            amenities, next_cursor = facade.amenity_facade.get_amenities_page(
+                after=after, limit=limit)
+        except ValueError as e:
+            return {'message': str(e)}, 400
+
+        # places_count est une colonne: la page entière tient en une requête
+        return conditional_response(
+            'amenity_list', make_etag(next_cursor, *row_versions(amenities)),
+            lambda: page_response([amenity.to_dict(fields=fields) for amenity in amenities],
+                                  next_cursor))
+
+
+@api.route('/bulk')
+class AmenityBulk(Resource):
+    @jwt_required()
+    @api.expect(amenity_bulk_model)
+    @api.response(200, 'Per-item results: index, status and id or error')
+    @api.response(400, 'Invalid bulk request')
+    @api.response(403, 'Admin privileges required')
+    def post(self):
+        facade = get_facade()
+        """Create and update amenities in batches (Admin only)"""
+        if not current_principal().is_admin:
+            return {'message': 'Admin privileges required'}, 403
+
+        try:
+            batches = get_bulk_operations(
+                request.get_json(silent=True), operations=('create', 'update'))
+        except ValueError as e:
+            return {'message': str(e)}, 400
+
+        results = {}
+        if 'create' in batches:
+            results['create'] = facade.amenity_facade.create_amenities(batches['create'])
+        if 'update' in batches:
+            results['update'] = facade.amenity_facade.update_amenities(batches['update'])
+        return results, 200
 
 
 @api.route('/<amenity_id>')
 class AmenityResource(Resource):
+    @api.expect(fieldset_parser)
     @api.response(200, 'Amenity details retrieved successfully')
+    @api.response(400, 'Invalid fields parameters')
     @api.response(404, 'Amenity not found')
     def get(self, amenity_id):
         facade = get_facade()
         """Get amenity details by ID"""
+        try:
+            fields, _ = get_fieldset(fieldset_parser.parse_args(), Amenity)
+        except ValueError as e:
+            return {'message': str(e)}, 400
         amenity = facade.amenity_facade.get_amenity(amenity_id)
         if not amenity:
             return {'message': 'Amenity not found'}, 404
 
-        return amenity.to_dict(), 200
+        return conditional_response(
+            'amenity', make_etag(*row_versions([amenity])),
+            lambda: amenity.to_dict(fields=fields))
 
     @jwt_required()
     @api.expect(amenity_model)
@@ -75,8 +137,7 @@ class AmenityResource(Resource):
     def put(self, amenity_id):
         facade = get_facade()
         """Update an amenity's information (Admin only)"""
-        claims = get_jwt()
-        if not claims.get("is_admin"):
+        if not current_principal().is_admin:
             return {'message': 'Admin privileges required'}, 403
 
         try:
@@ -112,4 +173,4 @@ class AmenityPlaces(Resource):
         places = facade.amenity_facade.get_places_with_amenity(amenity_id)
 
         # Sérialiser les lieux avant de les retourner
-        return [place.to_dict() for place in places], 200
+        return Place.to_dict_many(places), 200
@@ -1,7 +1,9 @@
 from flask_restx import Namespace, Resource, fields
-from flask_jwt_extended import create_access_token
+from datetime import datetime
+from flask_jwt_extended import create_access_token, get_jwt, jwt_required
 from app.services import facade
 from app.services import get_facade
+from app.passwords import PasswordHasherBusy
 
 api = Namespace('auth', description='Authentication operations')
 
@@ -15,16 +17,21 @@ login_model = api.model('Login', {
 @api.route('/login')
 class Login(Resource):
     @api.expect(login_model)
+    @api.response(503, 'Password hashing pool saturated, retry later')
     def post(self):
         facade = get_facade()
         """Authentifier l'utilisateur et retourner un token JWT"""
         credentials = api.payload  # Récupérer l'email et le mot de passe du payload
 
-        # Étape 1 : Récupérer l'utilisateur en fonction de l'email
-        user = facade.user_facade.get_user_by_email(credentials['email'])
-
-        # Étape 2 : Vérifier si l'utilisateur existe et si le mot de passe est correct
-        if not user or not user.verify_password(credentials['password']):
+        # Étapes 1 et 2 : Récupérer l'utilisateur par son email et vérifier le
+        # mot de passe (rehaché si la politique a changé; 503 immédiat si le
+        # pool de hachage est saturé)
+        try:
+            user = facade.user_facade.authenticate(
+                credentials['email'], credentials['password'])
+        except PasswordHasherBusy as e:
+            return {'error': e.description}, 503, {'Retry-After': str(e.retry_after)}
+        if not user:
             return {'error': 'Identifiants invalides'}, 401
 
         # Étape 3 : Créer un token JWT avec l'ID de l'utilisateur et le flag is_admin
@@ -33,3 +40,17 @@ class Login(Resource):
 
         # Étape 4 : Retourner le token JWT au client
         return {'access_token': access_token}, 200
+
+
+@api.route('/logout')
+class Logout(Resource):
+    @jwt_required()
+    @api.response(200, 'Token revoked')
+    @api.response(401, 'Missing, invalid or already revoked token')
+    def post(self):
+        facade = get_facade()
+        """Révoquer le token JWT utilisé pour la requête"""
+        token = get_jwt()
+        expires_at = datetime.utcfromtimestamp(token['exp']) if 'exp' in token else None
+        facade.user_facade.revoke_token(token['jti'], token['sub'], expires_at)
+        return {'message': 'Token revoked'}, 200
@@ -0,0 +1,36 @@
+from flask import current_app
+
+
+def get_bulk_operations(payload, operations=('create', 'update', 'delete')):
+    """
+    Valide le corps d'une requête bulk, par exemple
+    {"create": [{...}], "update": [{"id": ..., ...}], "delete": ["<id>"]},
+    et retourne {opération: éléments} pour les opérations présentes.
+    """
+    if not isinstance(payload, dict) or not payload:
+        raise ValueError(
+            f"Le corps doit être un objet JSON avec au moins une des clés: "
+            f"{', '.join(operations)}")
+    unknown = sorted(set(payload) - set(operations))
+    if unknown:
+        raise ValueError(f"Opération non supportée: {', '.join(unknown)}")
+
+    max_items = current_app.config['BULK_MAX_ITEMS']
+    batches = {}
+    for operation in operations:
+        if operation not in payload:
+            continue
+        items = payload[operation]
+        if not isinstance(items, list):
+            raise ValueError(f"'{operation}' doit être une liste")
+        if len(items) > max_items:
+            raise ValueError(
+                f"'{operation}' accepte au plus {max_items} éléments par requête")
+        # delete attend des ids, create et update des objets
+        expected = str if operation == 'delete' else dict
+        if not all(isinstance(item, expected) for item in items):
+            raise ValueError(
+                f"'{operation}' doit contenir uniquement des "
+                f"{'ids' if expected is str else 'objets JSON'}")
+        batches[operation] = items
+    return batches
@@ -0,0 +1,57 @@
+import json
+from datetime import datetime
+from flask import Response, current_app, stream_with_context
+from flask_restx import Namespace, Resource, reqparse
+from flask_jwt_extended import jwt_required
+from app.services import get_facade
+from app.principals import current_principal
+
+api = Namespace('export', description='Full-table NDJSON exports')
+
+export_parser = reqparse.RequestParser()
+export_parser.add_argument(
+    'after', type=str, location='args',
+    help='Resume after this id (the id of the last line received)')
+
+
+def _encode(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Valeur non sérialisable: {value!r}")
+
+
+def ndjson_lines(rows, lines_per_chunk):
+    """Une ligne JSON par ligne de table, envoyées par paquets de lines_per_chunk"""
+    chunk = []
+    for row in rows:
+        chunk.append(json.dumps(row, default=_encode, separators=(',', ':')))
+        if len(chunk) >= lines_per_chunk:
+            yield '\n'.join(chunk) + '\n'
+            chunk = []
+    if chunk:
+        yield '\n'.join(chunk) + '\n'
+
+
+@api.route('/<string:resource>.ndjson')
+@api.param('resource', 'places, reviews, users or amenities')
+class Export(Resource):
+    @jwt_required()
+    @api.expect(export_parser)
+    @api.response(200, 'One JSON object per line, ordered by id')
+    @api.response(403, 'Admin privileges required')
+    @api.response(404, 'Unknown export')
+    def get(self, resource):
+        facade = get_facade()
+        """Stream every row of a table as NDJSON (Admin only)"""
+        if not current_principal().is_admin:
+            return {'error': 'Admin privileges required'}, 403
+        if resource not in facade.EXPORTABLE:
+            return {'error': 'Unknown export'}, 404
+
+        args = export_parser.parse_args()
+        batch_size = current_app.config['EXPORT_BATCH_SIZE']
+        rows = facade.export_rows(resource, after=args['after'], batch_size=batch_size)
+        # Le générateur garde le contexte de la requête (session) jusqu'à la
+        # fin du flux
+        return Response(stream_with_context(ndjson_lines(rows, batch_size)),
+                        mimetype='application/x-ndjson')
@@ -0,0 +1,51 @@
+from flask_restx import reqparse
+
+
+def add_fieldset_arguments(parser):
+    """Ajoute ?fields= et ?include= à un parser de query string"""
+    parser.add_argument(
+        'fields', type=str, location='args',
+        help='Comma separated fields to return, e.g. id,title,price')
+    parser.add_argument(
+        'include', type=str, location='args',
+        help='Comma separated relationships to embed, e.g. reviews,amenities')
+    return parser
+
+
+# Paramètres des endpoints de détail
+fieldset_parser = add_fieldset_arguments(reqparse.RequestParser())
+
+
+def _split(value):
+    return [name.strip() for name in value.split(',') if name.strip()]
+
+
+def get_fieldset(args, model):
+    """
+    Retourne (fields, include) pour model.to_dict() à partir de ?fields= et
+    ?include=. Sans aucun des deux paramètres, la représentation complète
+    est conservée: (None, None). Sinon seules les relations demandées (dans
+    include, ou nommées dans fields) sont chargées et sérialisées.
+    Lève ValueError pour un champ ou une relation inconnus.
+    """
+    if not args.get('fields') and not args.get('include'):
+        return None, None
+
+    include = set(_split(args.get('include') or ''))
+    unknown = include - set(model.RELATIONS)
+    if unknown:
+        raise ValueError(
+            f"Relation inconnue: {', '.join(sorted(unknown))} "
+            f"(disponibles: {', '.join(model.RELATIONS) or 'aucune'})")
+
+    fields = None
+    if args.get('fields'):
+        requested = _split(args['fields'])
+        unknown = set(requested) - set(model.FIELDS) - set(model.RELATIONS)
+        if unknown:
+            raise ValueError(
+                f"Champ inconnu: {', '.join(sorted(unknown))} "
+                f"(disponibles: {', '.join(model.FIELDS + model.RELATIONS)})")
+        include |= set(requested) & set(model.RELATIONS)
+        fields = [name for name in requested if name in model.FIELDS]
+    return fields, include
@@ -0,0 +1,37 @@
+import hashlib
+import json
+from flask import current_app, request
+
+
+def make_etag(*parts):
+    """
+    ETag fort calculé à partir des versions (id, updated_at, ...) des
+    données renvoyées: il est connu avant de sérialiser la réponse.
+    """
+    raw = json.dumps(parts, default=str, separators=(',', ':'))
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+
+def row_versions(objs):
+    """Versions (id, updated_at) d'une liste d'objets"""
+    return [(obj.id, obj.updated_at) for obj in objs]
+
+
+def cache_control(resource):
+    """Cache-Control de la ressource, configuré dans HTTP_CACHE_CONTROL"""
+    policies = current_app.config['HTTP_CACHE_CONTROL']
+    return policies.get(resource, policies['default'])
+
+
+def conditional_response(resource, etag, render):
+    """
+    Répond 304 sans corps si If-None-Match correspond à l'ETag courant,
+    sinon appelle render() pour construire le corps (statut 200).
+    Avec la compression active, les deux portent Vary: Accept-Encoding.
+    """
+    headers = {'ETag': f'"{etag}"', 'Cache-Control': cache_control(resource)}
+    if current_app.config.get('COMPRESS_ENABLED', False):
+        headers['Vary'] = 'Accept-Encoding'
+    if request.if_none_match.contains_weak(etag):
+        return current_app.response_class(status=304, headers=headers)
+    return render(), 200, headers
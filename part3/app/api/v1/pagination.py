@@ -0,0 +1,25 @@
+from flask import current_app
+from flask_restx import reqparse
+
+# Paramètres communs à tous les endpoints de liste
+pagination_parser = reqparse.RequestParser()
+pagination_parser.add_argument(
+    'after', type=str, location='args',
+    help='Cursor returned as next_cursor by the previous page')
+pagination_parser.add_argument(
+    'limit', type=int, location='args', help='Number of items per page')
+
+
+def get_page_args(parser=pagination_parser):
+    """Retourne (args, after, limit) à partir de la query string"""
+    args = parser.parse_args()
+    limit = args.get('limit') or current_app.config['PAGE_SIZE']
+    if limit < 1:
+        raise ValueError("Le paramètre 'limit' doit être positif")
+    limit = min(limit, current_app.config['MAX_PAGE_SIZE'])
+    return args, args.get('after'), limit
+
+
+def page_response(items, next_cursor):
+    """Enveloppe commune des réponses paginées"""
+    return {'items': items, 'next_cursor': next_cursor}
@@ -1,7 +1,14 @@
-from flask_restx import Namespace, Resource, fields
-from flask import request
-from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
+from flask_restx import Namespace, Resource, fields, reqparse
+from flask import request, current_app
+from flask_jwt_extended import jwt_required, get_jwt_identity
 from app.services import get_facade
+from app.models.place import Place
+from app.models.review import Review
+from app.api.v1.pagination import pagination_parser, get_page_args, page_response
+from app.api.v1.bulk import get_bulk_operations
+from app.api.v1.http_cache import conditional_response, make_etag, row_versions
+from app.api.v1.fieldsets import add_fieldset_arguments, fieldset_parser, get_fieldset
+from app.principals import current_principal
 
 api = Namespace('places', description='Place operations')
 
@@ -30,6 +37,28 @@ place_model = api.model('Place', {
     'reviews': fields.List(fields.String, description="List of reviews on the place")
 })
 
+# Corps des opérations groupées sur les lieux
+place_bulk_model = api.model('PlaceBulk', {
+    'create': fields.List(fields.Nested(place_model), description='Places to create'),
+    'update': fields.List(fields.Raw, description='Partial places to update, each with its id'),
+    'delete': fields.List(fields.String, description='IDs of the places to delete (admins only)')
+})
+
+# Paramètres de filtre et de tri de la liste des lieux
+place_list_parser = pagination_parser.copy()
+place_list_parser.add_argument('min_price', type=float, location='args',
+                               help='Minimum price per night')
+place_list_parser.add_argument('max_price', type=float, location='args',
+                               help='Maximum price per night')
+place_list_parser.add_argument('amenities', type=str, location='args',
+                               help='Comma separated amenity IDs the place must have')
+place_list_parser.add_argument('amenities_match', type=str, default='all',
+                               choices=('all', 'any'), location='args',
+                               help='all (AND) or any (OR) of the listed amenities')
+place_list_parser.add_argument('sort', type=str, default='created_at', location='args',
+                               help='price, rating or created_at, prefix with - for descending order')
+add_fieldset_arguments(place_list_parser)
+
 # Modèle pour la review
 review_model = api.model('PlaceReview', {
     'text': fields.String(required=True, description='Text of the review'),
@@ -67,30 +96,150 @@ class PlaceList(Resource):
         # Fallback si to_dict n'est pas disponible
         return {"id": new_place.id, "message": "Place created successfully"}, 201
 
+    @api.expect(place_list_parser)
     @api.response(200, 'List of places retrieved successfully')
+    @api.response(400, 'Invalid pagination, filter or sort parameters')
     def get(self):
         facade = get_facade()
-        """Retrieve a list of all places"""
-        places = facade.place_facade.get_all_places()
-
-        # Vérifier que chaque place a l'attribut 'amenities'
-        for place in places:
-            if not hasattr(place, 'amenities'):
-                place.amenities = []
-            if not hasattr(place, 'reviews'):
-                place.reviews = []
-
-        # Utilisation de to_dict() pour retourner chaque place sous forme de dictionnaire
-        return [place.to_dict() for place in places], 200
+        """Retrieve a page of places, optionally filtered by price and sorted"""
+        try:
+            args, after, limit = get_page_args(place_list_parser)
+            fields, include = get_fieldset(args, Place)
+            amenity_ids = [amenity_id.strip() for amenity_id
+                           in (args['amenities'] or '').split(',') if amenity_id.strip()]
+            places, next_cursor = facade.place_facade.get_places_page(
+                after=after, limit=limit, min_price=args['min_price'],
+                max_price=args['max_price'], amenity_ids=amenity_ids,
+                match_all_amenities=args['amenities_match'] == 'all',
+                sort=args['sort'])
+        except ValueError as e:
+            return {"error": str(e)}, 400
+
+        # ETag calculé sans sérialiser; sérialisation groupée pour éviter
+        # une requête par lieu (N+1)
+        etag = make_etag(next_cursor, *facade.place_facade.get_place_versions(places, include))
+        return conditional_response(
+            'place_list', etag,
+            lambda: page_response(Place.to_dict_many(places, fields, include), next_cursor))
+
+
+@api.route('/bulk')
+class PlaceBulk(Resource):
+    @jwt_required()
+    @api.expect(place_bulk_model)
+    @api.response(200, 'Per-item results: index, status and id or error')
+    @api.response(400, 'Invalid bulk request')
+    def post(self):
+        facade = get_facade()
+        """Create, update and delete places in batches, one transaction per operation"""
+        current_user_id = get_jwt_identity()
+        is_admin = current_principal().is_admin
+        try:
+            batches = get_bulk_operations(request.get_json(silent=True))
+        except ValueError as e:
+            return {"error": str(e)}, 400
+
+        results = {}
+        if 'create' in batches:
+            results['create'] = facade.place_facade.create_places(
+                batches['create'], current_user_id)
+        if 'update' in batches:
+            results['update'] = facade.place_facade.update_places(
+                batches['update'], current_user_id, is_admin)
+        if 'delete' in batches:
+            results['delete'] = facade.place_facade.delete_places(
+                batches['delete'], is_admin)
+        return results, 200
+
+
+nearby_parser = reqparse.RequestParser()
+nearby_parser.add_argument('lat', type=float, required=True, location='args',
+                           help='Latitude of the search center')
+nearby_parser.add_argument('lng', type=float, required=True, location='args',
+                           help='Longitude of the search center')
+nearby_parser.add_argument('radius_km', type=float, default=10.0, location='args',
+                           help='Search radius in kilometers')
+nearby_parser.add_argument('limit', type=int, location='args',
+                           help='Maximum number of places returned')
+add_fieldset_arguments(nearby_parser)
+
+
+@api.route('/nearby')
+class PlaceNearby(Resource):
+    @api.expect(nearby_parser)
+    @api.response(200, 'Places sorted by distance retrieved successfully')
+    @api.response(400, 'Invalid search parameters')
+    def get(self):
+        facade = get_facade()
+        """Find the places within radius_km of (lat, lng), closest first"""
+        args = nearby_parser.parse_args()
+        try:
+            fields, include = get_fieldset(args, Place)
+        except ValueError as e:
+            return {"error": str(e)}, 400
+        limit = args['limit'] or current_app.config['PAGE_SIZE']
+        if limit < 1:
+            return {"error": "Le paramètre 'limit' doit être positif"}, 400
+        limit = min(limit, current_app.config['MAX_PAGE_SIZE'])
+        max_radius_km = current_app.config['NEARBY_MAX_RADIUS_KM']
+        if args['radius_km'] > max_radius_km:
+            return {"error": f"Le rayon ne peut pas dépasser {max_radius_km} km"}, 400
+
+        try:
+            results = facade.place_facade.get_places_nearby(
+                args['lat'], args['lng'], args['radius_km'], limit)
+        except ValueError as e:
+            return {"error": str(e)}, 400
+
+        places = Place.to_dict_many((place for _, place in results), fields, include)
+        for place_data, (distance, _) in zip(places, results):
+            place_data['distance_km'] = round(distance, 3)
+        return {'items': places}, 200
+
+
+search_parser = pagination_parser.copy()
+search_parser.add_argument('q', type=str, required=True, location='args',
+                           help='Words to look for in titles and descriptions')
+add_fieldset_arguments(search_parser)
+
+
+@api.route('/search')
+class PlaceSearch(Resource):
+    @api.expect(search_parser)
+    @api.response(200, 'Matching places retrieved successfully, best match first')
+    @api.response(400, 'Invalid search parameters')
+    def get(self):
+        facade = get_facade()
+        """Full-text search over place titles and descriptions"""
+        try:
+            args, after, limit = get_page_args(search_parser)
+            fields, include = get_fieldset(args, Place)
+            results, next_cursor = facade.place_facade.search_places(
+                args['q'], after=after, limit=limit)
+        except ValueError as e:
+            return {"error": str(e)}, 400
+
+        places = Place.to_dict_many((place for place, _, _ in results), fields, include)
+        for place_data, (_, score, snippets) in zip(places, results):
+            place_data['score'] = score
+            place_data['snippets'] = snippets
+        return page_response(places, next_cursor), 200
 
 
 @api.route('/<place_id>')
 class PlaceResource(Resource):
+    @api.expect(fieldset_parser)
     @api.response(200, 'Place details retrieved successfully')
+    @api.response(304, 'Place not modified since the ETag sent in If-None-Match')
+    @api.response(400, 'Invalid fields parameters')
     @api.response(404, 'Place not found')
     def get(self, place_id):
         facade = get_facade()
         """Get place details by ID"""
+        try:
+            fields, include = get_fieldset(fieldset_parser.parse_args(), Place)
+        except ValueError as e:
+            return {"error": str(e)}, 400
         place = facade.place_facade.get_place(place_id)
         if not place:
             return {"error": "Place not found"}, 404
@@ -101,7 +250,9 @@ class PlaceResource(Resource):
         if not hasattr(place, 'reviews'):
             place.reviews = []
 
-        return place.to_dict(), 200
+        etag = make_etag(*facade.place_facade.get_place_versions([place], include))
+        return conditional_response(
+            'place', etag, lambda: place.to_dict(fields=fields, include=include))
 
     @jwt_required()
     @api.expect(place_model)
@@ -122,9 +273,8 @@ class PlaceResource(Resource):
         if not place:
             return {"error": "Place not found"}, 404
 
-        # Récupérer les informations du JWT (is_admin)
-        claims = get_jwt()
-        is_admin = claims.get('is_admin', False)
+        # Statut admin du principal (en cache par jti du token)
+        is_admin = current_principal().is_admin
 
         # Si l'utilisateur est un admin ou si l'utilisateur est le propriétaire de la place
         if not is_admin and place.owner_id != current_user_id:
@@ -155,9 +305,8 @@ class PlaceResource(Resource):
     def delete(self, place_id):
         facade = get_facade()
         """Delete a place (admins only)"""
-        # Récupérer les informations du JWT (is_admin)
-        claims = get_jwt()
-        is_admin = claims.get('is_admin', False)
+        # Statut admin du principal (en cache par jti du token)
+        is_admin = current_principal().is_admin
 
         if not is_admin:
             return {"error": "Unauthorized action, admins only"}, 403
@@ -175,11 +324,17 @@ class PlaceResource(Resource):
 
 @api.route('/<place_id>/reviews')
 class PlaceReviews(Resource):
+    @api.expect(fieldset_parser)
     @api.response(200, 'List of reviews for the place retrieved successfully')
+    @api.response(400, 'Invalid fields parameters')
     @api.response(404, 'Place not found')
     def get(self, place_id):
         facade = get_facade()
         """Get all reviews for a specific place"""
+        try:
+            fields, _ = get_fieldset(fieldset_parser.parse_args(), Review)
+        except ValueError as e:
+            return {"error": str(e)}, 400
         # Vérifier d'abord si la place existe
         place = facade.place_facade.get_place(place_id, load_reviews=False)
         if not place:
@@ -188,12 +343,10 @@ class PlaceReviews(Resource):
         # Utiliser la méthode directe pour éviter les problèmes de récursion
         reviews = facade.review_facade.get_reviews_by_place_direct(place_id)
 
-        # Si aucune review n'est trouvée, retourner une liste vide
-        if not reviews:
-            return [], 200
-
-        # Sérialiser les avis avant de les retourner
-        return [review.to_dict() for review in reviews], 200
+        # Sérialiser les avis (liste vide si aucune review)
+        return conditional_response(
+            'review_list', make_etag(*row_versions(reviews)),
+            lambda: [review.to_dict(fields=fields) for review in reviews])
 
     @jwt_required()
     @api.expect(review_model)
@@ -222,13 +375,14 @@ class PlaceReviews(Resource):
         review_data['place_id'] = place_id
 
         # Vérifier si l'utilisateur a déjà laissé un avis sur ce lieu
-        existing_reviews = facade.review_facade.get_reviews_by_place_direct(
-            place_id)
-        if existing_reviews and any(review.user_id == current_user_id for review in existing_reviews):
+        if facade.review_facade.user_has_reviewed_place(current_user_id, place_id):
             return {"error": "You have already reviewed this place"}, 400
 
         # Créer la review
-        review = facade.review_facade.create_review(review_data)
+        try:
+            review = facade.review_facade.create_review(review_data)
+        except ValueError as e:
+            return {"error": str(e)}, 400
 
         if not review:
             return {"error": "Invalid review data"}, 400
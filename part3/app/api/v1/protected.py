@@ -1,5 +1,6 @@
 from flask_restx import Namespace, Resource
-from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from app.principals import current_principal
 
 
 api = Namespace('protected', description='Secured Endpoints')
@@ -11,7 +12,7 @@ class ProtectedResource(Resource):
     def get(self):
         """Un endpoint protégé qui nécessite un token JWT valide"""
         current_user_id = get_jwt_identity()  # Retourne juste l'ID (string)
-        # Récupère is_admin depuis additional_claims
-        is_admin = get_jwt()["is_admin"]
+        # Récupère is_admin depuis le principal (en cache par jti du token)
+        is_admin = current_principal().is_admin
 
         return {'message': f'Hello, user {current_user_id}'}, 200
@@ -1,7 +1,14 @@
 from flask_restx import Namespace, Resource, fields
 from app.services import facade
+from flask import request
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from app.services import get_facade
+from app.api.v1.pagination import pagination_parser, get_page_args, page_response
+from app.api.v1.bulk import get_bulk_operations
+from app.api.v1.http_cache import conditional_response, make_etag, row_versions
+from app.api.v1.fieldsets import add_fieldset_arguments, fieldset_parser, get_fieldset
+from app.models.review import Review
+from app.principals import current_principal
 
 api = Namespace('reviews', description='Review operations')
 
@@ -13,6 +20,15 @@ review_model = api.model('Review', {
     'place_id': fields.String(required=True, description='ID of the place')
 })
 
+# Corps des opérations groupées sur les avis
+review_bulk_model = api.model('ReviewBulk', {
+    'create': fields.List(fields.Raw, description='Reviews to create: text, rating, place_id'),
+    'update': fields.List(fields.Raw, description='Reviews to update: id, text, rating'),
+    'delete': fields.List(fields.String, description='IDs of the reviews to delete')
+})
+
+review_list_parser = add_fieldset_arguments(pagination_parser.copy())
+
 
 @api.route('/')
 class ReviewList(Resource):
@@ -42,37 +58,88 @@ class ReviewList(Resource):
             return {'message': 'You cannot review your own place.'}, 400
 
         # Vérifier si l'utilisateur a déjà laissé un avis sur ce lieu
-        existing_reviews = facade.review_facade.get_reviews_by_place(
-            review_data['place_id'])
-        if existing_reviews and any(review.user_id == current_user_id for review in existing_reviews):
+        if facade.review_facade.user_has_reviewed_place(
+                current_user_id, review_data['place_id']):
             return {'message': 'You have already reviewed this place.'}, 400
 
         # Créer l'avis
-        review = facade.review_facade.create_review(review_data)
+        try:
+            review = facade.review_facade.create_review(review_data)
+        except ValueError as e:
+            return {'message': str(e)}, 400
         if review:
             return review.to_dict(), 201
 
         return {'message': 'Invalid data'}, 400
 
+    @api.expect(review_list_parser)
+    @api.response(200, 'List of reviews retrieved successfully')
+    @api.response(400, 'Invalid pagination or fields parameters')
     def get(self):
         facade = get_facade()
-        """Retrieve a list of all reviews"""
-        reviews = facade.review_facade.get_all_reviews()
-        # Sérialisation de tous les avis
-        return [review.to_dict() for review in reviews], 200
+        """Retrieve a page of reviews"""
+        try:
+            args, after, limit = get_page_args(review_list_parser)
+            fields, _ = get_fieldset(args, Review)
+            reviews, next_cursor = facade.review_facade.get_reviews_page(
+                after=after, limit=limit)
+        except ValueError as e:
+            return {'message': str(e)}, 400
+        # Sérialisation de la page d'avis
+        return conditional_response(
+            'review_list', make_etag(next_cursor, *row_versions(reviews)),
+            lambda: page_response([review.to_dict(fields=fields) for review in reviews],
+                                  next_cursor))
+
+
+@api.route('/bulk')
+class ReviewBulk(Resource):
+    @jwt_required()
+    @api.expect(review_bulk_model)
+    @api.response(200, 'Per-item results: index, status and id or error')
+    @api.response(400, 'Invalid bulk request')
+    def post(self):
+        facade = get_facade()
+        """Create, update and delete reviews in batches, one transaction per operation"""
+        current_user_id = get_jwt_identity()
+        is_admin = current_principal().is_admin
+        try:
+            batches = get_bulk_operations(request.get_json(silent=True))
+        except ValueError as e:
+            return {'message': str(e)}, 400
+
+        results = {}
+        if 'create' in batches:
+            results['create'] = facade.review_facade.create_reviews(
+                batches['create'], current_user_id)
+        if 'update' in batches:
+            results['update'] = facade.review_facade.update_reviews(
+                batches['update'], current_user_id, is_admin)
+        if 'delete' in batches:
+            results['delete'] = facade.review_facade.delete_reviews(
+                batches['delete'], current_user_id, is_admin)
+        return results, 200
 
 
 @api.route('/<review_id>')
 class ReviewResource(Resource):
 
+    @api.expect(fieldset_parser)
     @api.response(200, 'Review details retrieved successfully')
+    @api.response(400, 'Invalid fields parameters')
     @api.response(404, 'Review not found')
     def get(self, review_id):
         facade = get_facade()
         """Get review details by ID"""
+        try:
+            fields, _ = get_fieldset(fieldset_parser.parse_args(), Review)
+        except ValueError as e:
+            return {'message': str(e)}, 400
         review = facade.review_facade.get_review(review_id)
         if review:
-            return review.to_dict(), 200  # Sérialisation avant de renvoyer
+            return conditional_response(
+                'review', make_etag(*row_versions([review])),
+                lambda: review.to_dict(fields=fields))
         return {'message': 'Review not found'}, 404
 
     @jwt_required()
@@ -91,7 +158,7 @@ class ReviewResource(Resource):
             return {'message': 'Review not found'}, 404
 
         # Vérifie si l'utilisateur est le propriétaire ou un administrateur
-        if review.user_id != user_id and not facade.user_facade.get_user(user_id).is_admin:
+        if review.user_id != user_id and not current_principal().is_admin:
             return {'message': 'You can only update your own review or be an admin'}, 403
 
         review_data = api.payload
@@ -103,8 +170,9 @@ class ReviewResource(Resource):
         if not (1 <= new_rating <= 5):
             return {'message': 'Rating must be between 1 and 5'}, 400
 
-        # Met à jour la review
-        review.update_review(new_text, new_rating)
+        # Met à jour la review (et les agrégats du lieu) via la façade
+        facade.review_facade.update_review(
+            review_id, {'text': new_text, 'rating': new_rating})
         return {'message': 'Review updated successfully'}, 200
 
     @jwt_required()
@@ -121,7 +189,7 @@ class ReviewResource(Resource):
             return {'message': 'Review not found'}, 404
 
         # Vérifie si l'utilisateur est le propriétaire ou un administrateur
-        if review.user_id != user_id and not facade.user_facade.get_user(user_id).is_admin:
+        if review.user_id != user_id and not current_principal().is_admin:
             return {'message': 'You can only delete your own review or be an admin'}, 403
 
         # Supprime la review
@@ -131,18 +199,23 @@ class ReviewResource(Resource):
 
 @api.route('/places/<place_id>/reviews')
 class PlaceReviewList(Resource):
+    @api.expect(fieldset_parser)
     @api.response(200, 'List of reviews for the place retrieved successfully')
+    @api.response(400, 'Invalid fields parameters')
     @api.response(404, 'Place not found')
     def get(self, place_id):
         facade = get_facade()
         """Get all reviews for a specific place"""
+        try:
+            fields, _ = get_fieldset(fieldset_parser.parse_args(), Review)
+        except ValueError as e:
+            return {'message': str(e)}, 400
         # Utiliser la méthode directe pour éviter de vérifier l'existence de la place
         reviews = facade.review_facade.get_reviews_by_place_direct(place_id)
         if reviews is None:
             return {"message": "Place not found"}, 404
 
-        if not reviews:  # Si la liste est vide, retourner une liste vide mais pas 404
-            return [], 200
-
-        # Sérialiser les avis avant de les retourner
-        return [review.to_dict() for review in reviews], 200
+        # Sérialiser les avis (liste vide si aucune review, mais pas 404)
+        return conditional_response(
+            'review_list', make_etag(*row_versions(reviews)),
+            lambda: [review.to_dict(fields=fields) for review in reviews])
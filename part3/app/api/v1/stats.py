@@ -0,0 +1,62 @@
+from flask_restx import Namespace, Resource
+from flask_jwt_extended import jwt_required
+from app.passwords import get_password_hasher
+from app.persistence.cache import get_entity_cache
+from app.principals import current_principal, get_principal_cache
+from app.revocation import get_revocation_list
+
+api = Namespace('stats', description='Runtime statistics')
+
+
+@api.route('/cache')
+class EntityCacheStats(Resource):
+    @jwt_required()
+    @api.response(200, 'Entity cache statistics of this process')
+    @api.response(403, 'Admin privileges required')
+    def get(self):
+        """Hit/miss counters of the entity cache (Admin only)"""
+        if not current_principal().is_admin:
+            return {'message': 'Admin privileges required'}, 403
+        cache = get_entity_cache()
+        if cache is None:
+            return {'enabled': False}, 200
+        return {'enabled': True, **cache.stats()}, 200
+
+
+@api.route('/principals')
+class PrincipalCacheStats(Resource):
+    @jwt_required()
+    @api.response(200, 'Token principal cache statistics of this process')
+    @api.response(403, 'Admin privileges required')
+    def get(self):
+        """Hit/miss counters of the token principal cache (Admin only)"""
+        if not current_principal().is_admin:
+            return {'message': 'Admin privileges required'}, 403
+        cache = get_principal_cache()
+        if cache is None:
+            return {'enabled': False}, 200
+        return {'enabled': True, **cache.stats()}, 200
+
+
+@api.route('/passwords')
+class PasswordHasherStats(Resource):
+    @jwt_required()
+    @api.response(200, 'Password hashing pool statistics of this process')
+    @api.response(403, 'Admin privileges required')
+    def get(self):
+        """Queue wait and hash time of the password hashing pool (Admin only)"""
+        if not current_principal().is_admin:
+            return {'message': 'Admin privileges required'}, 403
+        return get_password_hasher().stats(), 200
+
+
+@api.route('/revocations')
+class RevocationStats(Resource):
+    @jwt_required()
+    @api.response(200, 'Token revocation filter statistics of this process')
+    @api.response(403, 'Admin privileges required')
+    def get(self):
+        """Bloom filter and store lookups of the token revocation list (Admin only)"""
+        if not current_principal().is_admin:
+            return {'message': 'Admin privileges required'}, 403
+        return get_revocation_list().stats(), 200
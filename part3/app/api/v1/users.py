@@ -1,7 +1,11 @@
 from flask_restx import Namespace, Resource, fields
-from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
+from flask_jwt_extended import jwt_required, get_jwt_identity
 from app.services import get_facade
+from app.api.v1.pagination import pagination_parser, get_page_args, page_response
 from app.models.user import User
+from app.passwords import PasswordHasherBusy
+from app.models.place import Place
+from app.principals import current_principal
 
 api = Namespace('users', description='User operations')
 
@@ -20,11 +24,11 @@ class UserList(Resource):
     @api.response(201, 'User successfully created')
     @api.response(400, 'Invalid input data')
     @api.response(403, 'Forbidden')
+    @api.response(503, 'Password hashing pool saturated, retry later')
     def post(self):
         facade = get_facade()
         """Register a new user (Admin only)"""
-        claims = get_jwt()
-        if not claims.get("is_admin"):
+        if not current_principal().is_admin:
             return {'error': 'Forbidden'}, 403
 
         user_data = api.payload
@@ -44,15 +48,25 @@ class UserList(Resource):
         if existing_user:
             return {'error': 'Email already registered'}, 400
 
-        new_user = facade.user_facade.create_user(user_data)
+        try:
+            new_user = facade.user_facade.create_user(user_data)
+        except PasswordHasherBusy as e:
+            return {'error': e.description}, 503, {'Retry-After': str(e.retry_after)}
         return {'id': new_user.id, 'message': 'User successfully created'}, 201
 
+    @api.expect(pagination_parser)
     @api.response(200, 'List of users retrieved successfully')
+    @api.response(400, 'Invalid pagination parameters')
     def get(self):
         facade = get_facade()
-        """Get the list of users"""
-        users = facade.user_facade.get_all_users()
-        return [{'id': user.id, 'first_name': user.first_name, 'last_name': user.last_name, 'email': user.email} for user in users], 200
+        """Get a page of users"""
+        try:
+            _, after, limit = get_page_args()
+            users, next_cursor = facade.user_facade.get_users_page(
+                after=after, limit=limit)
+        except ValueError as e:
+            return {'error': str(e)}, 400
+        return page_response([{'id': user.id, 'first_name': user.first_name, 'last_name': user.last_name, 'email': user.email} for user in users], next_cursor), 200
 
 
 @api.route('/<user_id>')
@@ -71,12 +85,12 @@ class UserResource(Resource):
     @api.expect(user_model, validate=False)
     @api.response(403, 'Unauthorized action')
     @api.response(400, 'Invalid modification')
+    @api.response(503, 'Password hashing pool saturated, retry later')
     def put(self, user_id):
         facade = get_facade()
         """Update user details (Self or Admin)"""
         current_user = get_jwt_identity()
-        claims = get_jwt()
-        is_admin = claims.get("is_admin", False)
+        is_admin = current_principal().is_admin
 
         # Seuls les admins peuvent modifier un autre utilisateur
         if current_user != str(user_id) and not is_admin:
@@ -111,7 +125,10 @@ class UserResource(Resource):
         if not user:
             return {'error': 'User not found'}, 404
 
-        updated_user = facade.user_facade.update_user(user_id, update_fields)
+        try:
+            updated_user = facade.user_facade.update_user(user_id, update_fields)
+        except PasswordHasherBusy as e:
+            return {'error': e.description}, 503, {'Retry-After': str(e.retry_after)}
         return {
             'id': updated_user.id,
             'first_name': updated_user.first_name,
@@ -136,7 +153,7 @@ class UserPlaces(Resource):
         places = facade.place_facade.get_places_by_user(user_id)
 
         # Sérialiser les places avant de les retourner
-        return [place.to_dict() for place in places], 200
+        return Place.to_dict_many(places), 200
 
 
 @api.route('/<user_id>/reviews')
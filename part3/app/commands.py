@@ -0,0 +1,132 @@
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from app import passwords
+from app.extensions import db
+from app.persistence import migrations
+from app.services import get_facade
+
+# Commandes de maintenance: flask --app run hbnb <commande>
+hbnb_cli = AppGroup('hbnb', help='HBnB maintenance commands.')
+
+
+def init_db():
+    """Crée les tables manquantes (et l'index plein texte des lieux)"""
+    db.create_all()
+
+
+def seed_admin():
+    """Crée l'admin par défaut s'il n'existe pas; True s'il a été créé"""
+    return get_facade().user_facade.initialize_admin()
+
+
+@hbnb_cli.command('init-db')
+def init_db_command():
+    """Create the missing tables and the full-text search index."""
+    init_db()
+    click.echo("Database schema created")
+
+
+@hbnb_cli.command('seed-admin')
+def seed_admin_command():
+    """Create the default admin account if it does not exist."""
+    if seed_admin():
+        click.echo("Admin account created")
+    else:
+        click.echo("Admin account already exists")
+
+
+@hbnb_cli.command('migrate')
+def migrate():
+    """Bring an existing database to the current schema, then fill the new columns."""
+    upgrade = migrations.upgrade()
+    created, added = upgrade.created, upgrade.added
+    for table in created:
+        click.echo(f"Table {table} created")
+    for table, column in added:
+        click.echo(f"Column {table}.{column} added")
+    if upgrade.removed_reviews:
+        click.echo(f"{upgrade.removed_reviews} duplicate review(s) removed")
+    for index in upgrade.indexes:
+        click.echo(f"Index {index} created")
+    # Les colonnes ajoutées valent 0 ou NULL: réparation à partir des données
+    facade = get_facade()
+    if (upgrade.removed_reviews
+            or {('places', 'review_count'), ('places', 'rating_sum')} & set(added)):
+        updated = facade.place_facade.recompute_rating_aggregates()
+        click.echo(f"Rating aggregates recomputed for {updated} place(s)")
+    if ('amenities', 'places_count') in added:
+        updated = facade.amenity_facade.recompute_places_counts()
+        click.echo(f"Place counts recomputed for {updated} amenity(ies)")
+    if ('places', 'geohash') in added:
+        updated = facade.place_facade.backfill_geohash()
+        click.echo(f"Geohash computed for {updated} place(s)")
+    if 'places_fts' in created:
+        indexed = facade.place_facade.rebuild_search_index()
+        click.echo(f"Search index rebuilt for {indexed} place(s)")
+    click.echo("Database schema up to date")
+
+
+@hbnb_cli.command('recompute-ratings')
+def recompute_ratings():
+    """Recompute review_count and rating_sum of every place from its reviews."""
+    updated = get_facade().place_facade.recompute_rating_aggregates()
+    click.echo(f"Rating aggregates recomputed for {updated} place(s)")
+
+
+@hbnb_cli.command('recompute-amenity-counts')
+def recompute_amenity_counts():
+    """Recompute places_count of every amenity from the place links."""
+    updated = get_facade().amenity_facade.recompute_places_counts()
+    click.echo(f"Place counts recomputed for {updated} amenity(ies)")
+
+
+@hbnb_cli.command('backfill-geohash')
+def backfill_geohash():
+    """Compute the geohash cell of places created before it existed."""
+    updated = get_facade().place_facade.backfill_geohash()
+    click.echo(f"Geohash computed for {updated} place(s)")
+
+
+@hbnb_cli.command('rebuild-search-index')
+def rebuild_search_index():
+    """Recreate the places_fts full-text table and reindex every place."""
+    indexed = get_facade().place_facade.rebuild_search_index()
+    click.echo(f"Search index rebuilt for {indexed} place(s)")
+
+
+@hbnb_cli.command('purge-revoked-tokens')
+def purge_revoked_tokens():
+    """Delete the revocations of tokens that have expired."""
+    purged = get_facade().user_facade.purge_revoked_tokens()
+    click.echo(f"{purged} expired revocation(s) purged")
+
+
+@hbnb_cli.command('password-hashes')
+def password_hashes():
+    """Count users per password hash algorithm and cost."""
+    policy = passwords.policy_from_config(current_app.config)
+    for algorithm, cost, count in get_facade().user_facade.count_password_hashes():
+        status = 'current' if (algorithm, cost) == policy else 'rehashed at next login'
+        click.echo(f"{algorithm or 'unknown'} cost={cost}: {count} user(s), {status}")
+
+
+@hbnb_cli.command('calibrate-password-hash')
+@click.option('--algorithm', type=click.Choice(sorted(passwords.DEFAULT_COSTS)),
+              help='Algorithm to time (default: PASSWORD_HASH_ALGORITHM).')
+def calibrate_password_hash(algorithm):
+    """Time each hash cost on this machine against PASSWORD_HASH_SLO_MS."""
+    algorithm = algorithm or current_app.config['PASSWORD_HASH_ALGORITHM']
+    slo_ms = current_app.config['PASSWORD_HASH_SLO_MS']
+    best = None
+    for cost in range(10, 17) if algorithm == 'bcrypt' else range(12, 19):
+        elapsed = passwords.time_hash(algorithm, cost)
+        click.echo(f"{algorithm} cost={cost}: {elapsed:.0f} ms")
+        if elapsed > slo_ms:
+            break
+        best = cost
+    if best is None:
+        click.echo(f"No cost fits in {slo_ms} ms on this machine")
+    else:
+        key = 'BCRYPT_LOG_ROUNDS' if algorithm == 'bcrypt' else 'SCRYPT_LOG_N'
+        click.echo(f"Highest cost within {slo_ms} ms: {key}={best}")
@@ -0,0 +1,141 @@
+"""
+Compression négociée (Accept-Encoding) des réponses JSON: brotli si le
+paquet optionnel brotli est installé, gzip sinon.
+
+Les petits corps (moins de COMPRESS_MIN_SIZE octets) partent tels quels.
+Les réponses en flux et les corps de plus de COMPRESS_STREAM_MIN_SIZE
+octets sont compressés morceau par morceau et envoyés en flux, sans
+construire de copie compressée complète en mémoire.
+"""
+import zlib
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # brotli est optionnel
+    brotli = None
+
+# Taille des morceaux compressés pour les gros corps
+CHUNK_SIZE = 64 * 1024
+
+
+def available_encodings():
+    """Encodages supportés, par ordre de préférence"""
+    return ['br', 'gzip'] if brotli is not None else ['gzip']
+
+
+class _GzipCompressor:
+    def __init__(self, level):
+        # wbits 16 + MAX_WBITS: en-tête et somme de contrôle gzip
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data):
+        return self._compressor.compress(data)
+
+    def finish(self):
+        return self._compressor.flush()
+
+
+class _BrotliCompressor:
+    def __init__(self, level):
+        self._compressor = brotli.Compressor(mode=brotli.MODE_TEXT, quality=level)
+
+    def compress(self, data):
+        return self._compressor.process(data)
+
+    def finish(self):
+        return self._compressor.finish()
+
+
+def make_compressor(encoding, config):
+    if encoding == 'br':
+        return _BrotliCompressor(config['COMPRESS_BR_LEVEL'])
+    return _GzipCompressor(config['COMPRESS_LEVEL'])
+
+
+def compress_stream(chunks, compressor):
+    """Compresse un itérable d'octets en flux, sans attendre la fin du corps"""
+    try:
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode('utf-8')
+            compressed = compressor.compress(chunk)
+            if compressed:
+                yield compressed
+        yield compressor.finish()
+    finally:
+        # Libère le générateur d'origine si le client se déconnecte
+        close = getattr(chunks, 'close', None)
+        if close is not None:
+            close()
+
+
+def _slices(data):
+    for start in range(0, len(data), CHUNK_SIZE):
+        yield data[start:start + CHUNK_SIZE]
+
+
+def _varies_on_encoding(response, config):
+    """
+    La représentation dépend d'Accept-Encoding dès que la route est
+    compressible, même quand cette réponse-ci ne l'est pas (304, HEAD,
+    petit corps): un cache partagé doit recevoir le même Vary que la 200.
+    """
+    if 'no-transform' in response.headers.get('Cache-Control', ''):
+        return False
+    return response.status_code == 304 or response.mimetype in config['COMPRESS_MIMETYPES']
+
+
+def _should_compress(response, config):
+    if response.status_code < 200 or response.status_code in (204, 206, 304):
+        return False
+    if request.method == 'HEAD' or response.direct_passthrough:
+        return False
+    if 'Content-Encoding' in response.headers:
+        return False
+    if 'no-transform' in response.headers.get('Cache-Control', ''):
+        return False
+    return response.mimetype in config['COMPRESS_MIMETYPES']
+
+
+def compress_response(response, config):
+    """Compresse la réponse si le client l'accepte et si elle en vaut la peine"""
+    if _varies_on_encoding(response, config):
+        response.vary.add('Accept-Encoding')
+    if not _should_compress(response, config):
+        return response
+
+    encoding = request.accept_encodings.best_match(available_encodings())
+    if encoding is None:
+        return response
+
+    compressor = make_compressor(encoding, config)
+    if response.is_streamed:
+        response.response = compress_stream(response.response, compressor)
+        response.headers.pop('Content-Length', None)
+    else:
+        data = response.get_data()
+        if len(data) < config['COMPRESS_MIN_SIZE']:
+            return response
+        if len(data) >= config['COMPRESS_STREAM_MIN_SIZE']:
+            response.response = compress_stream(_slices(data), compressor)
+            response.headers.pop('Content-Length', None)
+        else:
+            response.set_data(compressor.compress(data) + compressor.finish())
+
+    response.headers['Content-Encoding'] = encoding
+    # Le corps compressé n'est plus identique octet par octet: l'ETag
+    # devient faible (If-None-Match compare les ETags faibles)
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    return response
+
+
+def init_app(app):
+    if not app.config.get('COMPRESS_ENABLED', False):
+        return
+
+    @app.after_request
+    def _compress_response(response):
+        return compress_response(response, app.config)
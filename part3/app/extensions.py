@@ -2,7 +2,9 @@
 from flask_sqlalchemy import SQLAlchemy
 from flask_bcrypt import Bcrypt
 from flask_jwt_extended import JWTManager
+from app.persistence.routing import RoutingSession
 
-db = SQLAlchemy()
+# Lectures routées vers les réplicas éventuels (voir app/persistence/routing.py)
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 jwt = JWTManager()
 bcrypt = Bcrypt()
@@ -0,0 +1,105 @@
+"""Outils géographiques: geohash, distance haversine et couverture d'un rayon"""
+import math
+
+EARTH_RADIUS_KM = 6371.0088
+GEOHASH_PRECISION = 9
+_BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+
+
+def encode_geohash(latitude, longitude, precision=GEOHASH_PRECISION):
+    """Encode une position en geohash (cellules triées par préfixe)"""
+    lat_range = [-90.0, 90.0]
+    lng_range = [-180.0, 180.0]
+    chars = []
+    bit, value, even = 0, 0, True
+    while len(chars) < precision:
+        target, coord = (lng_range, longitude) if even else (lat_range, latitude)
+        middle = (target[0] + target[1]) / 2
+        if coord >= middle:
+            value = (value << 1) | 1
+            target[0] = middle
+        else:
+            value <<= 1
+            target[1] = middle
+        even = not even
+        bit += 1
+        if bit == 5:
+            chars.append(_BASE32[value])
+            bit, value = 0, 0
+    return ''.join(chars)
+
+
+def haversine_km(lat1, lng1, lat2, lng2):
+    """Distance orthodromique en kilomètres entre deux positions"""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lng2 - lng1)
+    a = (math.sin(d_phi / 2) ** 2
+         + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def _radius_degrees(latitude, radius_km):
+    """
+    Demi-largeurs (d_lat, d_lng) en degrés de la boîte englobant le rayon.
+    d_lng est exact pour un grand cercle (il s'élargit vers les pôles);
+    il vaut 180 quand le cercle contient un pôle.
+    """
+    angle = radius_km / EARTH_RADIUS_KM
+    d_lat = math.degrees(angle)
+    cos_lat = math.cos(math.radians(latitude))
+    if angle >= math.pi / 2 or math.sin(angle) >= cos_lat:
+        return d_lat, 180.0
+    return d_lat, math.degrees(math.asin(math.sin(angle) / cos_lat))
+
+
+def bounding_box(latitude, longitude, radius_km):
+    """
+    Retourne (min_lat, max_lat, min_lng, max_lng) englobant le rayon.
+    min_lng > max_lng signifie que la boîte traverse l'antiméridien.
+    """
+    d_lat, d_lng = _radius_degrees(latitude, radius_km)
+    min_lat, max_lat = max(-90.0, latitude - d_lat), min(90.0, latitude + d_lat)
+    # Aux pôles, toutes les longitudes sont concernées
+    if d_lng >= 180.0:
+        return min_lat, max_lat, -180.0, 180.0
+    min_lng = (longitude - d_lng + 540.0) % 360.0 - 180.0
+    max_lng = (longitude + d_lng + 540.0) % 360.0 - 180.0
+    return min_lat, max_lat, min_lng, max_lng
+
+
+def _cell_size(precision):
+    """Hauteur et largeur (en degrés) d'une cellule geohash"""
+    lat_bits = (5 * precision) // 2
+    lng_bits = 5 * precision - lat_bits
+    return 180.0 / (1 << lat_bits), 360.0 / (1 << lng_bits)
+
+
+def covering_cells(latitude, longitude, radius_km):
+    """
+    Préfixes geohash dont l'union couvre le rayon autour de la position.
+
+    On choisit la précision la plus fine dont la cellule est au moins aussi
+    grande que le rayon: la cellule du centre et ses 8 voisines suffisent
+    alors. Retourne une liste vide si le rayon dépasse les plus grandes
+    cellules (pas de préfiltre geohash possible).
+    """
+    d_lat, d_lng = _radius_degrees(latitude, radius_km)
+
+    precision = 0
+    for candidate in range(1, GEOHASH_PRECISION + 1):
+        cell_lat, cell_lng = _cell_size(candidate)
+        if cell_lat < d_lat or cell_lng < d_lng:
+            break
+        precision = candidate
+    if precision == 0:
+        return []
+
+    cell_lat, cell_lng = _cell_size(precision)
+    cells = set()
+    for lat_step in (-1, 0, 1):
+        lat = min(90.0, max(-90.0, latitude + lat_step * cell_lat))
+        for lng_step in (-1, 0, 1):
+            lng = (longitude + lng_step * cell_lng + 540.0) % 360.0 - 180.0
+            cells.add(encode_geohash(lat, lng, precision))
+    return sorted(cells)
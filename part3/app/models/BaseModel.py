@@ -1,4 +1,6 @@
 from app.extensions import db
+from app.persistence.unit_of_work import commit
+from sqlalchemy.orm import declared_attr
 import uuid
 from datetime import datetime
 
@@ -12,10 +14,16 @@ class BaseModel(db.Model):
     updated_at = db.Column(
         db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    @declared_attr
+    def __table_args__(cls):
+        # Index composite utilisé par la pagination par curseur
+        return (db.Index(f'ix_{cls.__tablename__}_created_at_id', 'created_at', 'id'),)
+
     def save(self):
         """Update the updated_at timestamp whenever the object is modified"""
         self.updated_at = datetime.utcnow()
-        db.session.commit()
+        # Commit immédiat, ou à la fin de l'unité de travail en cours
+        commit()
 
     def update(self, data):
         """Update the attributes of the object based on the provided dictionary"""
@@ -7,6 +7,8 @@ class Amenity(BaseModel):
 
     name = db.Column(db.String(50), nullable=False)
     description = db.Column(db.String(255), nullable=True)
+    # Nombre de lieux liés, dénormalisé et tenu à jour par PlaceFacade
+    places_count = db.Column(db.Integer, nullable=False, default=0)
 
     def __init__(self, name: str, description: str = ""):
         super().__init__()
@@ -27,12 +29,20 @@ class Amenity(BaseModel):
 
         self.name = name
         self.description = description
+        self.places_count = 0
 
-    def to_dict(self):
+    # Champs sélectionnables avec ?fields= (aucune relation incluse)
+    FIELDS = ('id', 'name', 'description', 'places_count')
+    RELATIONS = ()
+
+    def to_dict(self, fields=None, include=None):
         """Retourne une représentation sous forme de dictionnaire"""
-        return {
+        data = {
             "id": self.id,
             "name": self.name,
             "description": self.description,
-            "places_count": self.places.count() if hasattr(self, 'places') else 0
+            "places_count": self.places_count
         }
+        if fields is None:
+            return data
+        return {name: data[name] for name in fields}
@@ -1,6 +1,13 @@
+import math
+from sqlalchemy import case, event
+from sqlalchemy.ext.hybrid import hybrid_property
 from app.models.BaseModel import BaseModel
 from app.extensions import db
+from app.geo import encode_geohash
+from app.persistence.fts import install_place_search
 from app.models.place_amenity import place_amenity
+from app.models.amenity import Amenity
+from app.models.review import Review
 
 
 class Place(BaseModel):
@@ -11,8 +18,13 @@ class Place(BaseModel):
     price = db.Column(db.Float, nullable=False)
     latitude = db.Column(db.Float, nullable=False)
     longitude = db.Column(db.Float, nullable=False)
+    # Cellule geohash de (latitude, longitude), indexée pour la recherche de proximité
+    geohash = db.Column(db.String(12), nullable=True, index=True)
     owner_id = db.Column(db.String(36), db.ForeignKey(
         'users.id'), nullable=False)
+    # Agrégats dénormalisés des reviews, tenus à jour par ReviewFacade
+    review_count = db.Column(db.Integer, nullable=False, default=0)
+    rating_sum = db.Column(db.Integer, nullable=False, default=0)
 
     # Relations
     reviews = db.relationship(
@@ -28,16 +40,36 @@ class Place(BaseModel):
         self.latitude = latitude
         self.longitude = longitude
         self.owner_id = owner_id
+        self.review_count = 0
+        self.rating_sum = 0
 
         # Vérification des contraintes de validation
-        if not title or len(title) > 100:
-            raise ValueError(
-                "Le titre doit être compris entre 1 et 100 caractères")
-        if price < 0:
+        self.validate_fields({'title': title, 'price': price,
+                              'latitude': latitude, 'longitude': longitude})
+
+    @staticmethod
+    def validate_fields(values):
+        """
+        Vérifie les attributs présents dans values (tous à la création,
+        ceux modifiés lors d'une mise à jour) et lève ValueError au premier
+        invalide.
+        """
+        def is_number(value):
+            return (isinstance(value, (int, float)) and not isinstance(value, bool)
+                    and math.isfinite(value))
+
+        if 'title' in values:
+            title = values['title']
+            if not isinstance(title, str) or not title or len(title) > 100:
+                raise ValueError(
+                    "Le titre doit être compris entre 1 et 100 caractères")
+        if 'price' in values and not (is_number(values['price']) and values['price'] >= 0):
             raise ValueError("Le prix doit être positif")
-        if not (-90.0 <= latitude <= 90.0):
+        if 'latitude' in values and not (
+                is_number(values['latitude']) and -90.0 <= values['latitude'] <= 90.0):
             raise ValueError("La latitude doit être entre -90 et 90.")
-        if not (-180.0 <= longitude <= 180.0):
+        if 'longitude' in values and not (
+                is_number(values['longitude']) and -180.0 <= values['longitude'] <= 180.0):
             raise ValueError("La longitude doit être entre -180 et 180.")
 
     def add_review(self, review):
@@ -48,6 +80,34 @@ class Place(BaseModel):
             raise ValueError(
                 "L'objet review doit posséder une méthode to_dict()")
 
+    @property
+    def avg_rating(self):
+        """Note moyenne calculée à partir des agrégats, sans lire les reviews"""
+        if not self.review_count:
+            return None
+        return round(self.rating_sum / self.review_count, 2)
+
+    @hybrid_property
+    def rating_score(self):
+        """Note moyenne non arrondie (0 sans review), utilisée pour le tri"""
+        if not self.review_count:
+            return 0.0
+        return self.rating_sum / self.review_count
+
+    @rating_score.expression
+    def rating_score(cls):
+        return case((cls.review_count > 0, cls.rating_sum * 1.0 / cls.review_count),
+                    else_=0.0)
+
+    def adjust_rating_aggregates(self, count_delta, rating_delta):
+        """
+        Applique un delta aux agrégats de notes. L'incrément est exprimé en
+        SQL (review_count = review_count + n) pour rester correct en cas
+        d'écritures concurrentes; il est commité avec la review.
+        """
+        self.review_count = type(self).review_count + count_delta
+        self.rating_sum = type(self).rating_sum + rating_delta
+
     def add_amenity(self, amenity):
         """Ajouter un équipement à la place sans doublon."""
         if hasattr(amenity, 'id') and amenity not in self.amenities:
@@ -55,17 +115,18 @@ class Place(BaseModel):
         elif not hasattr(amenity, 'id'):
             raise ValueError("L'objet amenity doit avoir un attribut 'id'")
 
-    def to_dict(self):
-        # Sérialiser les amenities
-        amenities_data = [
-            {"id": amenity.id, "name": amenity.name}
-            for amenity in self.amenities
-        ]
-
-        # Sérialiser les reviews
-        reviews_data = [review.to_dict() for review in self.reviews]
+    # Champs simples et relations sélectionnables avec ?fields= / ?include=
+    FIELDS = ('id', 'title', 'description', 'price', 'latitude', 'longitude',
+              'owner_id', 'review_count', 'avg_rating')
+    RELATIONS = ('reviews', 'amenities')
 
-        return {
+    def to_dict(self, amenities_data=None, reviews_data=None, fields=None, include=None):
+        """
+        fields limite les champs simples renvoyés (tous par défaut), include
+        les relations (toutes par défaut); une relation non incluse n'est
+        pas chargée.
+        """
+        values = {
             "id": self.id,
             "title": self.title,
             "description": self.description,
@@ -73,6 +134,76 @@ class Place(BaseModel):
             "latitude": self.latitude,
             "longitude": self.longitude,
             "owner_id": self.owner_id,
-            "reviews": reviews_data,
-            "amenities": amenities_data
+            "review_count": self.review_count,
+            "avg_rating": self.avg_rating
         }
+        data = values if fields is None else {name: values[name] for name in fields}
+        include = self.RELATIONS if include is None else include
+
+        # Sérialiser les reviews (sauf si déjà chargées par to_dict_many)
+        if 'reviews' in include:
+            if reviews_data is None:
+                reviews_data = [review.to_dict() for review in self.reviews]
+            data["reviews"] = reviews_data
+
+        # Sérialiser les amenities
+        if 'amenities' in include:
+            if amenities_data is None:
+                amenities_data = [
+                    {"id": amenity.id, "name": amenity.name}
+                    for amenity in self.amenities
+                ]
+            data["amenities"] = amenities_data
+        return data
+
+    @classmethod
+    def to_dict_many(cls, places, fields=None, include=None):
+        """
+        Sérialise une collection de lieux en un nombre constant de requêtes:
+        une pour les amenities et une pour les reviews de tous les lieux,
+        regroupées ensuite par place_id. Les relations absentes de include
+        ne sont pas interrogées.
+        """
+        places = list(places)
+        include = cls.RELATIONS if include is None else include
+        place_ids = [place.id for place in places]
+        amenities_by_place = {place_id: [] for place_id in place_ids}
+        reviews_by_place = {place_id: [] for place_id in place_ids}
+
+        if place_ids and 'amenities' in include:
+            amenity_rows = db.session.query(
+                place_amenity.c.place_id, Amenity.id, Amenity.name
+            ).join(
+                Amenity, Amenity.id == place_amenity.c.amenity_id
+            ).filter(place_amenity.c.place_id.in_(place_ids))
+            for place_id, amenity_id, name in amenity_rows:
+                amenities_by_place[place_id].append(
+                    {"id": amenity_id, "name": name})
+
+        if place_ids and 'reviews' in include:
+            reviews = Review.query.filter(
+                Review.place_id.in_(place_ids)
+            ).order_by(Review.created_at, Review.id)
+            for review in reviews:
+                reviews_by_place[review.place_id].append(review.to_dict())
+
+        return [
+            place.to_dict(amenities_data=amenities_by_place[place.id],
+                          reviews_data=reviews_by_place[place.id],
+                          fields=fields, include=include)
+            for place in places
+        ]
+
+
+# Sert le filtre par prix et la pagination triée par (price, id)
+db.Index('ix_places_price_id', Place.price, Place.id)
+
+# Table FTS5 places_fts et triggers de synchronisation (SQLite)
+install_place_search(Place.__table__)
+
+
+@event.listens_for(Place, 'before_insert')
+@event.listens_for(Place, 'before_update')
+def _update_geohash(mapper, connection, target):
+    """Garde la cellule geohash synchronisée avec les coordonnées"""
+    target.geohash = encode_geohash(target.latitude, target.longitude)
@@ -7,3 +7,8 @@ place_amenity = db.Table('place_amenity',
                          db.Column('amenity_id', db.String(36), db.ForeignKey(
                              'amenities.id'), primary_key=True)
                          )
+
+# La clé primaire (place_id, amenity_id) sert les accès par lieu; cet index
+# sert le filtrage des lieux par amenity
+db.Index('ix_place_amenity_amenity_id_place_id',
+         place_amenity.c.amenity_id, place_amenity.c.place_id)
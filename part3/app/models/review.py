@@ -41,9 +41,13 @@ class Review(BaseModel):
         if not self.text or len(self.text.strip()) == 0:
             raise ValueError("Review text cannot be empty")
 
-    def to_dict(self):
+    # Champs sélectionnables avec ?fields= (aucune relation incluse)
+    FIELDS = ('id', 'text', 'rating', 'user_id', 'place_id', 'created_at', 'updated_at')
+    RELATIONS = ()
+
+    def to_dict(self, fields=None, include=None):
         """Retourne une représentation sous forme de dictionnaire"""
-        return {
+        data = {
             "id": self.id,
             "text": self.text,
             "rating": self.rating,
@@ -52,6 +56,9 @@ class Review(BaseModel):
             "created_at": self.created_at.isoformat() if self.created_at else None,
             "updated_at": self.updated_at.isoformat() if self.updated_at else None
         }
+        if fields is None:
+            return data
+        return {name: data[name] for name in fields}
 
     def update_review(self, new_text, new_rating):
         """Met à jour la review et sauvegarde les modifications"""
@@ -59,3 +66,9 @@ class Review(BaseModel):
         self.rating = new_rating
         self.validate()  # Revalidation après modification
         self.save()  # Sauvegarde les modifications (avec mise à jour de `updated_at`)
+
+
+# Un utilisateur ne peut laisser qu'une review par lieu; l'index sert aussi
+# la vérification d'existence de ReviewRepository.exists_for_user_and_place
+db.Index('uq_reviews_place_id_user_id',
+         Review.place_id, Review.user_id, unique=True)
@@ -0,0 +1,18 @@
+from app.models.BaseModel import BaseModel
+from app.extensions import db
+
+
+class RevokedToken(BaseModel):
+    """Token JWT révoqué avant son expiration (created_at: date de révocation)"""
+    __tablename__ = 'revoked_tokens'
+
+    jti = db.Column(db.String(36), nullable=False, unique=True)
+    user_id = db.Column(db.String(36), nullable=True)
+    # Expiration du token: la ligne peut être purgée après cette date
+    expires_at = db.Column(db.DateTime, nullable=True, index=True)
+
+    def __init__(self, jti, user_id=None, expires_at=None):
+        super().__init__()
+        self.jti = jti
+        self.user_id = user_id
+        self.expires_at = expires_at
@@ -1,4 +1,5 @@
-from app.extensions import db, bcrypt
+from app.extensions import db
+from app import passwords
 from app.models.BaseModel import BaseModel
 import re
 
@@ -11,6 +12,9 @@ class User(BaseModel):
     email = db.Column(db.String(120), nullable=False, unique=True)
     password = db.Column(db.String(128), nullable=False)
     is_admin = db.Column(db.Boolean, default=False)
+    # Algorithme et coût du hachage stocké (voir app/passwords.py)
+    password_algorithm = db.Column(db.String(20))
+    password_cost = db.Column(db.Integer)
 
     # Relations
     places = db.relationship('Place', backref='owner',
@@ -31,12 +35,28 @@ class User(BaseModel):
             self.hash_password(password)  # Hash the password if provided
 
     def hash_password(self, password):
-        """Hashes the password before storing it."""
-        self.password = bcrypt.generate_password_hash(password).decode('utf-8')
+        """Hashes the password before storing it (off the request thread)."""
+        self._set_password_hash(passwords.hash_password(password))
+
+    def _set_password_hash(self, pw_hash):
+        self.password = pw_hash
+        self.password_algorithm, self.password_cost = passwords.parse_hash(pw_hash)
 
     def verify_password(self, password):
         """Verifies if the provided password matches the hashed password."""
-        return bcrypt.check_password_hash(self.password, password)
+        return passwords.check_password(self.password, password)
+
+    def password_needs_rehash(self):
+        """True if the stored hash does not follow the current hashing policy."""
+        return passwords.needs_rehash(self.password)
+
+    def rehash_password(self, password):
+        """Rehashes with the current policy; False if postponed (pool busy)."""
+        pw_hash = passwords.rehash_password(password)
+        if pw_hash is None:
+            return False
+        self._set_password_hash(pw_hash)
+        return True
 
     def validate_email(self, email):
         email_regex = r"([A-Za-z0-9]+[.-_])*[A-Za-z0-9]+@[A-Za-z0-9-]+(\.[A-Z|a-z]{2,})+"
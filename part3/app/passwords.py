@@ -0,0 +1,326 @@
+"""
+Hachage et vérification des mots de passe hors du thread de la requête.
+
+Pendant une requête, le hachage tourne dans un pool de PASSWORD_HASH_WORKERS
+processus (0: sur le thread de la requête). Au plus PASSWORD_HASH_WORKERS
+calculs en cours plus PASSWORD_HASH_MAX_QUEUE en attente sont admis: au
+delà, ou si le résultat n'arrive pas dans PASSWORD_HASH_TIMEOUT secondes,
+PasswordHasherBusy répond immédiatement 503 (avec Retry-After) au lieu
+d'empiler les connexions derrière le CPU.
+
+Hors requête (démarrage, commandes CLI, scripts), le hachage reste
+synchrone: inutile de démarrer des processus pour un seul calcul.
+
+Politique: les nouveaux hachages utilisent PASSWORD_HASH_ALGORITHM
+('bcrypt', ou 'scrypt', à mémoire dure) au coût BCRYPT_LOG_ROUNDS ou
+SCRYPT_LOG_N. Chaque hachage stocké porte son algorithme et son coût: la
+vérification accepte tous les formats connus, et un hachage qui ne suit
+plus la politique est recalculé à la connexion suivante (voir
+UserFacade.authenticate). Les hachages bcrypt sont ceux de Flask-Bcrypt
+($2a$/$2b$, même clé BCRYPT_LOG_ROUNDS).
+"""
+import base64
+import hashlib
+import hmac
+import multiprocessing
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import bcrypt
+from flask import current_app, has_app_context, has_request_context
+from werkzeug.exceptions import ServiceUnavailable
+
+DEFAULT_ALGORITHM = 'bcrypt'
+DEFAULT_COSTS = {'bcrypt': 12, 'scrypt': 14}
+# Paramètres fixes de scrypt: le coût est log2(N)
+SCRYPT_R = 8
+SCRYPT_P = 1
+SCRYPT_KEY_LENGTH = 32
+# Nombre de mesures récentes conservées pour les percentiles
+SAMPLE_SIZE = 1000
+
+
+class PasswordHasherBusy(ServiceUnavailable):
+    """Pool de hachage saturé: la requête est refusée (503)"""
+    description = 'Trop de connexions simultanées, réessayez dans un instant'
+
+
+def _b64encode(data):
+    return base64.b64encode(data).decode('ascii').rstrip('=')
+
+
+def _b64decode(text):
+    return base64.b64decode(text + '=' * (-len(text) % 4))
+
+
+def _scrypt(password, salt, log_n):
+    n = 2 ** log_n
+    return hashlib.scrypt(password.encode('utf-8'), salt=salt, n=n, r=SCRYPT_R,
+                          p=SCRYPT_P, maxmem=256 * SCRYPT_R * n,
+                          dklen=SCRYPT_KEY_LENGTH)
+
+
+def _hash(password, algorithm, cost):
+    if not password:
+        raise ValueError('Password must be non-empty.')
+    if algorithm == 'scrypt':
+        salt = os.urandom(16)
+        key = _scrypt(password, salt, cost)
+        return (f"$scrypt$ln={cost},r={SCRYPT_R},p={SCRYPT_P}"
+                f"${_b64encode(salt)}${_b64encode(key)}")
+    return bcrypt.hashpw(password.encode('utf-8'),
+                         bcrypt.gensalt(cost)).decode('utf-8')
+
+
+def _check(pw_hash, password):
+    algorithm, cost = parse_hash(pw_hash)
+    if algorithm == 'scrypt':
+        salt, key = pw_hash.split('$')[3:5]
+        return hmac.compare_digest(_scrypt(password, _b64decode(salt), cost),
+                                   _b64decode(key))
+    if algorithm == 'bcrypt':
+        pw_hash = pw_hash.encode('utf-8')
+        return hmac.compare_digest(bcrypt.hashpw(password.encode('utf-8'), pw_hash),
+                                   pw_hash)
+    # Format inconnu (valeur en clair importée, hachage tronqué...)
+    return False
+
+
+def parse_hash(pw_hash):
+    """(algorithme, coût) d'un hachage stocké, (None, None) s'il est inconnu"""
+    if pw_hash.startswith(('$2a$', '$2b$', '$2y$')):
+        return 'bcrypt', int(pw_hash[4:6])
+    if pw_hash.startswith('$scrypt$'):
+        params = dict(item.split('=') for item in pw_hash.split('$')[2].split(','))
+        return 'scrypt', int(params['ln'])
+    return None, None
+
+
+def _timed(func, *args):
+    # Exécuté dans le processus du pool: time.monotonic() est commun aux
+    # processus, le début du calcul donne donc l'attente dans la file
+    started = time.monotonic()
+    result = func(*args)
+    return result, started, time.monotonic() - started
+
+
+class _Timings:
+    """Nombre, moyenne, maximum et percentiles récents d'une durée"""
+
+    def __init__(self):
+        self.count = 0
+        self.total = self.max = 0.0
+        self._recent = deque(maxlen=SAMPLE_SIZE)
+
+    def add(self, seconds):
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        self._recent.append(seconds)
+
+    def stats(self):
+        recent = sorted(self._recent)
+
+        def percentile(p):
+            return recent[min(len(recent) - 1, int(len(recent) * p))] * 1000 if recent else 0.0
+        return {'avg_ms': round(self.total / self.count * 1000, 2) if self.count else 0.0,
+                'p50_ms': round(percentile(0.50), 2),
+                'p95_ms': round(percentile(0.95), 2),
+                'max_ms': round(self.max * 1000, 2)}
+
+
+class PasswordHasher:
+    """
+    Pool borné de calculs de hachage. Le pool de processus n'est démarré
+    qu'au premier calcul fait pendant une requête.
+    """
+
+    def __init__(self, algorithm=DEFAULT_ALGORITHM, cost=None, workers=0,
+                 max_queue=0, timeout=None, retry_after=1, slo_ms=None):
+        if algorithm not in DEFAULT_COSTS:
+            raise ValueError(f"Algorithme de hachage inconnu: {algorithm}")
+        self.algorithm = algorithm
+        self.cost = cost if cost is not None else DEFAULT_COSTS[algorithm]
+        self.slo_ms = slo_ms
+        self.workers = workers
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.retry_after = retry_after
+        self._slots = threading.BoundedSemaphore(max(workers, 1) + max_queue)
+        self._executor = None
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self.completed = self.rejected = self.timeouts = 0
+        self.rehashed = self.rehash_deferred = 0
+        self.queue_wait = _Timings()
+        self.hash_time = _Timings()
+
+    def hash(self, password):
+        """Hache le mot de passe selon la politique courante"""
+        return self._run(_hash, password, self.algorithm, self.cost)
+
+    def check(self, pw_hash, password):
+        """Compare en temps constant un mot de passe à son hachage"""
+        return self._run(_check, pw_hash, password)
+
+    def needs_rehash(self, pw_hash):
+        """Vrai si le hachage n'a pas l'algorithme ou le coût de la politique"""
+        return parse_hash(pw_hash) != (self.algorithm, self.cost)
+
+    def rehash(self, password):
+        """
+        Nouveau hachage selon la politique, seulement si un processus est
+        libre: le rehachage ne doit ni attendre dans la file ni prendre la
+        place d'une connexion. Retourne None s'il est reporté.
+        """
+        with self._lock:
+            idle = self._in_flight < max(self.workers, 1)
+        if idle:
+            try:
+                pw_hash = self.hash(password)
+            except PasswordHasherBusy:
+                pw_hash = None
+        else:
+            pw_hash = None
+        with self._lock:
+            if pw_hash is None:
+                self.rehash_deferred += 1
+            else:
+                self.rehashed += 1
+        return pw_hash
+
+    def _run(self, func, *args):
+        if not has_request_context():
+            return func(*args)
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise PasswordHasherBusy(retry_after=self.retry_after)
+        with self._lock:
+            self._in_flight += 1
+        submitted = time.monotonic()
+        if not self.workers:
+            try:
+                result, started, duration = _timed(func, *args)
+            finally:
+                self._release()
+        else:
+            future = self._get_executor().submit(_timed, func, *args)
+            # La place n'est rendue qu'à la fin du calcul, même après un
+            # dépassement du délai: la borne porte sur le travail réel
+            future.add_done_callback(lambda _: self._release())
+            try:
+                result, started, duration = future.result(timeout=self.timeout)
+            except TimeoutError:
+                future.cancel()
+                with self._lock:
+                    self.timeouts += 1
+                raise PasswordHasherBusy(retry_after=self.retry_after)
+        with self._lock:
+            self.completed += 1
+            self.queue_wait.add(max(0.0, started - submitted))
+            self.hash_time.add(duration)
+        return result
+
+    def _release(self):
+        with self._lock:
+            self._in_flight -= 1
+        self._slots.release()
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                # spawn: pas de fork d'un processus qui a déjà des threads
+                # et des connexions ouvertes
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context('spawn'))
+            return self._executor
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def stats(self):
+        with self._lock:
+            return {'algorithm': self.algorithm, 'cost': self.cost,
+                    'slo_ms': self.slo_ms, 'workers': self.workers,
+                    'max_queue': self.max_queue, 'in_flight': self._in_flight,
+                    'completed': self.completed, 'rejected': self.rejected,
+                    'timeouts': self.timeouts, 'rehashed': self.rehashed,
+                    'rehash_deferred': self.rehash_deferred,
+                    'queue_wait': self.queue_wait.stats(),
+                    'hash_time': self.hash_time.stats()}
+
+
+def get_password_hasher():
+    """Pool de l'app courante, ou None hors contexte d'application"""
+    if not has_app_context():
+        return None
+    return current_app.extensions.get('hbnb_password_hasher')
+
+
+def hash_password(password):
+    hasher = get_password_hasher()
+    if hasher is None:
+        return _hash(password, DEFAULT_ALGORITHM, DEFAULT_COSTS[DEFAULT_ALGORITHM])
+    return hasher.hash(password)
+
+
+def check_password(pw_hash, password):
+    hasher = get_password_hasher()
+    if hasher is None:
+        return _check(pw_hash, password)
+    return hasher.check(pw_hash, password)
+
+
+def needs_rehash(pw_hash):
+    hasher = get_password_hasher()
+    if hasher is None:
+        return parse_hash(pw_hash) != (DEFAULT_ALGORITHM, DEFAULT_COSTS[DEFAULT_ALGORITHM])
+    return hasher.needs_rehash(pw_hash)
+
+
+def rehash_password(password):
+    hasher = get_password_hasher()
+    if hasher is None:
+        return hash_password(password)
+    return hasher.rehash(password)
+
+
+def time_hash(algorithm, cost, samples=3):
+    """Durée moyenne (ms) d'un hachage sur cette machine, hors pool"""
+    start = time.perf_counter()
+    for _ in range(samples):
+        _hash('calibration-password', algorithm, cost)
+    return (time.perf_counter() - start) / samples * 1000
+
+
+def policy_from_config(config):
+    """(algorithme, coût) des nouveaux hachages selon la configuration"""
+    algorithm = config.get('PASSWORD_HASH_ALGORITHM', DEFAULT_ALGORITHM)
+    if algorithm == 'scrypt':
+        return algorithm, config.get('SCRYPT_LOG_N', DEFAULT_COSTS['scrypt'])
+    return algorithm, config.get('BCRYPT_LOG_ROUNDS', DEFAULT_COSTS['bcrypt'])
+
+
+def init_app(app):
+    """
+    Crée le pool depuis la configuration: PASSWORD_HASH_ALGORITHM et son
+    coût (BCRYPT_LOG_ROUNDS, SCRYPT_LOG_N), PASSWORD_HASH_WORKERS,
+    PASSWORD_HASH_MAX_QUEUE, PASSWORD_HASH_TIMEOUT,
+    PASSWORD_HASH_RETRY_AFTER et PASSWORD_HASH_SLO_MS.
+    """
+    algorithm, cost = policy_from_config(app.config)
+    app.extensions['hbnb_password_hasher'] = PasswordHasher(
+        algorithm=algorithm, cost=cost,
+        workers=app.config.get('PASSWORD_HASH_WORKERS', 0),
+        max_queue=app.config.get('PASSWORD_HASH_MAX_QUEUE', 0),
+        timeout=app.config.get('PASSWORD_HASH_TIMEOUT'),
+        retry_after=app.config.get('PASSWORD_HASH_RETRY_AFTER', 1),
+        slo_ms=app.config.get('PASSWORD_HASH_SLO_MS'))
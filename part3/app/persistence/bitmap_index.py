@@ -0,0 +1,112 @@
+import threading
+import time
+
+
+class AmenityBitmapIndex:
+    """
+    Index en mémoire amenity -> ensemble de lieux, sous forme de bitsets.
+
+    Chaque lieu reçoit une position de bit stable (les positions libérées
+    par une suppression sont réutilisées, ce qui garde les bitsets denses).
+    Un bitset est un entier Python: les requêtes ET / OU sur plusieurs
+    amenities sont des & / | entre entiers. L'index est propre au processus
+    et tenu à jour par PlaceFacade après chaque écriture commitée.
+
+    Les écritures des autres processus ne le mettent pas à jour: avec
+    max_age, l'index est rechargé depuis la base quand son dernier
+    chargement date de plus de max_age secondes, ce qui borne son retard.
+    """
+
+    def __init__(self, max_age=None):
+        self.max_age = max_age
+        self._loaded_at = None
+        self.reloads = 0
+        self._lock = threading.Lock()
+        self._slots = {}
+        self._place_ids = []
+        self._free_slots = []
+        self._bitmaps = {}
+        self.loaded = False
+
+    def load(self, links):
+        """(Re)construit l'index à partir de tuples (place_id, amenity_id)"""
+        with self._lock:
+            self._slots, self._place_ids, self._free_slots = {}, [], []
+            self._bitmaps = {}
+            for place_id, amenity_id in links:
+                bit = 1 << self._slot(place_id)
+                self._bitmaps[amenity_id] = self._bitmaps.get(amenity_id, 0) | bit
+            if self.loaded:
+                self.reloads += 1
+            self.loaded = True
+            self._loaded_at = time.monotonic()
+
+    def needs_load(self):
+        """Vrai avant le premier chargement, puis tous les max_age secondes"""
+        if not self.loaded:
+            return True
+        return (self.max_age is not None
+                and time.monotonic() - self._loaded_at >= self.max_age)
+
+    def _slot(self, place_id):
+        slot = self._slots.get(place_id)
+        if slot is None:
+            if self._free_slots:
+                slot = self._free_slots.pop()
+                self._place_ids[slot] = place_id
+            else:
+                slot = len(self._place_ids)
+                self._place_ids.append(place_id)
+            self._slots[place_id] = slot
+        return slot
+
+    def _clear(self, slot):
+        mask = ~(1 << slot)
+        for amenity_id in list(self._bitmaps):
+            bitmap = self._bitmaps[amenity_id] & mask
+            if bitmap:
+                self._bitmaps[amenity_id] = bitmap
+            else:
+                del self._bitmaps[amenity_id]
+
+    def set_place_amenities(self, place_id, amenity_ids):
+        """Remplace l'ensemble des amenities d'un lieu"""
+        with self._lock:
+            slot = self._slot(place_id)
+            self._clear(slot)
+            for amenity_id in amenity_ids:
+                self._bitmaps[amenity_id] = self._bitmaps.get(amenity_id, 0) | (1 << slot)
+
+    def add_place_amenity(self, place_id, amenity_id):
+        with self._lock:
+            bit = 1 << self._slot(place_id)
+            self._bitmaps[amenity_id] = self._bitmaps.get(amenity_id, 0) | bit
+
+    def remove_place(self, place_id):
+        with self._lock:
+            slot = self._slots.pop(place_id, None)
+            if slot is None:
+                return
+            self._clear(slot)
+            self._place_ids[slot] = None
+            self._free_slots.append(slot)
+
+    def query(self, amenity_ids, match_all=True):
+        """Identifiants des lieux ayant toutes (ET) ou une (OU) des amenities"""
+        with self._lock:
+            bitmaps = [self._bitmaps.get(amenity_id, 0)
+                       for amenity_id in set(amenity_ids)]
+            if not bitmaps:
+                return []
+            result = bitmaps[0]
+            for bitmap in bitmaps[1:]:
+                result = result & bitmap if match_all else result | bitmap
+
+            # Parcours des bits à 1 en une passe sur la représentation binaire
+            bits = bin(result)[:1:-1]
+            matches = []
+            slot = bits.find('1')
+            while slot != -1:
+                matches.append(self._place_ids[slot])
+                slot = bits.find('1', slot + 1)
+            return matches
@@ -0,0 +1,339 @@
+"""
+Cache des entités lues par id (SQLAlchemyRepository.get).
+
+Deux niveaux: un LRU en mémoire, propre au processus, avec durée de vie
+(TTL), puis un cache partagé optionnel entre processus (API du client
+redis-py: get / set(ex=) / delete / scan_iter). LocalCacheClient remplace
+le serveur partagé en développement et dans les tests.
+
+Le cache contient les valeurs des colonnes, jamais les objets ORM: un
+succès reconstruit l'objet et l'attache à la session sans requête SQL.
+Il est invalidé après chaque commit qui modifie ou supprime les lignes
+correspondantes (événements de l'ORM, donc quel que soit le chemin
+d'écriture: repository, save() du modèle, UPDATE/DELETE ensemblistes).
+Il n'est rempli que par des lectures sur la base principale (jamais par
+un réplica en retard), et une lecture commencée avant une invalidation
+ne le remplit pas.
+Un processus n'invalide que son propre LRU: entre processus, l'écart est
+borné par ENTITY_CACHE_TTL.
+"""
+import json
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from flask import current_app, has_app_context
+from sqlalchemy import event
+from sqlalchemy.orm import object_session
+
+_STALE_KEYS = 'hbnb_cache_stale_keys'
+_STALE_TABLES = 'hbnb_cache_stale_tables'
+
+
+class LRUCache:
+    """LRU en mémoire, sûr entre threads; chaque entrée expire après ttl secondes"""
+
+    def __init__(self, max_entries, ttl):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = self.expirations = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, ttl=None):
+        """ttl: durée de vie propre à l'entrée, bornée par celle du cache"""
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, keys):
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def clear(self, prefix=''):
+        with self._lock:
+            for key in [key for key in self._entries if key.startswith(prefix)]:
+                del self._entries[key]
+
+    def discard_values(self, predicate):
+        """Supprime les entrées dont la valeur vérifie predicate (parcours complet)"""
+        with self._lock:
+            for key in [key for key, (_, value) in self._entries.items()
+                        if predicate(value)]:
+                del self._entries[key]
+
+    def stats(self):
+        with self._lock:
+            return {'size': len(self._entries), 'max_entries': self.max_entries,
+                    'hits': self.hits, 'misses': self.misses,
+                    'evictions': self.evictions, 'expirations': self.expirations}
+
+
+class LocalCacheClient:
+    """
+    Remplaçant en mémoire d'un serveur de cache partagé, avec le
+    sous-ensemble de l'API redis-py utilisé par SharedCache.
+    """
+
+    def __init__(self):
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._data[key]
+                return None
+            return value
+
+    def set(self, key, value, ex=None):
+        with self._lock:
+            expires_at = time.monotonic() + ex if ex else None
+            self._data[key] = (expires_at, value)
+
+    def delete(self, *keys):
+        with self._lock:
+            return sum(self._data.pop(key, None) is not None for key in keys)
+
+    def scan_iter(self, match='*'):
+        prefix = match.rstrip('*')
+        with self._lock:
+            return [key for key in self._data if key.startswith(prefix)]
+
+
+def _encode(value):
+    if isinstance(value, datetime):
+        return {'__datetime__': value.isoformat()}
+    raise TypeError(f"Valeur non sérialisable: {value!r}")
+
+
+def _decode(obj):
+    if '__datetime__' in obj:
+        return datetime.fromisoformat(obj['__datetime__'])
+    return obj
+
+
+class SharedCache:
+    """
+    Cache partagé entre processus, au-dessus d'un client au format redis-py.
+    Les valeurs sont stockées en JSON (les datetime sont conservés). Une
+    panne du serveur est comptée et traitée comme un échec de cache: la
+    lecture retombe sur la base.
+    """
+
+    def __init__(self, client, ttl, prefix='hbnb:'):
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix
+        self.hits = self.misses = self.errors = 0
+
+    def get(self, key):
+        try:
+            raw = self.client.get(self.prefix + key)
+        except Exception:
+            self.errors += 1
+            return None
+        if raw is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return json.loads(raw, object_hook=_decode)
+
+    def set(self, key, value):
+        try:
+            self.client.set(self.prefix + key, json.dumps(value, default=_encode),
+                            ex=self.ttl)
+        except Exception:
+            self.errors += 1
+
+    def delete(self, keys):
+        if not keys:
+            return
+        try:
+            self.client.delete(*[self.prefix + key for key in keys])
+        except Exception:
+            self.errors += 1
+
+    def clear(self, prefix=''):
+        try:
+            keys = list(self.client.scan_iter(match=f"{self.prefix}{prefix}*"))
+            if keys:
+                self.client.delete(*keys)
+        except Exception:
+            self.errors += 1
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses, 'errors': self.errors}
+
+
+class EntityCache:
+    """
+    Cache à deux niveaux (LRU local puis cache partagé optionnel) des
+    entités par id. Les clés sont de la forme "<table>:<id>".
+    """
+
+    def __init__(self, local, shared=None):
+        self.local = local
+        self.shared = shared
+        self.invalidations = 0
+        # Incrémenté à chaque invalidation: une lecture faite avant ne
+        # doit pas remplir le cache avec une valeur peut-être périmée
+        self.generation = 0
+        self.skipped_sets = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(table, obj_id):
+        return f"{table}:{obj_id}"
+
+    def get(self, key):
+        value = self.local.get(key)
+        if value is None and self.shared is not None:
+            value = self.shared.get(key)
+            if value is not None:
+                self.local.set(key, value)
+        return value
+
+    def set(self, key, value, generation=None):
+        """
+        generation: valeur de self.generation lue avant la lecture en base;
+        rien n'est écrit si une invalidation a eu lieu depuis
+        """
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                self.skipped_sets += 1
+                return
+            self.local.set(key, value)
+            if self.shared is not None:
+                self.shared.set(key, value)
+
+    def invalidate(self, keys=(), tables=()):
+        keys = list(keys)
+        with self._lock:
+            self.generation += 1
+            self.invalidations += len(keys) + len(tables)
+            self.local.delete(keys)
+            for table in tables:
+                self.local.clear(f"{table}:")
+            if self.shared is not None:
+                self.shared.delete(keys)
+                for table in tables:
+                    self.shared.clear(f"{table}:")
+
+    def stats(self):
+        return {'local': self.local.stats(),
+                'shared': self.shared.stats() if self.shared is not None else None,
+                'invalidations': self.invalidations,
+                'skipped_sets': self.skipped_sets}
+
+
+def get_entity_cache():
+    """Cache de l'app courante, ou None s'il est désactivé"""
+    if not has_app_context():
+        return None
+    return current_app.extensions.get('hbnb_entity_cache')
+
+
+def is_stale(session, table, key):
+    """Vrai si la transaction en cours a écrit cette ligne (ou toute la table)"""
+    return (key in session.info.get(_STALE_KEYS, ())
+            or table in session.info.get(_STALE_TABLES, ()))
+
+
+def connect_redis(url, setting='ENTITY_CACHE_SHARED_URL'):
+    """Client redis-py pour l'URL du paramètre setting (import paresseux)"""
+    try:
+        import redis
+    except ImportError:
+        raise RuntimeError(
+            f"{setting} nécessite le paquet redis (pip install redis)")
+    return redis.Redis.from_url(url)
+
+
+def create_entity_cache(app):
+    """
+    Construit le cache depuis la configuration: ENTITY_CACHE_SIZE (0
+    désactive le cache), ENTITY_CACHE_TTL, et ENTITY_CACHE_SHARED_URL
+    ('local' pour LocalCacheClient, une URL redis:// sinon).
+    """
+    size = app.config.get('ENTITY_CACHE_SIZE', 0)
+    if not size:
+        return None
+    ttl = app.config.get('ENTITY_CACHE_TTL', 60)
+    shared = None
+    url = app.config.get('ENTITY_CACHE_SHARED_URL')
+    if url:
+        client = LocalCacheClient() if url == 'local' else connect_redis(url)
+        shared = SharedCache(client, ttl=app.config.get('ENTITY_CACHE_SHARED_TTL', ttl))
+    return EntityCache(LRUCache(size, ttl), shared)
+
+
+def _track_row_write(mapper, connection, target):
+    # Appelé pour chaque ligne modifiée ou supprimée par un flush, y compris
+    # les suppressions en cascade
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault(_STALE_KEYS, set()).add(
+            EntityCache.key(mapper.local_table.name, target.id))
+
+
+def _track_bulk_statement(orm_execute_state):
+    # UPDATE/DELETE ensembliste: les lignes touchées sont inconnues
+    if orm_execute_state.is_update or orm_execute_state.is_delete:
+        mapper = orm_execute_state.bind_mapper
+        if mapper is not None:
+            orm_execute_state.session.info.setdefault(_STALE_TABLES, set()).add(
+                mapper.local_table.name)
+
+
+def _invalidate_committed(session):
+    keys = session.info.pop(_STALE_KEYS, set())
+    tables = session.info.pop(_STALE_TABLES, set())
+    cache = get_entity_cache()
+    if cache is not None and (keys or tables):
+        cache.invalidate(keys, tables)
+
+
+def _forget_rolled_back(session, transaction):
+    if transaction.parent is None:
+        session.info.pop(_STALE_KEYS, None)
+        session.info.pop(_STALE_TABLES, None)
+
+
+def init_app(app):
+    """Crée le cache de l'app et branche l'invalidation sur la session"""
+    from app.extensions import db
+
+    app.extensions['hbnb_entity_cache'] = create_entity_cache(app)
+    session_class = db.session.session_factory.class_
+    if not event.contains(session_class, 'after_commit', _invalidate_committed):
+        event.listen(db.Model, 'after_update', _track_row_write, propagate=True)
+        event.listen(db.Model, 'after_delete', _track_row_write, propagate=True)
+        event.listen(session_class, 'do_orm_execute', _track_bulk_statement)
+        event.listen(session_class, 'after_commit', _invalidate_committed)
+        event.listen(session_class, 'after_transaction_end', _forget_rolled_back)
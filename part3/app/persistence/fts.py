@@ -0,0 +1,74 @@
+"""Index plein texte SQLite FTS5 des lieux (titre et description)"""
+import html
+import re
+from sqlalchemy import DDL, event
+
+# La table FTS garde l'id du lieu (non indexé) et est tenue à jour par
+# des triggers, quel que soit le code qui écrit dans places
+PLACES_FTS_CREATE = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS places_fts USING fts5("
+    "place_id UNINDEXED, title, description, "
+    "tokenize = 'unicode61 remove_diacritics 2')",
+    "CREATE TRIGGER IF NOT EXISTS places_fts_insert AFTER INSERT ON places BEGIN "
+    "INSERT INTO places_fts (place_id, title, description) "
+    "VALUES (new.id, new.title, coalesce(new.description, '')); END",
+    "CREATE TRIGGER IF NOT EXISTS places_fts_update "
+    "AFTER UPDATE OF title, description ON places BEGIN "
+    "DELETE FROM places_fts WHERE place_id = old.id; "
+    "INSERT INTO places_fts (place_id, title, description) "
+    "VALUES (new.id, new.title, coalesce(new.description, '')); END",
+    "CREATE TRIGGER IF NOT EXISTS places_fts_delete AFTER DELETE ON places BEGIN "
+    "DELETE FROM places_fts WHERE place_id = old.id; END",
+]
+
+PLACES_FTS_DROP = [
+    "DROP TRIGGER IF EXISTS places_fts_insert",
+    "DROP TRIGGER IF EXISTS places_fts_update",
+    "DROP TRIGGER IF EXISTS places_fts_delete",
+    "DROP TABLE IF EXISTS places_fts",
+]
+
+# Marqueurs passés à snippet(): des caractères de contrôle, remplacés par
+# <mark> après l'échappement HTML du texte saisi par l'utilisateur
+SNIPPET_START, SNIPPET_END = '\x02', '\x03'
+
+PLACES_FTS_POPULATE = (
+    "INSERT INTO places_fts (place_id, title, description) "
+    "SELECT id, title, coalesce(description, '') FROM places")
+
+
+def install_place_search(table):
+    """Crée (et supprime) la table FTS et ses triggers avec la table places"""
+    for statement in PLACES_FTS_CREATE:
+        event.listen(table, 'after_create',
+                     DDL(statement).execute_if(dialect='sqlite'))
+    for statement in PLACES_FTS_DROP:
+        event.listen(table, 'before_drop',
+                     DDL(statement).execute_if(dialect='sqlite'))
+
+
+def build_match_query(text):
+    """
+    Transforme une saisie libre en requête FTS5 sûre: chaque mot est cité
+    (la syntaxe FTS de l'utilisateur est neutralisée), tous les mots sont
+    requis et le dernier est cherché en préfixe.
+    """
+    words = re.findall(r"\w+", text, flags=re.UNICODE)
+    if not words:
+        return None
+    terms = [f'"{word}"' for word in words]
+    terms[-1] += '*'
+    return ' '.join(terms)
+
+
+def highlight_snippet(snippet):
+    """
+    Extrait de snippet() en HTML sûr: le texte est échappé (un titre peut
+    contenir des balises) puis les marqueurs deviennent <mark></mark>.
+    """
+    if snippet is None:
+        return None
+    # Un marqueur présent dans le texte saisi ne produit au pire qu'une
+    # balise <mark> de plus, jamais de balise arbitraire
+    return (html.escape(snippet)
+            .replace(SNIPPET_START, '<mark>').replace(SNIPPET_END, '</mark>'))
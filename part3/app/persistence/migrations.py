@@ -0,0 +1,126 @@
+"""
+Mise à niveau du schéma d'une base existante (flask hbnb migrate).
+
+create_all crée les tables manquantes mais ne touche pas aux tables qui
+existent déjà: les colonnes ajoutées au modèle depuis la création de la
+base sont listées dans ADDED_COLUMNS et ajoutées par ALTER TABLE, puis
+chaque table reçoit les index du modèle qui lui manquent. Chaque étape
+vérifie le schéma avant d'agir: la mise à niveau peut être relancée sans
+effet.
+
+Les colonnes ajoutées sont vides (ou à leur valeur par défaut): la
+commande migrate lance ensuite la réparation correspondante (voir
+app/commands.py). app/persistence/migrations_sql.sql contient les mêmes
+changements en SQL pour une base MySQL.
+"""
+from collections import namedtuple
+from sqlalchemy import bindparam, inspect, text
+from app import passwords
+from app.extensions import db
+from app.persistence.fts import PLACES_FTS_CREATE
+from app.persistence.repository import chunked
+
+# Tables créées, (table, colonne) ajoutées, index créés et nombre de
+# reviews en double supprimées par upgrade()
+Upgrade = namedtuple('Upgrade', ['created', 'added', 'indexes', 'removed_reviews'])
+
+# (table, colonne, valeur par défaut SQL des lignes existantes)
+ADDED_COLUMNS = [
+    ('users', 'password_algorithm', None),
+    ('users', 'password_cost', None),
+    ('places', 'review_count', '0'),
+    ('places', 'rating_sum', '0'),
+    ('amenities', 'places_count', '0'),
+    ('places', 'geohash', None),
+]
+
+
+def _add_column(connection, table, column_name, default):
+    column = db.metadata.tables[table].columns[column_name]
+    dialect = connection.dialect
+    ddl = (f"ALTER TABLE {dialect.identifier_preparer.quote(table)} "
+           f"ADD COLUMN {dialect.identifier_preparer.quote(column_name)} "
+           f"{column.type.compile(dialect=dialect)}")
+    if default is not None:
+        ddl += f" DEFAULT {default}"
+    if not column.nullable:
+        ddl += " NOT NULL"
+    connection.execute(text(ddl))
+
+
+def _backfill_password_policy(connection):
+    # Algorithme et coût lus dans le hachage stocké: sans eux, le rehachage
+    # au login ne sait pas si le hachage suit la politique courante
+    rows = connection.execute(text(
+        "SELECT id, password FROM users WHERE password_algorithm IS NULL")).all()
+    for user_id, pw_hash in rows:
+        algorithm, cost = passwords.parse_hash(pw_hash)
+        if algorithm is not None:
+            connection.execute(
+                text("UPDATE users SET password_algorithm = :algorithm, "
+                     "password_cost = :cost WHERE id = :id"),
+                {'algorithm': algorithm, 'cost': cost, 'id': user_id})
+
+
+def _remove_duplicate_reviews(connection):
+    # Doublons (place_id, user_id) d'avant l'index unique: la plus ancienne
+    # review est gardée, les suivantes sont supprimées
+    rows = connection.execute(text(
+        "SELECT reviews.id, reviews.place_id, reviews.user_id FROM reviews "
+        "JOIN (SELECT place_id, user_id FROM reviews GROUP BY place_id, user_id "
+        "HAVING COUNT(*) > 1) duplicates ON duplicates.place_id = reviews.place_id "
+        "AND duplicates.user_id = reviews.user_id "
+        "ORDER BY reviews.place_id, reviews.user_id, reviews.created_at, reviews.id")).all()
+    kept, removed = set(), []
+    for review_id, place_id, user_id in rows:
+        if (place_id, user_id) in kept:
+            removed.append(review_id)
+        else:
+            kept.add((place_id, user_id))
+    statement = text("DELETE FROM reviews WHERE id IN :ids").bindparams(
+        bindparam('ids', expanding=True))
+    for chunk in chunked(removed, 500):
+        connection.execute(statement, {'ids': chunk})
+    return len(removed)
+
+
+def upgrade():
+    """
+    Crée les tables manquantes (revoked_tokens, places_fts, ...), ajoute
+    les colonnes de ADDED_COLUMNS absentes et les index manquants de toutes
+    les tables.
+    Les reviews en double sont supprimées avant de créer l'index unique
+    uq_reviews_place_id_user_id. Retourne un Upgrade.
+    """
+    existing_tables = set(inspect(db.engine).get_table_names())
+    db.create_all()
+    created = sorted(set(db.metadata.tables) - existing_tables)
+    added = []
+    with db.engine.begin() as connection:
+        inspector = inspect(connection)
+        for table, column_name, default in ADDED_COLUMNS:
+            existing = {column['name'] for column in inspector.get_columns(table)}
+            if column_name not in existing:
+                _add_column(connection, table, column_name, default)
+                added.append((table, column_name))
+        if ('users', 'password_algorithm') in added:
+            _backfill_password_policy(connection)
+
+        indexes, removed_reviews = [], 0
+        for table in db.metadata.sorted_tables:
+            existing = {index['name'] for index in inspector.get_indexes(table.name)}
+            for index in sorted(table.indexes, key=lambda index: index.name):
+                if index.name not in existing:
+                    if index.name == 'uq_reviews_place_id_user_id':
+                        removed_reviews = _remove_duplicate_reviews(connection)
+                    index.create(connection)
+                    indexes.append(index.name)
+
+        # La table FTS5 et ses triggers ne sont créés qu'avec la table places
+        # (after_create): une base dont places existait déjà ne les a pas
+        if (connection.dialect.name == 'sqlite'
+                and 'places_fts' not in inspector.get_table_names()):
+            for statement in PLACES_FTS_CREATE:
+                connection.execute(text(statement))
+            created.append('places_fts')
+    return Upgrade(created, added, indexes, removed_reviews)
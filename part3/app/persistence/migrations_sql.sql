@@ -0,0 +1,79 @@
+-- Upgrade of an existing MySQL database created from tables_sql.sql.
+-- Each block is run once; app/persistence/migrations.py applies the same
+-- changes to any database with: flask --app run hbnb migrate
+
+USE hbnb_db;
+
+-- Algorithm and cost of each stored password hash (app/passwords.py),
+-- read from the hash prefix: bcrypt $2a$/$2b$/$2y$ + cost, scrypt ln=
+ALTER TABLE users ADD COLUMN password_algorithm VARCHAR(20);
+ALTER TABLE users ADD COLUMN password_cost INT;
+UPDATE users SET password_algorithm = 'bcrypt',
+                 password_cost = CAST(SUBSTRING(password, 5, 2) AS UNSIGNED)
+WHERE password REGEXP '^[$]2[aby][$]';
+UPDATE users SET password_algorithm = 'scrypt',
+                 password_cost = CAST(SUBSTRING_INDEX(
+                     SUBSTRING_INDEX(password, 'ln=', -1), ',', 1) AS UNSIGNED)
+WHERE password LIKE '$scrypt$%';
+
+-- Denormalized rating aggregates of each place, filled from the reviews
+-- (same as flask --app run hbnb recompute-ratings)
+ALTER TABLE places ADD COLUMN review_count INT NOT NULL DEFAULT 0;
+ALTER TABLE places ADD COLUMN rating_sum INT NOT NULL DEFAULT 0;
+UPDATE places SET
+    review_count = (SELECT COUNT(*) FROM reviews WHERE reviews.place_id = places.id),
+    rating_sum = (SELECT COALESCE(SUM(rating), 0) FROM reviews
+                  WHERE reviews.place_id = places.id);
+
+-- Denormalized number of places of each amenity, filled from the links
+-- (same as flask --app run hbnb recompute-amenity-counts)
+ALTER TABLE amenities ADD COLUMN places_count INT NOT NULL DEFAULT 0;
+UPDATE amenities SET places_count = (
+    SELECT COUNT(*) FROM place_amenity WHERE place_amenity.amenity_id = amenities.id);
+
+-- Token revocation (logout)
+CREATE TABLE IF NOT EXISTS revoked_tokens (
+    id CHAR(36) PRIMARY KEY,
+    jti CHAR(36) UNIQUE NOT NULL,
+    user_id CHAR(36),
+    expires_at DATETIME,
+    created_at DATETIME,
+    updated_at DATETIME,
+    INDEX ix_revoked_tokens_expires_at (expires_at),
+    INDEX ix_revoked_tokens_created_at_id (created_at, id)
+);
+
+-- Proximity search: geohash cell of each place, then fill it with
+-- flask --app run hbnb backfill-geohash
+ALTER TABLE places ADD COLUMN geohash VARCHAR(12);
+CREATE INDEX ix_places_geohash ON places (geohash);
+
+-- One review per user and place: keep the earliest review of each
+-- (place_id, user_id) and drop the later duplicates, then add the index
+-- the application expects. tables_sql.sql already declares
+-- UNIQUE (user_id, place_id); the DELETE is for databases created by the
+-- application (with created_at), which had no such constraint
+DELETE later FROM reviews later
+JOIN reviews earlier ON earlier.place_id = later.place_id
+    AND earlier.user_id = later.user_id
+    AND (earlier.created_at < later.created_at
+         OR (earlier.created_at = later.created_at AND earlier.id < later.id));
+CREATE UNIQUE INDEX uq_reviews_place_id_user_id ON reviews (place_id, user_id);
+
+-- Price filter and (price, id) pagination, amenity -> places lookups
+CREATE INDEX ix_places_price_id ON places (price, id);
+CREATE INDEX ix_place_amenity_amenity_id_place_id ON place_amenity (amenity_id, place_id);
+-- The (created_at, id) cursor pagination indexes only apply to tables with
+-- created_at (databases created by the application, upgraded by migrate)
+
+-- Full-text search uses an SQLite FTS5 table (app/persistence/fts.py) that
+-- MySQL does not have. On an SQLite database whose places table predates
+-- it, migrate runs the equivalent of:
+--   CREATE VIRTUAL TABLE IF NOT EXISTS places_fts USING fts5(
+--       place_id UNINDEXED, title, description,
+--       tokenize = 'unicode61 remove_diacritics 2');
+--   CREATE TRIGGER places_fts_insert / places_fts_update / places_fts_delete
+--       (see PLACES_FTS_CREATE)
+--   INSERT INTO places_fts (place_id, title, description)
+--       SELECT id, title, coalesce(description, '') FROM places;
+-- i.e. flask --app run hbnb rebuild-search-index
@@ -1,5 +1,76 @@
 from app.extensions import db, jwt, bcrypt
 from abc import ABC, abstractmethod
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import datetime
+import json
+import math
+from sqlalchemy import and_, or_, select
+from sqlalchemy.orm import make_transient_to_detached
+from sqlalchemy.orm.attributes import set_committed_value
+from app.persistence.cache import EntityCache, get_entity_cache, is_stale
+from app.persistence.unit_of_work import commit, transaction
+
+
+def encode_cursor(obj, sort='created_at'):
+    """Encode la position (valeur du tri, id) d'un objet en curseur opaque"""
+    return encode_position(sort, getattr(obj, sort), obj.id)
+
+
+def encode_position(sort, value, obj_id):
+    """Encode une position (valeur du tri, id) en curseur opaque"""
+    is_datetime = isinstance(value, datetime)
+    payload = {
+        "s": sort,
+        "v": value.isoformat() if is_datetime else value,
+        "dt": is_datetime,
+        "id": obj_id
+    }
+    raw = json.dumps(payload, separators=(',', ':'))
+    return urlsafe_b64encode(raw.encode('utf-8')).decode('ascii')
+
+
+# Type de la valeur de tri d'un curseur selon la clé de tri; les autres clés
+# acceptent une chaîne ou un nombre
+CURSOR_VALUE_TYPES = {
+    'created_at': datetime,
+    'price': float,
+    'rating_score': float,
+    'search': float,
+}
+
+
+def _check_cursor_value(sort, value):
+    """Valeur de tri du curseur si son type convient à la clé de tri"""
+    expected = CURSOR_VALUE_TYPES.get(sort)
+    if expected is datetime:
+        if isinstance(value, datetime):
+            return value
+    elif isinstance(value, (int, float)) and not isinstance(value, bool):
+        # json.loads accepte NaN et Infinity
+        if math.isfinite(value):
+            return float(value) if expected is float else value
+    elif expected is None and isinstance(value, str):
+        return value
+    raise ValueError
+
+
+def decode_cursor(cursor, sort='created_at'):
+    """
+    Décode un curseur en tuple (valeur du tri, id). Un curseur forgé dont
+    la valeur ou l'id n'a pas le type attendu pour ce tri est refusé
+    (ValueError) avant d'atteindre la requête.
+    """
+    try:
+        raw = urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8')
+        payload = json.loads(raw)
+        if payload["s"] != sort or not isinstance(payload["id"], str):
+            raise ValueError
+        value = payload["v"]
+        if payload["dt"] is True:
+            value = datetime.fromisoformat(value)
+        return _check_cursor_value(sort, value), payload["id"]
+    except (ValueError, UnicodeError, TypeError, KeyError):
+        raise ValueError("Curseur de pagination invalide")
 
 
 class Repository(ABC):
@@ -15,6 +86,10 @@ class Repository(ABC):
     def get_all(self):
         pass
 
+    @abstractmethod
+    def get_page(self, after=None, limit=20):
+        pass
+
     @abstractmethod
     def update(self, obj_id, data):
         pass
@@ -27,33 +102,199 @@ class Repository(ABC):
     def get_by_attribute(self, attr_name, attr_value):
         pass
 
+    @abstractmethod
+    def get_many(self, obj_ids):
+        pass
+
+    @abstractmethod
+    def add_many(self, objs):
+        pass
+
+    @abstractmethod
+    def update_many(self, updates):
+        pass
+
+    @abstractmethod
+    def delete_many(self, obj_ids):
+        pass
+
+
+def chunked(values, size):
+    """Découpe une liste en tranches de taille size au plus"""
+    values = list(values)
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
 
 class SQLAlchemyRepository(Repository):
+    # Taille maximale des listes IN (...), sous la limite de paramètres SQLite
+    IN_CHUNK_SIZE = 500
+    # Colonnes jamais exportées par iter_rows (par exemple un mot de passe)
+    EXPORT_EXCLUDED_COLUMNS = ()
+
     def __init__(self, model):
         self.model = model
 
     def add(self, obj):
-        db.session.add(obj)
-        db.session.commit()
+        # Savepoint: une IntegrityError laisse la transaction de la requête utilisable
+        with transaction(savepoint=True):
+            db.session.add(obj)
 
     def get(self, obj_id):
-        return self.model.query.get(obj_id)
+        """
+        Lecture par id via le cache d'entités (voir app/persistence/cache.py):
+        session courante d'abord, puis cache, puis base. Seules les lectures
+        sur la base principale remplissent le cache.
+        """
+        if obj_id is None:
+            return None
+        cache = get_entity_cache()
+        if cache is None:
+            return db.session.get(self.model, obj_id)
+        session = db.session()
+        mapper = self.model.__mapper__
+        table = self.model.__tablename__
+        key = EntityCache.key(table, obj_id)
+        # Déjà dans la session, ou écrit par la transaction en cours:
+        # le cache ne doit ni servir ni recevoir ces lignes
+        identity = mapper.identity_key_from_primary_key([obj_id])
+        if identity in session.identity_map or is_stale(session, table, key):
+            return db.session.get(self.model, obj_id)
+
+        values = cache.get(key)
+        if values is not None:
+            return self._from_cache(values)
+        # Une ligne lue sur un réplica peut être en retard: elle n'entre pas
+        # dans le cache, où elle survivrait à la réplication
+        from_replica = session.reads_from_replica()
+        generation = cache.generation
+        obj = db.session.get(self.model, obj_id)
+        if obj is not None and not from_replica:
+            cache.set(key, {attr.key: getattr(obj, attr.key)
+                            for attr in mapper.column_attrs}, generation)
+        return obj
+
+    def _from_cache(self, values):
+        """Reconstruit un objet depuis ses colonnes et l'attache sans SELECT"""
+        obj = self.model.__mapper__.class_manager.new_instance()
+        for key, value in values.items():
+            set_committed_value(obj, key, value)
+        make_transient_to_detached(obj)
+        return db.session.merge(obj, load=False)
 
     def get_all(self):
         return self.model.query.all()
 
+    def get_page(self, after=None, limit=20, query=None, sort='created_at',
+                 descending=False):
+        """
+        Pagination par curseur (keyset) triée sur (sort, id).
+
+        query permet de paginer une requête déjà filtrée; sort est le nom
+        d'un attribut (colonne ou hybrid_property) du modèle.
+        Retourne un tuple (objets, next_cursor); next_cursor vaut None
+        lorsqu'il n'y a plus de page suivante.
+        """
+        column = getattr(self.model, sort)
+        id_column = self.model.id
+        if query is None:
+            query = self.model.query
+
+        if descending:
+            query = query.order_by(column.desc(), id_column.desc())
+        else:
+            query = query.order_by(column, id_column)
+
+        if after:
+            value, obj_id = decode_cursor(after, sort)
+            if descending:
+                query = query.filter(or_(
+                    column < value, and_(column == value, id_column < obj_id)))
+            else:
+                query = query.filter(or_(
+                    column > value, and_(column == value, id_column > obj_id)))
+
+        # On charge une ligne de plus pour savoir s'il existe une page suivante
+        items = query.limit(limit + 1).all()
+        next_cursor = None
+        if len(items) > limit:
+            items = items[:limit]
+            next_cursor = encode_cursor(items[-1], sort)
+        return items, next_cursor
+
     def update(self, obj_id, data):
         obj = self.get(obj_id)
         if obj:
             for key, value in data.items():
                 setattr(obj, key, value)
-            db.session.commit()
+            commit()
 
     def delete(self, obj_id):
         obj = self.get(obj_id)
         if obj:
             db.session.delete(obj)
-            db.session.commit()
+            commit()
 
     def get_by_attribute(self, attr_name, attr_value):
         return self.model.query.filter_by(**{attr_name: attr_value}).first()
+
+    def iter_rows(self, after=None, batch_size=1000):
+        """
+        Parcourt toute la table triée par id, en dictionnaires de colonnes
+        (sans objets ORM ni identity map). Les lignes sont lues par lots de
+        batch_size depuis le curseur de la base (yield_per): la mémoire ne
+        dépend pas de la taille de la table. after reprend après cet id.
+        """
+        columns = [column for column in self.model.__table__.columns
+                   if column.key not in self.EXPORT_EXCLUDED_COLUMNS]
+        query = select(*columns).order_by(self.model.id)
+        if after:
+            query = query.where(self.model.id > after)
+        result = db.session.execute(query.execution_options(yield_per=batch_size))
+        try:
+            for row in result.mappings():
+                yield dict(row)
+        finally:
+            result.close()
+
+    def get_many(self, obj_ids):
+        """Charge plusieurs objets par id (une requête IN par tranche): {id: objet}"""
+        found = {}
+        for chunk in chunked(set(obj_ids), self.IN_CHUNK_SIZE):
+            for obj in self.model.query.filter(self.model.id.in_(chunk)):
+                found[obj.id] = obj
+        return found
+
+    def add_many(self, objs):
+        """
+        Ajoute tous les objets en une seule transaction. Le flush de
+        l'ORM regroupe les INSERT en instructions multi-lignes; en cas
+        d'erreur d'intégrité rien n'est enregistré.
+        Retourne les ids attribués, dans l'ordre des objets (lus avant le
+        commit, qui expire les objets et forcerait un SELECT par objet).
+        """
+        with transaction(savepoint=True):
+            db.session.add_all(objs)
+            db.session.flush()
+            obj_ids = [obj.id for obj in objs]
+        return obj_ids
+
+    def update_many(self, updates):
+        """
+        Applique {id: {attribut: valeur}} en une transaction; les UPDATE de
+        même forme sont envoyés en executemany. Retourne les objets modifiés.
+        """
+        objs = self.get_many(updates)
+        for obj_id, obj in objs.items():
+            for key, value in updates[obj_id].items():
+                setattr(obj, key, value)
+        commit()
+        return list(objs.values())
+
+    def delete_many(self, obj_ids):
+        """Supprime les objets en une transaction et retourne les ids supprimés"""
+        objs = self.get_many(obj_ids)
+        for obj in objs.values():
+            db.session.delete(obj)
+        commit()
+        return list(objs)
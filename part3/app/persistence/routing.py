@@ -0,0 +1,88 @@
+"""
+Routage lecture/écriture: les SELECT partent vers un réplica, tout le reste
+(flush, INSERT/UPDATE/DELETE, DDL) vers la base principale.
+"""
+import random
+from flask import current_app, has_request_context
+from flask_sqlalchemy.session import Session
+from sqlalchemy import create_engine
+from sqlalchemy.sql import CompoundSelect, Select, TextClause
+
+_STICKY = 'hbnb_primary_sticky'
+_REPLICA = 'hbnb_replica'
+
+
+def _is_read(clause):
+    if isinstance(clause, TextClause):
+        return clause.text.lstrip().upper().startswith('SELECT')
+    return isinstance(clause, (Select, CompoundSelect))
+
+
+class RoutingSession(Session):
+    """
+    Session qui lit sur un des réplicas de SQLALCHEMY_REPLICA_URIS et écrit
+    sur la base principale.
+
+    Seules les requêtes HTTP sont routées: le démarrage et les commandes de
+    maintenance lisent la base principale.
+    Un seul réplica est tiré au sort par requête, pour lire un état
+    cohérent. Dès la première écriture, la session reste collée à la base
+    principale jusqu'à reset_routing() (début de requête): la requête relit
+    ainsi ses propres écritures malgré le retard de réplication.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        primary = super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+        # Bind explicite, modèle rattaché à une autre base ou code hors requête
+        # (démarrage, commandes CLI): pas de routage
+        if (bind is not None or primary is not self._db.engines.get(None)
+                or not has_request_context()):
+            return primary
+        if self._flushing or not _is_read(clause):
+            self.info[_STICKY] = True
+            return primary
+        if self.info.get(_STICKY):
+            return primary
+        return self._replica() or primary
+
+    def _replica(self):
+        if _REPLICA not in self.info:
+            replicas = replica_engines(current_app)
+            self.info[_REPLICA] = random.choice(replicas) if replicas else None
+        return self.info[_REPLICA]
+
+    def reset_routing(self):
+        """Oublie le réplica choisi et la préférence pour la base principale"""
+        self.info.pop(_STICKY, None)
+        self.info.pop(_REPLICA, None)
+
+    def reads_from_primary(self):
+        return self.info.get(_STICKY, False)
+
+    def reads_from_replica(self):
+        """Vrai si le prochain SELECT de la session partira vers un réplica"""
+        return (has_request_context() and not self.info.get(_STICKY)
+                and self._replica() is not None)
+
+
+def replica_engines(app):
+    return app.extensions.get('hbnb_replicas', [])
+
+
+def init_app(app):
+    """
+    Crée les engines des réplicas (mêmes options de pool que la base
+    principale) et repart d'un routage neuf à chaque requête. Les réplicas
+    ne sont pas des SQLALCHEMY_BINDS: aucun modèle n'y est rattaché et
+    create_all ne doit pas les toucher.
+    """
+    from app.extensions import db
+
+    options = app.config.get('SQLALCHEMY_ENGINE_OPTIONS') or {}
+    app.extensions['hbnb_replicas'] = [
+        create_engine(url, **options)
+        for url in app.config.get('SQLALCHEMY_REPLICA_URIS') or []]
+
+    @app.before_request
+    def _reset_read_routing():
+        db.session().reset_routing()
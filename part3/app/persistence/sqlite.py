@@ -0,0 +1,47 @@
+"""Réglages SQLite (PRAGMA) appliqués à chaque nouvelle connexion du pool"""
+import re
+from sqlalchemy import event
+from app.extensions import db
+from app.persistence.routing import replica_engines
+
+
+def pragma_statements(pragmas):
+    """Construit les instructions PRAGMA à partir de {nom: valeur}"""
+    statements = []
+    for name, value in pragmas.items():
+        if not re.fullmatch(r'[a-z_]+', name) or not re.fullmatch(r'-?\w+', str(value)):
+            raise ValueError(f"PRAGMA SQLite invalide: {name} = {value}")
+        statements.append(f"PRAGMA {name} = {value}")
+    return statements
+
+
+def init_app(app):
+    """
+    Enregistre les PRAGMA de app.config['SQLITE_PRAGMAS'] et le type de
+    transaction SQLITE_BEGIN_MODE sur les engines SQLite. Ils sont propres à chaque
+    connexion (sauf journal_mode=WAL, persistant dans le fichier), d'où
+    l'événement 'connect' plutôt qu'un appel unique.
+    """
+    statements = pragma_statements(app.config.get('SQLITE_PRAGMAS') or {})
+    begin_mode = app.config.get('SQLITE_BEGIN_MODE')
+    if begin_mode not in (None, 'DEFERRED', 'IMMEDIATE', 'EXCLUSIVE'):
+        raise ValueError(f"SQLITE_BEGIN_MODE invalide: {begin_mode}")
+    if not (statements or begin_mode):
+        return
+    def _apply_pragmas(dbapi_connection, connection_record):
+        if begin_mode:
+            # Le driver émet "BEGIN <mode>" avant la première écriture
+            dbapi_connection.isolation_level = begin_mode
+        cursor = dbapi_connection.cursor()
+        try:
+            for statement in statements:
+                cursor.execute(statement)
+        finally:
+            cursor.close()
+
+    # Base principale et réplicas en lecture
+    with app.app_context():
+        engines = [engine for engine in [*db.engines.values(), *replica_engines(app)]
+                   if engine.dialect.name == 'sqlite']
+    for engine in engines:
+        event.listen(engine, 'connect', _apply_pragmas)
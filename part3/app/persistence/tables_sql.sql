@@ -10,6 +10,8 @@ CREATE TABLE if NOT EXISTS users (
     last_name VARCHAR(255) NOT NULL,
     email VARCHAR(255) UNIQUE NOT NULL,
     password VARCHAR(255) NOT NULL,
+    password_algorithm VARCHAR(20),
+    password_cost INT,
     is_admin BOOLEAN DEFAULT FALSE
 );
 
@@ -21,7 +23,11 @@ CREATE TABLE IF NOT EXISTS places (
     price DECIMAL(10, 2) NOT NULL,
     latitude FLOAT NOT NULL,
     longitude FLOAT NOT NULL,
+    geohash VARCHAR(12),
+    review_count INT NOT NULL DEFAULT 0,
+    rating_sum INT NOT NULL DEFAULT 0,
     owner_id CHAR(36) NOT NULL,
+    INDEX ix_places_geohash (geohash),
     FOREIGN KEY (owner_id) REFERENCES users(id) ON DELETE CASCADE
 );
 
@@ -40,7 +46,8 @@ CREATE TABLE IF NOT EXISTS reviews (
 -- create table amenity
 CREATE TABLE IF NOT EXISTS amenities(
     id CHAR(36) PRIMARY KEY,
-    name VARCHAR(255) UNIQUE NOT NULL
+    name VARCHAR(255) UNIQUE NOT NULL,
+    places_count INT NOT NULL DEFAULT 0
 );
 
 CREATE TABLE IF NOT EXISTS place_amenity(
@@ -51,13 +58,31 @@ CREATE TABLE IF NOT EXISTS place_amenity(
     FOREIGN KEY(amenity_id) REFERENCES amenities(id) ON DELETE CASCADE
 );
 
-INSERT INTO users (id, first_name, last_name, email, password, is_admin)
+-- create table revoked_tokens (tokens revoked by logout before they expire)
+CREATE TABLE IF NOT EXISTS revoked_tokens (
+    id CHAR(36) PRIMARY KEY,
+    jti CHAR(36) UNIQUE NOT NULL,
+    user_id CHAR(36),
+    expires_at DATETIME,
+    created_at DATETIME,
+    updated_at DATETIME,
+    INDEX ix_revoked_tokens_expires_at (expires_at),
+    INDEX ix_revoked_tokens_created_at_id (created_at, id)
+);
+
+-- The admin hash keeps its own algorithm and cost: it is rehashed with the
+-- configured policy (PASSWORD_HASH_ALGORITHM, BCRYPT_LOG_ROUNDS) at the
+-- first successful login
+INSERT INTO users (id, first_name, last_name, email, password,
+                   password_algorithm, password_cost, is_admin)
 VALUES (
     '36c9050e-ddd3-4c3b-9731-9f487208bbc1',
     'Admin',
     'HBnB',
     'admin@hbnb.io',
     '$2a$12$Ck2IpAyhnpkjD7P.muhj8OllCpctEzszXvqXKDPig7Qe4Wxots9N6', -- hashed password for admin
+    'bcrypt',
+    12,
     TRUE
 ) ON DUPLICATE KEY UPDATE email=email;
 
@@ -0,0 +1,131 @@
+"""
+Unité de travail: regroupe les écritures d'une requête HTTP (ou d'un bloc
+transaction()) en une seule transaction, commitée une fois à la fin.
+
+Les repositories et les modèles ne committent plus directement: ils
+appellent commit(), qui valide immédiatement hors unité de travail (scripts,
+commandes CLI) et se contente d'un flush à l'intérieur, pour que les ids
+soient attribués et les erreurs de contrainte levées au bon endroit.
+"""
+from contextlib import contextmanager
+from flask import g
+from app.extensions import db
+
+_DEPTH = 'hbnb_uow_depth'
+_CALLBACKS = 'hbnb_uow_after_commit'
+
+
+def in_transaction():
+    """Vrai si une unité de travail est ouverte sur la session courante"""
+    return db.session.info.get(_DEPTH, 0) > 0
+
+
+def _begin():
+    info = db.session.info
+    info[_DEPTH] = info.get(_DEPTH, 0) + 1
+
+
+def _end(success):
+    info = db.session.info
+    info[_DEPTH] -= 1
+    if info[_DEPTH]:
+        return
+    callbacks = info.pop(_CALLBACKS, [])
+    if not success:
+        db.session.rollback()
+        return
+    try:
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    for callback in callbacks:
+        callback()
+
+
+def commit():
+    """Commit immédiat hors unité de travail, simple flush à l'intérieur"""
+    if in_transaction():
+        db.session.flush()
+        return
+    try:
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+
+def after_commit(callback):
+    """
+    Exécute callback quand les écritures en cours sont commitées (tout de
+    suite hors unité de travail); il est abandonné en cas de rollback.
+    Sert à tenir à jour les index en mémoire.
+    """
+    if in_transaction():
+        db.session.info.setdefault(_CALLBACKS, []).append(callback)
+    else:
+        callback()
+
+
+def _ensure_driver_transaction():
+    """
+    Le driver sqlite3 n'ouvre sa transaction qu'au premier INSERT/UPDATE/
+    DELETE: un SAVEPOINT émis avant démarrerait la transaction SQLite et
+    son RELEASE commiterait tout. On ouvre donc la transaction nous-mêmes.
+    """
+    connection = db.session.connection()
+    if connection.dialect.name != 'sqlite':
+        return
+    dbapi_connection = connection.connection.dbapi_connection
+    if not dbapi_connection.in_transaction:
+        # Même type de transaction que celles ouvertes par le driver
+        connection.exec_driver_sql(
+            f"BEGIN {dbapi_connection.isolation_level or ''}".strip())
+
+
+@contextmanager
+def transaction(savepoint=False):
+    """
+    Bloc transactionnel: le bloc le plus externe commite une seule fois en
+    sortie et annule tout si une exception s'échappe. Un bloc imbriqué
+    fait partie de la transaction englobante; avec savepoint=True il est
+    isolé dans un SAVEPOINT, annulé seul en cas d'exception.
+    """
+    if not in_transaction():
+        _begin()
+        try:
+            yield
+        except BaseException:
+            _end(success=False)
+            raise
+        _end(success=True)
+    elif savepoint:
+        _ensure_driver_transaction()
+        with db.session.begin_nested():
+            yield
+    else:
+        yield
+        db.session.flush()
+
+
+def init_app(app):
+    """
+    Ouvre une unité de travail par requête: commit unique après une
+    réponse réussie (statut < 400), rollback sinon ou si une exception
+    interrompt la requête.
+    """
+    @app.before_request
+    def _begin_request_transaction():
+        _begin()
+        g.hbnb_uow_open = True
+
+    @app.after_request
+    def _end_request_transaction(response):
+        if g.pop('hbnb_uow_open', False):
+            _end(success=response.status_code < 400)
+        return response
+
+    @app.teardown_request
+    def _abort_request_transaction(exc):
+        if g.pop('hbnb_uow_open', False):
+            _end(success=False)
@@ -0,0 +1,96 @@
+"""
+Résolution du token JWT en principal (id, is_admin) pour les endpoints
+@jwt_required().
+
+Le principal est lu en base au premier usage d'un token, puis gardé dans
+un LRU du processus indexé par le jti du token: les requêtes suivantes
+avec le même token ne touchent pas la base. Une entrée expire avec son
+token, et au plus tard après PRINCIPAL_CACHE_TTL secondes. Elle est
+supprimée au commit d'un changement du statut admin de l'utilisateur
+(UserFacade.update_user); entre processus, l'écart est borné par
+PRINCIPAL_CACHE_TTL.
+
+is_admin vient de la base et non du claim du token: un admin rétrogradé
+perd ses droits sans attendre l'expiration de ses tokens.
+"""
+import time
+from collections import namedtuple
+from flask import current_app, has_app_context
+from flask_jwt_extended import get_current_user
+from app.extensions import jwt
+from app.persistence.cache import LRUCache
+
+# Principal immuable, sans lien avec la session SQLAlchemy
+Principal = namedtuple('Principal', ['id', 'is_admin'])
+
+
+class PrincipalCache:
+    """LRU des principaux par jti, avec invalidation par utilisateur"""
+
+    def __init__(self, max_entries, ttl):
+        self.entries = LRUCache(max_entries, ttl)
+        self.invalidations = 0
+
+    def get(self, jti):
+        return self.entries.get(jti)
+
+    def set(self, jti, principal, expires_at=None):
+        ttl = None if expires_at is None else max(0.0, expires_at - time.time())
+        self.entries.set(jti, principal, ttl=ttl)
+
+    def invalidate_user(self, user_id):
+        self.invalidations += 1
+        self.entries.discard_values(lambda principal: principal.id == user_id)
+
+    def stats(self):
+        return {**self.entries.stats(), 'invalidations': self.invalidations}
+
+
+def get_principal_cache():
+    """Cache de l'app courante, ou None s'il est désactivé"""
+    if not has_app_context():
+        return None
+    return current_app.extensions.get('hbnb_principal_cache')
+
+
+def invalidate_user(user_id):
+    cache = get_principal_cache()
+    if cache is not None:
+        cache.invalidate_user(user_id)
+
+
+def current_principal():
+    """Principal de la requête (endpoint @jwt_required())"""
+    return get_current_user()
+
+
+@jwt.user_lookup_loader
+def _load_principal(jwt_header, jwt_data):
+    # Appelé par @jwt_required() après la vérification du token; None
+    # (utilisateur supprimé) fait répondre 401
+    cache = get_principal_cache()
+    jti = jwt_data.get('jti')
+    if cache is not None and jti:
+        principal = cache.get(jti)
+        if principal is not None:
+            return principal
+
+    from app.services import get_facade
+    user = get_facade().user_facade.get_user(
+        jwt_data[current_app.config['JWT_IDENTITY_CLAIM']])
+    if user is None:
+        return None
+    principal = Principal(user.id, bool(user.is_admin))
+    if cache is not None and jti:
+        cache.set(jti, principal, jwt_data.get('exp'))
+    return principal
+
+
+def init_app(app):
+    """
+    Crée le cache depuis la configuration: PRINCIPAL_CACHE_SIZE (0 le
+    désactive) et PRINCIPAL_CACHE_TTL.
+    """
+    size = app.config.get('PRINCIPAL_CACHE_SIZE', 0)
+    app.extensions['hbnb_principal_cache'] = (
+        PrincipalCache(size, app.config.get('PRINCIPAL_CACHE_TTL', 60)) if size else None)
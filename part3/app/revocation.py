@@ -0,0 +1,215 @@
+"""
+Liste de révocation des tokens JWT, consultée par @jwt_required() via
+jwt.token_in_blocklist_loader.
+
+Les révocations sont enregistrées en base (revoked_tokens), la référence
+durable. Chaque processus garde devant elles un filtre de Bloom des jti
+révoqués: un token absent du filtre (le cas courant) est accepté sans
+aucune entrée/sortie. Seuls les jti présents dans le filtre (révoqués, ou
+faux positifs, TOKEN_BLOOM_ERROR_RATE) sont vérifiés dans le store
+partagé optionnel (API redis-py, LocalCacheClient en développement) puis
+en base.
+
+Une révocation entre dans le filtre et dans l'ensemble local du processus
+qui l'a faite dès son commit. Les autres processus relisent les
+révocations récentes au plus toutes les TOKEN_REVOCATION_SYNC_INTERVAL
+secondes: c'est le délai maximal de propagation. Toutes les lectures de
+révocations se font sur la base principale, jamais sur un réplica.
+"""
+import math
+import threading
+import time
+from datetime import datetime, timedelta
+from flask import current_app, has_app_context
+from app.extensions import jwt
+from app.persistence.cache import LocalCacheClient, connect_redis
+from app.services.repositories.revoked_token_repository import RevokedTokenRepository
+
+# Marge de relecture sous la plus récente date de révocation déjà vue:
+# created_at est fixé au flush, une transaction commitée plus tard peut donc
+# porter une date antérieure, de même qu'un serveur à l'horloge en retard
+SYNC_OVERLAP = timedelta(seconds=30)
+
+
+class BloomFilter:
+    """
+    Filtre de Bloom: "absent" est certain, "présent" est faux avec une
+    probabilité error_rate tant que le filtre contient au plus capacity
+    clés. Les positions viennent de hash() (double hachage): le filtre est
+    propre au processus, la graine aléatoire de hash() n'est donc pas gênante.
+    """
+
+    def __init__(self, capacity, error_rate):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.size = math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray(self.size // 8 + 1)
+        self.count = 0
+
+    def add(self, key):
+        h1, h2 = hash(key), hash((key,)) | 1
+        for i in range(self.hashes):
+            position = (h1 + i * h2) % self.size
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, key):
+        h1, h2 = hash(key), hash((key,)) | 1
+        bits, size = self._bits, self.size
+        for i in range(self.hashes):
+            position = (h1 + i * h2) % size
+            if not bits[position >> 3] >> (position & 7) & 1:
+                return False
+        return True
+
+
+class RevocationList:
+    """Filtre de Bloom du processus devant le store partagé et la base"""
+
+    def __init__(self, repo, capacity, error_rate, sync_interval, shared=None,
+                 prefix='hbnb:revoked:'):
+        self.repo = repo
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.sync_interval = sync_interval
+        self.shared = shared
+        self.prefix = prefix
+        self._bloom = BloomFilter(capacity, error_rate)
+        # Révocations faites par ce processus: {jti: expiration}
+        self._local = {}
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._next_sync = 0.0
+        # Plus récente date de révocation lue en base
+        self._high_water = None
+        self.checks = self.local_hits = self.store_lookups = self.false_positives = 0
+        self.syncs = self.rebuilds = self.shared_errors = 0
+
+    def is_revoked(self, jti):
+        self.checks += 1
+        if time.monotonic() >= self._next_sync:
+            self.sync()
+        if jti not in self._bloom:
+            return False
+        if jti in self._local:
+            self.local_hits += 1
+            return True
+        self.store_lookups += 1
+        revoked = self._shared_contains(jti) or self.repo.is_revoked(jti)
+        if not revoked:
+            self.false_positives += 1
+        return revoked
+
+    def _shared_contains(self, jti):
+        if self.shared is None:
+            return False
+        try:
+            return self.shared.get(self.prefix + jti) is not None
+        except Exception:
+            self.shared_errors += 1
+            return False
+
+    def sync(self):
+        """
+        Ajoute au filtre les révocations faites par les autres processus,
+        relues à partir de la plus récente date de révocation déjà vue; le
+        premier appel (et tout dépassement de capacité) reconstruit le
+        filtre à partir des révocations non expirées.
+        """
+        # Tant que le filtre n'est pas chargé, attendre le thread qui le charge
+        if not self._lock.acquire(blocking=not self._loaded):
+            return  # un autre thread synchronise déjà
+        try:
+            now = datetime.utcnow()
+            if not self._loaded or self._bloom.count > self.capacity:
+                bloom, since = BloomFilter(self.capacity, self.error_rate), None
+            else:
+                bloom = self._bloom
+                since = (self._high_water - SYNC_OVERLAP
+                         if self._high_water is not None else None)
+            for jti, revoked_at in self.repo.get_active(now, since):
+                # La marge relit des révocations déjà présentes
+                if jti not in bloom:
+                    bloom.add(jti)
+                if self._high_water is None or revoked_at > self._high_water:
+                    self._high_water = revoked_at
+            if bloom is not self._bloom:
+                # Révocations locales commitées pendant la reconstruction
+                for jti in list(self._local):
+                    bloom.add(jti)
+                self._bloom = bloom
+                self._loaded = True
+                self.rebuilds += 1
+            for jti, expires_at in list(self._local.items()):
+                if expires_at is not None and expires_at <= now:
+                    del self._local[jti]
+            self._next_sync = time.monotonic() + self.sync_interval
+            self.syncs += 1
+        finally:
+            self._lock.release()
+
+    def revoked(self, jti, expires_at=None):
+        """Révocation commitée: visible tout de suite dans ce processus"""
+        self._local[jti] = expires_at
+        self._bloom.add(jti)
+        if self.shared is not None:
+            ttl = None
+            if expires_at is not None:
+                ttl = max(1, int((expires_at - datetime.utcnow()).total_seconds()))
+            try:
+                self.shared.set(self.prefix + jti, '1', ex=ttl)
+            except Exception:
+                self.shared_errors += 1
+
+    def stats(self):
+        return {'revoked_in_filter': self._bloom.count, 'capacity': self.capacity,
+                'error_rate': self.error_rate, 'filter_bits': self._bloom.size,
+                'filter_hashes': self._bloom.hashes, 'checks': self.checks,
+                'local_hits': self.local_hits, 'store_lookups': self.store_lookups,
+                'false_positives': self.false_positives, 'syncs': self.syncs,
+                'rebuilds': self.rebuilds, 'sync_interval': self.sync_interval,
+                'shared': self.shared is not None, 'shared_errors': self.shared_errors}
+
+
+def get_revocation_list():
+    """Liste de l'app courante, ou None hors contexte d'application"""
+    if not has_app_context():
+        return None
+    return current_app.extensions.get('hbnb_revocation_list')
+
+
+def token_revoked(jti, expires_at=None):
+    revocation_list = get_revocation_list()
+    if revocation_list is not None:
+        revocation_list.revoked(jti, expires_at)
+
+
+@jwt.token_in_blocklist_loader
+def _is_token_revoked(jwt_header, jwt_payload):
+    # Appelé par @jwt_required() pour chaque token valide: True répond 401
+    revocation_list = get_revocation_list()
+    jti = jwt_payload.get('jti')
+    if revocation_list is None or not jti:
+        return False
+    return revocation_list.is_revoked(jti)
+
+
+def init_app(app):
+    """
+    Crée la liste depuis la configuration: TOKEN_BLOOM_CAPACITY,
+    TOKEN_BLOOM_ERROR_RATE, TOKEN_REVOCATION_SYNC_INTERVAL et
+    TOKEN_REVOCATION_SHARED_URL ('local' pour LocalCacheClient, une URL
+    redis:// sinon, None pour s'en passer).
+    """
+    shared = None
+    url = app.config.get('TOKEN_REVOCATION_SHARED_URL')
+    if url:
+        shared = LocalCacheClient() if url == 'local' else connect_redis(
+            url, 'TOKEN_REVOCATION_SHARED_URL')
+    app.extensions['hbnb_revocation_list'] = RevocationList(
+        RevokedTokenRepository(),
+        capacity=app.config.get('TOKEN_BLOOM_CAPACITY', 100000),
+        error_rate=app.config.get('TOKEN_BLOOM_ERROR_RATE', 0.001),
+        sync_interval=app.config.get('TOKEN_REVOCATION_SYNC_INTERVAL', 5),
+        shared=shared)
@@ -1,5 +1,15 @@
+from flask import current_app
 from app.services.facade import HBnBFacade
 
 
+def init_facade(app):
+    """Construit une seule fois le graphe de façades et le stocke sur l'app"""
+    app.extensions['hbnb_facade'] = HBnBFacade(
+        amenity_bitmap_index=app.config.get('AMENITY_BITMAP_INDEX', False),
+        amenity_bitmap_max_age=app.config.get('AMENITY_BITMAP_RELOAD_INTERVAL'))
+    return app.extensions['hbnb_facade']
+
+
 def get_facade():
-    return HBnBFacade()
+    """Retourne la façade partagée par toutes les requêtes de l'app courante"""
+    return current_app.extensions['hbnb_facade']
@@ -21,12 +21,66 @@ class AmenityFacade:
         self.amenity_repo.add(amenity)
         return amenity
 
+    def create_amenities(self, items):
+        """Crée plusieurs amenities en une transaction; un résultat par élément"""
+        results = []
+        new_amenities = []
+        for index, item in enumerate(items):
+            try:
+                amenity = Amenity(name=item.get('name'),
+                                  description=item.get('description', ''))
+            except ValueError as e:
+                results.append({'index': index, 'status': 400, 'error': str(e)})
+                continue
+            new_amenities.append(amenity)
+            results.append({'index': index, 'status': 201})
+
+        if new_amenities:
+            created = [result for result in results if result['status'] == 201]
+            for result, amenity_id in zip(created, self.amenity_repo.add_many(new_amenities)):
+                result['id'] = amenity_id
+        return results
+
+    def update_amenities(self, items):
+        """Met à jour plusieurs amenities (chaque élément porte son 'id')"""
+        amenities = self.amenity_repo.get_many(
+            item.get('id') for item in items if isinstance(item.get('id'), str))
+        results = []
+        updates = {}
+        for index, item in enumerate(items):
+            amenity = amenities.get(item.get('id')) if isinstance(item.get('id'), str) else None
+            name = item.get('name')
+            if not amenity:
+                results.append({'index': index, 'status': 404, 'error': 'Amenity not found'})
+            elif amenity.id in updates:
+                results.append({'index': index, 'status': 400,
+                                'error': 'Amenity listed more than once'})
+            elif not isinstance(name, str) or not name.strip():
+                results.append({'index': index, 'status': 400, 'error':
+                                "Le champ 'name' est requis et ne doit pas être vide."})
+            else:
+                updates[amenity.id] = {'name': name}
+                if 'description' in item:
+                    updates[amenity.id]['description'] = item.get('description') or ''
+                results.append({'index': index, 'status': 200, 'id': amenity.id})
+
+        if updates:
+            self.amenity_repo.update_many(updates)
+        return results
+
     def get_amenity(self, amenity_id):
         return self.amenity_repo.get(amenity_id)
 
+    def recompute_places_counts(self):
+        """Répare places_count de toutes les amenities à partir des liens"""
+        return self.amenity_repo.recompute_places_counts()
+
     def get_all_amenities(self):
         return self.amenity_repo.get_all() or []
 
+    def get_amenities_page(self, after=None, limit=20):
+        return self.amenity_repo.get_page(after=after, limit=limit)
+
     def update_amenity(self, amenity_id, amenity_data):
         amenity = self.amenity_repo.get(amenity_id)
         if not amenity:
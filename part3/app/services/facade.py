@@ -2,11 +2,56 @@ from app.services.userfacade import UserFacade
 from app.services.amenityfacade import AmenityFacade
 from app.services.placefacade import PlaceFacade
 from app.services.reviewfacade import ReviewFacade
+from app.persistence.bitmap_index import AmenityBitmapIndex
+from app.persistence import unit_of_work
 
 
 class HBnBFacade:
-    def __init__(self):
+    """
+    Point d'entrée de la couche métier, construit une seule fois par app
+    (voir init_facade). Les façades et repositories ne gardent aucun état
+    propre à une requête: les accès base passent par db.session, qui est
+    isolée par thread et par contexte d'application.
+    """
+
+    def __init__(self, amenity_bitmap_index=False, amenity_bitmap_max_age=None):
         self.user_facade = UserFacade()
         self.amenity_facade = AmenityFacade()
-        self.place_facade = PlaceFacade(self.user_facade, self.amenity_facade)
+        self.place_facade = PlaceFacade(
+            self.user_facade, self.amenity_facade,
+            amenity_index=(AmenityBitmapIndex(max_age=amenity_bitmap_max_age)
+                           if amenity_bitmap_index else None))
         self.review_facade = ReviewFacade(self.user_facade, self.place_facade)
+
+    # Tables exportables en entier (voir export_rows)
+    EXPORTABLE = ('places', 'reviews', 'users', 'amenities')
+
+    def export_rows(self, resource, after=None, batch_size=1000):
+        """
+        Générateur des lignes d'une table de EXPORTABLE, triées par id, à
+        partir de l'id after (reprise d'un export interrompu).
+        """
+        repositories = {
+            'places': self.place_facade.place_repo,
+            'reviews': self.review_facade.review_repo,
+            'users': self.user_facade.user_repo,
+            'amenities': self.amenity_facade.amenity_repo
+        }
+        if resource not in repositories:
+            raise ValueError(f"Export inconnu: {resource}")
+        return repositories[resource].iter_rows(after=after, batch_size=batch_size)
+
+    @staticmethod
+    def transaction():
+        """
+        Regroupe plusieurs appels de façades en une transaction atomique:
+
+            with facade.transaction():
+                place = facade.place_facade.create_place(...)
+                facade.review_facade.create_review(...)
+
+        Un seul commit en sortie du bloc, rollback complet sur exception.
+        Dans une requête HTTP, le bloc fait partie de la transaction de la
+        requête (voir unit_of_work.init_app).
+        """
+        return unit_of_work.transaction()
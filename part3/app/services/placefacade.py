@@ -1,12 +1,53 @@
+import math
 from app.services.repositories.place_repository import PlaceRepository
 from app.models.place import Place
+from app.persistence.unit_of_work import after_commit, transaction
+
+
+def _is_id_list(value):
+    """Les amenities d'un élément doivent être une liste d'ids (chaînes)"""
+    return isinstance(value, list) and all(isinstance(item, str) for item in value)
 
 
 class PlaceFacade:
-    def __init__(self, user_facade, amenity_facade):
+    # Au-delà, les ids issus du bitmap ne tiennent plus dans une seule liste
+    # IN (...) et le GROUP BY SQL prend le relais
+    BITMAP_MAX_CANDIDATES = PlaceRepository.IN_CHUNK_SIZE
+    # Attributs modifiables par update_place / update_places
+    UPDATABLE_FIELDS = ('title', 'description', 'price', 'latitude', 'longitude')
+
+    def __init__(self, user_facade, amenity_facade, amenity_index=None):
         self.place_repo = PlaceRepository()
         self.user_facade = user_facade
         self.amenity_facade = amenity_facade
+        # Index bitmap optionnel amenity -> lieux (AmenityBitmapIndex)
+        self.amenity_index = amenity_index
+
+    def _loaded_amenity_index(self):
+        """
+        Retourne l'index bitmap, chargé depuis la base au premier usage puis
+        rechargé quand il est plus ancien que son max_age
+        """
+        if self.amenity_index is not None and self.amenity_index.needs_load():
+            self.amenity_index.load(self.place_repo.get_amenity_links())
+        return self.amenity_index
+
+    def _sync_amenity_index(self, place_id, amenity_ids):
+        # L'index ne reflète que des écritures commitées
+        if self.amenity_index is not None and self.amenity_index.loaded:
+            after_commit(lambda: self.amenity_index.set_place_amenities(
+                place_id, amenity_ids))
+
+    def _refresh_amenity_counts(self, amenity_ids):
+        # Compteurs dénormalisés Amenity.places_count, dans la transaction des liens
+        self.amenity_facade.amenity_repo.refresh_places_counts(amenity_ids)
+
+    def _unindex_places(self, place_ids):
+        if self.amenity_index is not None and self.amenity_index.loaded:
+            def remove():
+                for place_id in place_ids:
+                    self.amenity_index.remove_place(place_id)
+            after_commit(remove)
 
     def create_place(self, place_data):
         """Crée un lieu et retourne l'objet du lieu créé"""
@@ -31,16 +72,156 @@ class PlaceFacade:
             owner_id=owner_id
         )
 
-        # Ajouter les amenities
-        for amenity_id in amenities_ids:
-            amenity = self.amenity_facade.get_amenity(amenity_id)
-            if amenity:
-                new_place.add_amenity(amenity)
+        amenities = [amenity for amenity in map(self.amenity_facade.get_amenity, amenities_ids)
+                     if amenity]
 
-        # Enregistrer le lieu
-        self.place_repo.add(new_place)
+        # Enregistrer le lieu avec les compteurs de ses amenities; il est dans
+        # la session avant d'être ajouté aux collections amenity.places
+        with transaction():
+            self.place_repo.add(new_place)
+            added_ids = []
+            for amenity in amenities:
+                new_place.add_amenity(amenity)
+                added_ids.append(amenity.id)
+            self._refresh_amenity_counts(added_ids)
+        self._sync_amenity_index(new_place.id, added_ids)
         return new_place
 
+    def _known_amenity_ids(self, items):
+        """Ids des amenities existantes citées par les éléments, en une requête"""
+        requested = [amenity_id for item in items
+                     if _is_id_list(item.get('amenities'))
+                     for amenity_id in item['amenities']]
+        return self.amenity_facade.amenity_repo.get_many(requested)
+
+    def create_places(self, items, owner_id):
+        """
+        Crée plusieurs lieux en une seule transaction.
+
+        Chaque élément est validé comme dans create_place; les éléments
+        invalides sont signalés sans bloquer les autres. Retourne un
+        résultat par élément: {'index', 'status', 'id' ou 'error'}.
+        """
+        owner = self.user_facade.get_user(owner_id)
+        amenities = self._known_amenity_ids(items)
+        results = []
+        new_places = []
+        created = []
+        for index, item in enumerate(items):
+            if not owner:
+                results.append({'index': index, 'status': 404, 'error': 'Owner not found'})
+                continue
+            try:
+                if not item.get('price') or item['price'] <= 0:
+                    raise ValueError("Le prix doit être positif")
+                if 'amenities' in item and not _is_id_list(item['amenities']):
+                    raise ValueError("amenities doit être une liste d'ids")
+                place = Place(
+                    title=item.get('title'),
+                    description=item.get('description', ''),
+                    price=item['price'],
+                    latitude=item.get('latitude'),
+                    longitude=item.get('longitude'),
+                    owner_id=owner_id
+                )
+            except TypeError:
+                results.append({'index': index, 'status': 400,
+                                'error': 'Invalid place data'})
+                continue
+            except ValueError as e:
+                results.append({'index': index, 'status': 400, 'error': str(e)})
+                continue
+
+            # Comme create_place, les amenities inconnues sont ignorées
+            amenity_ids = [amenity_id for amenity_id in dict.fromkeys(item.get('amenities', []))
+                           if amenity_id in amenities]
+            new_places.append(place)
+            created.append((index, amenity_ids))
+            results.append({'index': index, 'status': 201})
+
+        if new_places:
+            with transaction():
+                place_ids = self.place_repo.add_many(new_places)
+                # Liens insérés une fois les lieux enregistrés, sans passer par
+                # les collections de l'ORM
+                self.place_repo.add_amenity_links({
+                    place_id: amenity_ids
+                    for place_id, (_, amenity_ids) in zip(place_ids, created)})
+                self._refresh_amenity_counts(
+                    {amenity_id for _, amenity_ids in created for amenity_id in amenity_ids})
+            for (index, amenity_ids), place_id in zip(created, place_ids):
+                results[index]['id'] = place_id
+                self._sync_amenity_index(place_id, amenity_ids)
+        return results
+
+    def update_places(self, items, user_id, is_admin=False):
+        """
+        Met à jour plusieurs lieux (chaque élément porte son 'id') en une
+        transaction. Seuls le propriétaire ou un admin peuvent modifier un
+        lieu. Retourne un résultat par élément.
+        """
+        places = self.place_repo.get_many(
+            item.get('id') for item in items if isinstance(item.get('id'), str))
+        amenities = self._known_amenity_ids(items)
+        results = []
+        updates = {}
+        links = {}
+        for index, item in enumerate(items):
+            place = places.get(item.get('id')) if isinstance(item.get('id'), str) else None
+            if not place:
+                results.append({'index': index, 'status': 404, 'error': 'Place not found'})
+            elif not is_admin and place.owner_id != user_id:
+                results.append({'index': index, 'status': 403, 'error': 'Unauthorized action'})
+            elif place.id in updates:
+                results.append({'index': index, 'status': 400,
+                                'error': 'Place listed more than once'})
+            else:
+                values = {key: item[key] for key in self.UPDATABLE_FIELDS if key in item}
+                try:
+                    # Mêmes règles qu'à la création du lieu
+                    Place.validate_fields(values)
+                    if 'price' in values and values['price'] <= 0:
+                        raise ValueError("Le prix doit être positif")
+                    if 'amenities' in item and not _is_id_list(item['amenities']):
+                        raise ValueError("amenities doit être une liste d'ids")
+                except ValueError as e:
+                    results.append({'index': index, 'status': 400, 'error': str(e)})
+                    continue
+                updates[place.id] = values
+                if 'amenities' in item:
+                    links[place.id] = [amenity_id for amenity_id
+                                       in dict.fromkeys(item['amenities'])
+                                       if amenity_id in amenities]
+                results.append({'index': index, 'status': 200, 'id': place.id})
+
+        if updates:
+            # Les liens et les attributs sont commités ensemble
+            with transaction():
+                previous = self.place_repo.get_amenity_ids(links)
+                self.place_repo.replace_amenity_links(links)
+                self.place_repo.update_many(updates)
+                self._refresh_amenity_counts(
+                    previous | {amenity_id for ids in links.values() for amenity_id in ids})
+        for place_id, amenity_ids in links.items():
+            self._sync_amenity_index(place_id, amenity_ids)
+        return results
+
+    def delete_places(self, place_ids, is_admin=False):
+        """Supprime plusieurs lieux (admins uniquement) en une transaction"""
+        if not is_admin:
+            return [{'index': index, 'status': 403,
+                     'error': 'Unauthorized action, admins only'}
+                    for index in range(len(place_ids))]
+        with transaction():
+            amenity_ids = self.place_repo.get_amenity_ids(place_ids)
+            deleted = set(self.place_repo.delete_many(place_ids))
+            self._refresh_amenity_counts(amenity_ids)
+        self._unindex_places(deleted)
+        return [{'index': index, 'status': 200, 'id': place_id}
+                if place_id in deleted else
+                {'index': index, 'status': 404, 'error': 'Place not found'}
+                for index, place_id in enumerate(place_ids)]
+
     def get_place(self, place_id, load_reviews=True):
         """
         Récupère un lieu par son ID
@@ -54,18 +235,68 @@ class PlaceFacade:
         # les reviews et amenities, ils seront chargés automatiquement lors de l'accès
         return place
 
+    def get_place_versions(self, places, include=None):
+        """
+        Version de chaque lieu, pour l'ETag: (id, updated_at) et dernière
+        modification / nombre de ses reviews et de ses amenities, sauf si
+        aucune relation n'est incluse dans la réponse (include vide).
+        """
+        places = list(places)
+        if include is not None and not include:
+            return [(place.id, place.updated_at) for place in places]
+        versions = self.place_repo.get_content_versions([place.id for place in places])
+        return [(place.id, place.updated_at, *versions[place.id]) for place in places]
+
     def get_all_places(self):
         places = self.place_repo.get_all()
         return places
 
+    # Valeurs acceptées pour le paramètre sort (préfixe '-' = décroissant)
+    SORT_FIELDS = {
+        'price': 'price',
+        'rating': 'rating_score',
+        'created_at': 'created_at'
+    }
+
+    def get_places_page(self, after=None, limit=20, min_price=None,
+                        max_price=None, amenity_ids=None,
+                        match_all_amenities=True, sort='created_at'):
+        """Récupère une page de lieux et le curseur de la page suivante"""
+        descending = sort.startswith('-')
+        field = self.SORT_FIELDS.get(sort.lstrip('-'))
+        if field is None:
+            raise ValueError(
+                "Le tri doit être l'un de: price, rating, created_at "
+                "(préfixe '-' pour un tri décroissant)")
+
+        # Avec l'index bitmap, la sélection par amenities se fait en mémoire
+        place_ids = None
+        index = self._loaded_amenity_index() if amenity_ids else None
+        if index is not None:
+            candidates = index.query(amenity_ids, match_all=match_all_amenities)
+            if len(candidates) <= self.BITMAP_MAX_CANDIDATES:
+                place_ids = candidates
+
+        return self.place_repo.get_filtered_page(
+            min_price=min_price, max_price=max_price, amenity_ids=amenity_ids,
+            match_all_amenities=match_all_amenities, place_ids=place_ids,
+            sort=field, descending=descending, after=after, limit=limit)
+
     def update_place(self, place_id, place_data):
         place = self.get_place(place_id, load_reviews=False)
         if not place:
             return {"error": "Place not found"}, 404
 
-        # Vérifier le prix uniquement s'il est fourni
-        if 'price' in place_data and place_data.get('price', 0) <= 0:
+        # Vérifier les attributs fournis, avec les règles de la création
+        try:
+            Place.validate_fields({key: place_data[key] for key in self.UPDATABLE_FIELDS
+                                   if key in place_data})
+        except ValueError as e:
+            return {"error": str(e)}, 400
+        if 'price' in place_data and place_data['price'] <= 0:
             return {"error": "Le prix doit être positif"}, 400
+        if 'amenities' in place_data and not _is_id_list(place_data['amenities']):
+            return {"error": "amenities doit être une liste d'ids"}, 400
 
         # Mettre à jour les attributs de base
         if 'title' in place_data:
@@ -80,26 +311,63 @@ class PlaceFacade:
             place.longitude = place_data['longitude']
 
         # Gestion des amenities si présentes
-        if 'amenities' in place_data:
-            # Réinitialiser les amenities
-            place.amenities = []
+        added_ids = None
+        with transaction():
+            if 'amenities' in place_data:
+                previous_ids = self.place_repo.get_amenity_ids([place.id])
+                # Réinitialiser les amenities
+                place.amenities = []
+                added_ids = []
 
-            for amenity_id in place_data['amenities']:
-                amenity = self.amenity_facade.get_amenity(amenity_id)
-                if amenity:
-                    place.add_amenity(amenity)
+                for amenity_id in place_data['amenities']:
+                    amenity = self.amenity_facade.get_amenity(amenity_id)
+                    if amenity:
+                        place.add_amenity(amenity)
+                        added_ids.append(amenity.id)
+                self._refresh_amenity_counts(previous_ids | set(added_ids))
 
-        # Sauvegarder les modifications
-        place.save()
+            # Sauvegarder les modifications
+            place.save()
+        if added_ids is not None:
+            self._sync_amenity_index(place.id, added_ids)
         return place
 
     def delete_place(self, place_id):
         place = self.get_place(place_id, load_reviews=False)
         if not place:
             return {"error": "Place not found"}, 404
-        self.place_repo.delete(place_id)
+        with transaction():
+            amenity_ids = self.place_repo.get_amenity_ids([place_id])
+            self.place_repo.delete(place_id)
+            self._refresh_amenity_counts(amenity_ids)
+        self._unindex_places([place_id])
         return {"message": "Place successfully deleted"}, 200
 
+    def get_places_nearby(self, latitude, longitude, radius_km, limit=20):
+        """Retourne les lieux proches sous forme de tuples (distance_km, place)"""
+        if not (-90.0 <= latitude <= 90.0):
+            raise ValueError("La latitude doit être entre -90 et 90.")
+        if not (-180.0 <= longitude <= 180.0):
+            raise ValueError("La longitude doit être entre -180 et 180.")
+        # nan et inf échappent aux comparaisons (nan <= 0 est faux)
+        if not math.isfinite(radius_km) or radius_km <= 0:
+            raise ValueError("Le rayon doit être un nombre positif")
+        return self.place_repo.get_nearby(latitude, longitude, radius_km, limit)
+
+    def search_places(self, query_text, after=None, limit=20):
+        """Recherche plein texte sur le titre et la description des lieux"""
+        return self.place_repo.search(query_text, after=after, limit=limit)
+
+    def rebuild_search_index(self):
+        return self.place_repo.rebuild_search_index()
+
+    def backfill_geohash(self):
+        return self.place_repo.backfill_geohash()
+
+    def recompute_rating_aggregates(self):
+        """Répare les agrégats de notes de tous les lieux à partir des reviews"""
+        return self.place_repo.recompute_rating_aggregates()
+
     def get_places_by_user(self, user_id):
         """Récupère tous les lieux appartenant à un utilisateur donné"""
         user = self.user_facade.get_user(user_id)
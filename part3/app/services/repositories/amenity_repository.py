@@ -1,7 +1,35 @@
+from sqlalchemy import func, select, update
+from app.extensions import db
 from app.models.amenity import Amenity
+from app.models.place_amenity import place_amenity
 from app.persistence.repository import SQLAlchemyRepository
+from app.persistence.unit_of_work import commit
 
 
 class AmenityRepository(SQLAlchemyRepository):
     def __init__(self):
         super().__init__(Amenity)
+
+    @staticmethod
+    def _places_count_query():
+        return select(func.count()).where(
+            place_amenity.c.amenity_id == Amenity.id).scalar_subquery()
+
+    def refresh_places_counts(self, amenity_ids):
+        """
+        Recalcule places_count des amenities données à partir de
+        place_amenity, après un changement de leurs liens. Non commité: le
+        compteur est enregistré avec les liens, dans la même transaction.
+        """
+        if not amenity_ids:
+            return
+        for amenity in self.get_many(amenity_ids).values():
+            # Sous-requête SQL évaluée au flush, sur les liens déjà écrits
+            amenity.places_count = self._places_count_query()
+
+    def recompute_places_counts(self):
+        """Recalcule places_count de toutes les amenities en une requête"""
+        result = db.session.execute(
+            update(Amenity).values(places_count=self._places_count_query()))
+        commit()
+        return result.rowcount
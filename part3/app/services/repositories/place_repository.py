@@ -1,7 +1,238 @@
+from sqlalchemy import delete, func, insert, or_, select, text, update
+from app.extensions import db
+from app.geo import bounding_box, covering_cells, encode_geohash, haversine_km
+from app.models.amenity import Amenity
 from app.models.place import Place
-from app.persistence.repository import SQLAlchemyRepository
+from app.models.review import Review
+from app.models.place_amenity import place_amenity
+from app.persistence.repository import (SQLAlchemyRepository, chunked,
+                                        decode_cursor, encode_position)
+from app.persistence.unit_of_work import commit
+from app.persistence.fts import (PLACES_FTS_CREATE, PLACES_FTS_DROP,
+                                 PLACES_FTS_POPULATE, SNIPPET_END, SNIPPET_START,
+                                 build_match_query, highlight_snippet)
 
 
 class PlaceRepository(SQLAlchemyRepository):
     def __init__(self):
         super().__init__(Place)
+
+    def get_filtered_page(self, min_price=None, max_price=None,
+                          amenity_ids=None, match_all_amenities=True,
+                          place_ids=None, sort='created_at', descending=False,
+                          after=None, limit=20):
+        """
+        Page de lieux filtrés par prix et par amenities puis triés, filtres
+        et tri exécutés en SQL. place_ids restreint la page à des lieux déjà
+        sélectionnés (par exemple par l'index bitmap des amenities).
+        """
+        query = self.model.query
+        if min_price is not None:
+            query = query.filter(Place.price >= min_price)
+        if max_price is not None:
+            query = query.filter(Place.price <= max_price)
+        if place_ids is not None:
+            query = query.filter(Place.id.in_(place_ids))
+        elif amenity_ids:
+            amenity_ids = set(amenity_ids)
+            matching = select(place_amenity.c.place_id).where(
+                place_amenity.c.amenity_id.in_(amenity_ids))
+            if match_all_amenities:
+                # Le lieu doit posséder chacune des n amenities demandées
+                matching = matching.group_by(place_amenity.c.place_id).having(
+                    func.count(place_amenity.c.amenity_id) == len(amenity_ids))
+            query = query.filter(Place.id.in_(matching))
+        return self.get_page(after=after, limit=limit, query=query,
+                             sort=sort, descending=descending)
+
+    # Rang BM25 (titre 10 fois plus important que la description) et extraits
+    # délimités par les marqueurs SNIPPET_START/SNIPPET_END
+    SEARCH_SQL = text("""
+        SELECT place_id, score, title_snippet, description_snippet FROM (
+            SELECT place_id,
+                   bm25(places_fts, 0.0, 10.0, 1.0) AS score,
+                   snippet(places_fts, 1, :start, :end, '…', 8) AS title_snippet,
+                   snippet(places_fts, 2, :start, :end, '…', 16) AS description_snippet
+            FROM places_fts WHERE places_fts MATCH :query
+        )
+        WHERE :after_id IS NULL OR score > :after_score
+              OR (score = :after_score AND place_id > :after_id)
+        ORDER BY score, place_id
+        LIMIT :limit
+    """)
+
+    def search(self, query_text, after=None, limit=20):
+        """
+        Recherche plein texte classée par BM25 (meilleurs résultats d'abord).
+
+        Retourne (résultats, next_cursor) où chaque résultat est un tuple
+        (place, score, extraits) et les extraits, en HTML échappé, surlignent
+        les termes trouvés avec <mark>.
+        """
+        if db.engine.dialect.name != 'sqlite':
+            raise ValueError("La recherche plein texte nécessite SQLite FTS5")
+        match = build_match_query(query_text)
+        if match is None:
+            return [], None
+
+        after_score, after_id = decode_cursor(after, 'search') if after else (None, None)
+        rows = db.session.execute(self.SEARCH_SQL, {
+            'query': match, 'start': SNIPPET_START, 'end': SNIPPET_END,
+            'after_score': after_score,
+            'after_id': after_id, 'limit': limit + 1
+        }).all()
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_position('search', rows[-1].score, rows[-1].place_id)
+
+        places = {place.id: place for place in self.model.query.filter(
+            Place.id.in_([row.place_id for row in rows]))}
+        results = [
+            (places[row.place_id], row.score,
+             {'title': highlight_snippet(row.title_snippet),
+              'description': highlight_snippet(row.description_snippet)})
+            for row in rows if row.place_id in places
+        ]
+        return results, next_cursor
+
+    def rebuild_search_index(self):
+        """Recrée la table FTS et ses triggers puis la remplit depuis places"""
+        for statement in PLACES_FTS_DROP + PLACES_FTS_CREATE:
+            db.session.execute(text(statement))
+        db.session.execute(text(PLACES_FTS_POPULATE))
+        commit()
+        return self.model.query.count()
+
+    def delete_many(self, obj_ids):
+        """
+        Supprime des lieux avec leurs reviews et leurs liens vers les
+        amenities en requêtes ensemblistes (DELETE ... WHERE IN), au lieu de
+        charger les collections de chaque lieu pour la cascade de l'ORM.
+        """
+        deleted = []
+        for chunk in chunked(set(obj_ids), self.IN_CHUNK_SIZE):
+            found = db.session.scalars(
+                select(Place.id).where(Place.id.in_(chunk))).all()
+            if not found:
+                continue
+            db.session.execute(delete(Review).where(Review.place_id.in_(found)))
+            db.session.execute(place_amenity.delete().where(
+                place_amenity.c.place_id.in_(found)))
+            db.session.execute(delete(Place).where(Place.id.in_(found)))
+            deleted.extend(found)
+        commit()
+        return deleted
+
+    def replace_amenity_links(self, amenities_by_place):
+        """
+        Remplace les amenities de plusieurs lieux ({place_id: [amenity_id]})
+        par un DELETE et un INSERT executemany. Non commité: les liens sont
+        enregistrés avec la transaction en cours.
+        """
+        for chunk in chunked(amenities_by_place, self.IN_CHUNK_SIZE):
+            db.session.execute(place_amenity.delete().where(
+                place_amenity.c.place_id.in_(chunk)))
+        self.add_amenity_links(amenities_by_place)
+
+    def add_amenity_links(self, amenities_by_place):
+        """
+        Ajoute les liens {place_id: [amenity_id]} en un INSERT executemany,
+        non commité.
+        """
+        rows = [{'place_id': place_id, 'amenity_id': amenity_id}
+                for place_id, amenity_ids in amenities_by_place.items()
+                for amenity_id in amenity_ids]
+        if rows:
+            db.session.execute(insert(place_amenity), rows)
+
+    def get_content_versions(self, place_ids):
+        """
+        Dernière modification et nombre des reviews et des amenities de
+        chaque lieu, en deux requêtes groupées: {place_id: (reviews_updated_at,
+        review_count, amenities_updated_at, amenity_count)}. Sert à calculer
+        l'ETag d'un lieu sans charger ses reviews.
+        """
+        reviews, amenities = {}, {}
+        for chunk in chunked(set(place_ids), self.IN_CHUNK_SIZE):
+            reviews.update((row[0], row[1:]) for row in db.session.execute(
+                select(Review.place_id, func.max(Review.updated_at), func.count(Review.id))
+                .where(Review.place_id.in_(chunk)).group_by(Review.place_id)))
+            amenities.update((row[0], row[1:]) for row in db.session.execute(
+                select(place_amenity.c.place_id, func.max(Amenity.updated_at),
+                       func.count(Amenity.id))
+                .join(Amenity, Amenity.id == place_amenity.c.amenity_id)
+                .where(place_amenity.c.place_id.in_(chunk))
+                .group_by(place_amenity.c.place_id)))
+        return {place_id: (*reviews.get(place_id, (None, 0)),
+                           *amenities.get(place_id, (None, 0)))
+                for place_id in place_ids}
+
+    def get_amenity_ids(self, place_ids):
+        """Ids des amenities liées à au moins un des lieux donnés"""
+        amenity_ids = set()
+        for chunk in chunked(set(place_ids), self.IN_CHUNK_SIZE):
+            amenity_ids.update(db.session.scalars(
+                select(place_amenity.c.amenity_id).distinct()
+                .where(place_amenity.c.place_id.in_(chunk))))
+        return amenity_ids
+
+    def get_amenity_links(self):
+        """Toutes les associations (place_id, amenity_id)"""
+        return db.session.execute(
+            select(place_amenity.c.place_id, place_amenity.c.amenity_id)).all()
+
+    def recompute_rating_aggregates(self):
+        """Recalcule review_count et rating_sum de tous les lieux en une requête"""
+        review_count = select(func.count(Review.id)).where(
+            Review.place_id == Place.id).scalar_subquery()
+        rating_sum = select(func.coalesce(func.sum(Review.rating), 0)).where(
+            Review.place_id == Place.id).scalar_subquery()
+        result = db.session.execute(
+            update(Place).values(review_count=review_count, rating_sum=rating_sum))
+        commit()
+        return result.rowcount
+
+    def get_nearby(self, latitude, longitude, radius_km, limit):
+        """
+        Lieux à moins de radius_km, triés par distance croissante.
+
+        Préfiltre sur l'index geohash (cellules couvrant le rayon) et sur la
+        boîte englobante, puis distance haversine exacte sur les candidats.
+        Retourne une liste de tuples (distance_km, place).
+        """
+        min_lat, max_lat, min_lng, max_lng = bounding_box(
+            latitude, longitude, radius_km)
+        query = self.model.query.filter(
+            Place.latitude.between(min_lat, max_lat))
+        if min_lng <= max_lng:
+            query = query.filter(Place.longitude.between(min_lng, max_lng))
+        else:
+            # La boîte traverse l'antiméridien
+            query = query.filter(or_(Place.longitude >= min_lng,
+                                     Place.longitude <= max_lng))
+
+        cells = covering_cells(latitude, longitude, radius_km)
+        if cells:
+            # Un préfixe geohash est un intervalle de l'index B-tree
+            query = query.filter(or_(*[
+                Place.geohash.between(cell, cell + '~') for cell in cells
+            ]))
+
+        results = []
+        for place in query:
+            distance = haversine_km(
+                latitude, longitude, place.latitude, place.longitude)
+            if distance <= radius_km:
+                results.append((distance, place))
+        results.sort(key=lambda item: (item[0], item[1].id))
+        return results[:limit]
+
+    def backfill_geohash(self):
+        """Calcule la cellule geohash des lieux qui n'en ont pas encore"""
+        places = self.model.query.filter(Place.geohash.is_(None)).all()
+        for place in places:
+            place.geohash = encode_geohash(place.latitude, place.longitude)
+        commit()
+        return len(places)
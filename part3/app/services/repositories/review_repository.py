@@ -1,7 +1,22 @@
+from sqlalchemy import exists, select
+from app.extensions import db
 from app.models.review import Review
-from app.persistence.repository import SQLAlchemyRepository
+from app.persistence.repository import SQLAlchemyRepository, chunked
 
 
 class ReviewRepository(SQLAlchemyRepository):
     def __init__(self):
         super().__init__(Review)
+
+    def exists_for_user_and_place(self, user_id, place_id):
+        """Requête EXISTS servie par l'index unique (place_id, user_id)"""
+        return db.session.query(exists().where(
+            Review.place_id == place_id, Review.user_id == user_id)).scalar()
+
+    def get_reviewed_place_ids(self, user_id, place_ids):
+        """Parmi place_ids, ceux que l'utilisateur a déjà notés"""
+        reviewed = set()
+        for chunk in chunked(set(place_ids), self.IN_CHUNK_SIZE):
+            reviewed.update(db.session.scalars(select(Review.place_id).where(
+                Review.user_id == user_id, Review.place_id.in_(chunk))))
+        return reviewed
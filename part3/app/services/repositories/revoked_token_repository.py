@@ -0,0 +1,39 @@
+from sqlalchemy import delete, or_, select
+from app.extensions import db
+from app.models.revoked_token import RevokedToken
+from app.persistence.repository import SQLAlchemyRepository
+from app.persistence.unit_of_work import commit
+
+
+class RevokedTokenRepository(SQLAlchemyRepository):
+    def __init__(self):
+        super().__init__(RevokedToken)
+
+    @staticmethod
+    def _read_primary(statement):
+        # Toujours sur la base principale, même avec des réplicas: une
+        # révocation doit compter dès son commit, pas après la réplication
+        return db.session.execute(statement, bind_arguments={'bind': db.engine})
+
+    def is_revoked(self, jti):
+        return self._read_primary(
+            select(RevokedToken.id).where(RevokedToken.jti == jti).limit(1)
+        ).first() is not None
+
+    def get_active(self, now, since=None):
+        """
+        (jti, date de révocation) des tokens révoqués non expirés, limités à
+        ceux révoqués depuis since s'il est donné
+        """
+        query = select(RevokedToken.jti, RevokedToken.created_at).where(or_(
+            RevokedToken.expires_at.is_(None), RevokedToken.expires_at > now))
+        if since is not None:
+            query = query.where(RevokedToken.created_at >= since)
+        return self._read_primary(query).all()
+
+    def purge_expired(self, now):
+        """Supprime les révocations de tokens expirés, en une requête"""
+        result = db.session.execute(
+            delete(RevokedToken).where(RevokedToken.expires_at <= now))
+        commit()
+        return result.rowcount
@@ -1,11 +1,22 @@
 # app/services/repositories/user_repository.py
+from sqlalchemy import func, select
+from app.extensions import db
 from app.models.user import User
 from app.persistence.repository import SQLAlchemyRepository
 
 
 class UserRepository(SQLAlchemyRepository):
+    EXPORT_EXCLUDED_COLUMNS = ('password', 'password_algorithm', 'password_cost')
+
     def __init__(self):
         super().__init__(User)
 
     def get_user_by_email(self, email):
         return self.model.query.filter_by(email=email).first()
+
+    def count_by_password_policy(self):
+        """Nombre d'utilisateurs par (algorithme, coût) du hachage stocké"""
+        return [tuple(row) for row in db.session.execute(
+            select(User.password_algorithm, User.password_cost, func.count(User.id))
+            .group_by(User.password_algorithm, User.password_cost)
+            .order_by(User.password_algorithm, User.password_cost))]
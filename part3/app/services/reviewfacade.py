@@ -1,3 +1,5 @@
+from sqlalchemy.exc import IntegrityError
+from app.persistence.unit_of_work import transaction
 from app.services.repositories.review_repository import ReviewRepository
 from app.models.review import Review
 
@@ -20,16 +22,157 @@ class ReviewFacade:
         if not rating or rating < 1 or rating > 5:
             return None
 
-        # Créer la review avec les objets complets
+        # Ids seulement: rattachée aux collections place.reviews et
+        # user.reviews avant d'être dans la session, la review ferait
+        # échouer le flush du savepoint (SAWarning)
         review = Review(
             text=review_data['text'],
             rating=review_data['rating'],
-            place=place,
-            user=user
+            place=place.id,
+            user=user.id
         )
-        self.review_repo.add(review)
+        # Les agrégats du lieu sont commités (ou annulés) avec la review
+        try:
+            with transaction(savepoint=True):
+                place.adjust_rating_aggregates(1, review.rating)
+                self.review_repo.add(review)
+        except IntegrityError:
+            # Insertion concurrente bloquée par l'index unique (place_id, user_id)
+            raise ValueError("You have already reviewed this place")
         return review
 
+    def user_has_reviewed_place(self, user_id, place_id):
+        """Vérifie en une requête EXISTS si l'utilisateur a déjà noté ce lieu"""
+        return self.review_repo.exists_for_user_and_place(user_id, place_id)
+
+    def _apply_rating_deltas(self, deltas):
+        """Applique {place_id: (delta_count, delta_rating)} aux agrégats des lieux"""
+        places = self.place_facade.place_repo.get_many(deltas)
+        for place_id, (count_delta, rating_delta) in deltas.items():
+            if place_id in places and (count_delta or rating_delta):
+                places[place_id].adjust_rating_aggregates(count_delta, rating_delta)
+
+    def create_reviews(self, items, user_id):
+        """
+        Crée plusieurs reviews de l'utilisateur en une transaction, avec les
+        mêmes règles que l'endpoint unitaire (lieu existant, pas son propre
+        lieu, une seule review par lieu). Retourne un résultat par élément.
+        """
+        place_ids = [item.get('place_id') for item in items
+                     if isinstance(item.get('place_id'), str)]
+        places = self.place_facade.place_repo.get_many(place_ids)
+        reviewed = self.review_repo.get_reviewed_place_ids(user_id, place_ids)
+        results = []
+        new_reviews = []
+        deltas = {}
+        for index, item in enumerate(items):
+            place_id = item.get('place_id')
+            place = places.get(place_id) if isinstance(place_id, str) else None
+            if not place:
+                results.append({'index': index, 'status': 404, 'error': 'Place not found'})
+                continue
+            if place.owner_id == user_id:
+                results.append({'index': index, 'status': 400,
+                                'error': 'You cannot review your own place'})
+                continue
+            if place.id in reviewed:
+                results.append({'index': index, 'status': 400,
+                                'error': 'You have already reviewed this place'})
+                continue
+            try:
+                # Ids seulement: une review invalide n'est pas rattachée au lieu
+                review = Review(text=item.get('text'), rating=item.get('rating'),
+                                place=place.id, user=user_id)
+            except TypeError:
+                results.append({'index': index, 'status': 400,
+                                'error': 'Invalid review data'})
+                continue
+            except ValueError as e:
+                results.append({'index': index, 'status': 400, 'error': str(e)})
+                continue
+
+            reviewed.add(place.id)
+            count, total = deltas.get(place.id, (0, 0))
+            deltas[place.id] = (count + 1, total + review.rating)
+            new_reviews.append(review)
+            results.append({'index': index, 'status': 201})
+
+        if new_reviews:
+            created = [result for result in results if result['status'] == 201]
+            try:
+                with transaction(savepoint=True):
+                    self._apply_rating_deltas(deltas)
+                    review_ids = self.review_repo.add_many(new_reviews)
+            except IntegrityError:
+                # Review concurrente: tout le lot a été annulé
+                for result in created:
+                    result.update(status=409, error='You have already reviewed '
+                                  'this place (batch rolled back)')
+            else:
+                for result, review_id in zip(created, review_ids):
+                    result['id'] = review_id
+        return results
+
+    def _owned_reviews(self, review_ids, user_id, is_admin):
+        """Charge les reviews et sépare celles que l'utilisateur peut modifier"""
+        reviews = self.review_repo.get_many(
+            review_id for review_id in review_ids if isinstance(review_id, str))
+        allowed, results = {}, []
+        for index, review_id in enumerate(review_ids):
+            review = reviews.get(review_id) if isinstance(review_id, str) else None
+            if not review:
+                results.append({'index': index, 'status': 404, 'error': 'Review not found'})
+            elif review.user_id != user_id and not is_admin:
+                results.append({'index': index, 'status': 403,
+                                'error': 'You can only modify your own review or be an admin'})
+            else:
+                allowed[index] = review
+                results.append({'index': index, 'status': 200, 'id': review.id})
+        return allowed, results
+
+    def update_reviews(self, items, user_id, is_admin=False):
+        """Met à jour le texte et la note de plusieurs reviews en une transaction"""
+        allowed, results = self._owned_reviews(
+            [item.get('id') for item in items], user_id, is_admin)
+        updates = {}
+        deltas = {}
+        for index, review in allowed.items():
+            text, rating = items[index].get('text'), items[index].get('rating')
+            error = None
+            if review.id in updates:
+                error = 'Review listed more than once'
+            elif not isinstance(text, str) or not text.strip():
+                error = 'Review text cannot be empty'
+            elif not isinstance(rating, int) or not (1 <= rating <= 5):
+                error = 'Rating must be between 1 and 5'
+            if error:
+                results[index] = {'index': index, 'status': 400, 'error': error}
+                continue
+            updates[review.id] = {'text': text, 'rating': rating}
+            count, total = deltas.get(review.place_id, (0, 0))
+            deltas[review.place_id] = (count, total + rating - review.rating)
+
+        if updates:
+            with transaction():
+                self._apply_rating_deltas(deltas)
+                self.review_repo.update_many(updates)
+        return results
+
+    def delete_reviews(self, review_ids, user_id, is_admin=False):
+        """Supprime plusieurs reviews en une transaction"""
+        allowed, results = self._owned_reviews(review_ids, user_id, is_admin)
+        reviews = {review.id: review for review in allowed.values()}
+        deltas = {}
+        for review in reviews.values():
+            count, total = deltas.get(review.place_id, (0, 0))
+            deltas[review.place_id] = (count - 1, total - review.rating)
+
+        if reviews:
+            with transaction():
+                self._apply_rating_deltas(deltas)
+                self.review_repo.delete_many(reviews)
+        return results
+
     def get_review(self, review_id):
         return self.review_repo.get(review_id)
 
@@ -62,6 +205,9 @@ class ReviewFacade:
     def get_all_reviews(self):
         return self.review_repo.get_all()
 
+    def get_reviews_page(self, after=None, limit=20):
+        return self.review_repo.get_page(after=after, limit=limit)
+
     def update_review(self, review_id, review_data):
         review = self.review_repo.get(review_id)
         if not review:
@@ -69,12 +215,21 @@ class ReviewFacade:
 
         # Mettre à jour uniquement le texte et la note
         if 'text' in review_data and 'rating' in review_data:
-            review.update_review(review_data['text'], review_data['rating'])
+            # Savepoint: une review invalide annule aussi l'ajustement des agrégats
+            with transaction(savepoint=True):
+                rating_delta = review_data['rating'] - review.rating
+                if rating_delta:
+                    review.place.adjust_rating_aggregates(0, rating_delta)
+                review.update_review(
+                    review_data['text'], review_data['rating'])
 
         return review
 
     def delete_review(self, review_id):
-        if not self.review_repo.get(review_id):
+        review = self.review_repo.get(review_id)
+        if not review:
             return None
-        self.review_repo.delete(review_id)
+        with transaction():
+            review.place.adjust_rating_aggregates(-1, -review.rating)
+            self.review_repo.delete(review_id)
         return {"message": "Review successfully deleted"}, 200
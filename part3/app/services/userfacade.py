@@ -1,16 +1,23 @@
 
+from datetime import datetime
 from app.services.repositories.user_repository import UserRepository
+from app.services.repositories.revoked_token_repository import RevokedTokenRepository
+from app.models.revoked_token import RevokedToken
 from app.models.user import User
+from app import principals, revocation
+from app.persistence.unit_of_work import after_commit
 
 
 class UserFacade:
     def __init__(self):
         self.user_repo = UserRepository()
+        self.revoked_token_repo = RevokedTokenRepository()
 
     def initialize_admin(self):
+        """Crée l'admin par défaut s'il n'existe pas; True s'il a été créé"""
         admin_email = "admin@example.com"
         if self.get_user_by_email(admin_email):
-            return
+            return False
 
         admin_user = User(
             first_name="Admin",
@@ -20,12 +27,47 @@ class UserFacade:
             is_admin=True
         )
         self.user_repo.add(admin_user)
+        return True
 
     def create_user(self, user_data):
         user = User(**user_data)
         self.user_repo.add(user)
         return user
 
+    def authenticate(self, email, password):
+        """
+        Retourne l'utilisateur si le mot de passe est correct, None sinon.
+        Un hachage qui ne suit plus la politique (algorithme ou coût) est
+        recalculé ici, seul moment où le mot de passe en clair est connu:
+        la migration se fait au fil des connexions, sans réinitialisation.
+        Elle est reportée à une connexion suivante si aucun processus de
+        hachage n'est libre, pour tenir le temps de réponse du login.
+        """
+        user = self.get_user_by_email(email)
+        if not user or not user.verify_password(password):
+            return None
+        if user.password_needs_rehash():
+            user.rehash_password(password)
+        return user
+
+    def revoke_token(self, jti, user_id=None, expires_at=None):
+        """
+        Révoque un token jusqu'à son expiration: enregistré en base, il entre
+        dans le filtre de ce processus au commit (voir app/revocation.py).
+        """
+        if self.revoked_token_repo.is_revoked(jti):
+            return
+        self.revoked_token_repo.add(RevokedToken(jti, user_id, expires_at))
+        after_commit(lambda: revocation.token_revoked(jti, expires_at))
+
+    def purge_revoked_tokens(self):
+        """Supprime les révocations des tokens déjà expirés"""
+        return self.revoked_token_repo.purge_expired(datetime.utcnow())
+
+    def count_password_hashes(self):
+        """Nombre d'utilisateurs par (algorithme, coût) de hachage"""
+        return self.user_repo.count_by_password_policy()
+
     def get_user(self, user_id):
         return self.user_repo.get(user_id)
 
@@ -35,6 +77,9 @@ class UserFacade:
     def get_all_users(self):
         return self.user_repo.get_all()
 
+    def get_users_page(self, after=None, limit=20):
+        return self.user_repo.get_page(after=after, limit=limit)
+
     def update_user(self, user_id, user_data):
         user = self.user_repo.get(user_id)
         if not user:
@@ -46,10 +91,19 @@ class UserFacade:
             if password:
                 user.hash_password(password)
 
+        admin_changed = ('is_admin' in user_data
+                         and bool(user_data['is_admin']) != bool(user.is_admin))
+
         # Mettre à jour les autres attributs
         if user_data:
             self.user_repo.update(user_id, user_data)
 
+        # Les principaux en cache des tokens de l'utilisateur gardent l'ancien
+        # statut admin: ils sont oubliés une fois le changement commité
+        if admin_changed:
+            principal_id = user.id
+            after_commit(lambda: principals.invalidate_user(principal_id))
+
         return user
 
     def get_user_places(self, user_id):
@@ -0,0 +1,76 @@
+"""
+Débit d'import de lieux: un POST /places par lieu (un commit chacun)
+contre POST /places/bulk par lots de BULK_MAX_ITEMS (un commit par lot).
+
+La base est un fichier SQLite temporaire, pour que chaque commit paie
+son écriture disque comme en production.
+
+Usage (depuis part3/):
+    python -m benchmarks.bench_bulk
+"""
+import os
+import tempfile
+import time
+
+from flask_jwt_extended import create_access_token
+
+from app import create_app
+from app.extensions import db
+from app.services import get_facade
+from config import DevelopmentConfig
+
+PLACES = 2000
+
+
+def make_app(path):
+    class BenchConfig(DevelopmentConfig):
+        DEBUG = False
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{path}'
+
+    app = create_app(BenchConfig)
+    with app.app_context():
+        db.create_all()
+        owner = get_facade().user_facade.create_user({
+            'first_name': 'Bench', 'last_name': 'Owner',
+            'email': 'bench@example.com', 'password': 'benchpassword'})
+        token = create_access_token(identity=owner.id,
+                                    additional_claims={"is_admin": False})
+    return app, {'Authorization': f'Bearer {token}'}
+
+
+def listing(i):
+    return {'title': f'Listing {i}', 'description': 'Imported from a partner',
+            'price': 50.0 + i % 200, 'latitude': 48.8 + i % 100 / 1000,
+            'longitude': 2.3 + i % 100 / 1000, 'amenities': []}
+
+
+def bench_per_row(client, headers):
+    start = time.perf_counter()
+    for i in range(PLACES):
+        assert client.post('/api/v1/places/', json=listing(i),
+                           headers=headers).status_code == 201
+    return time.perf_counter() - start
+
+
+def bench_bulk(client, headers, batch_size):
+    start = time.perf_counter()
+    for first in range(0, PLACES, batch_size):
+        batch = [listing(i) for i in range(first, min(first + batch_size, PLACES))]
+        response = client.post('/api/v1/places/bulk', json={'create': batch},
+                               headers=headers)
+        assert all(result['status'] == 201
+                   for result in response.get_json()['create'])
+    return time.perf_counter() - start
+
+
+if __name__ == '__main__':
+    with tempfile.TemporaryDirectory() as tmp:
+        app, headers = make_app(os.path.join(tmp, 'per_row.db'))
+        per_row = bench_per_row(app.test_client(), headers)
+
+        app, headers = make_app(os.path.join(tmp, 'bulk.db'))
+        bulk = bench_bulk(app.test_client(), headers, app.config['BULK_MAX_ITEMS'])
+
+    print(f"per-row POST /places     : {PLACES / per_row:9.0f} places/s")
+    print(f"POST /places/bulk        : {PLACES / bulk:9.0f} places/s"
+          f"   ({per_row / bulk:.1f}x)")
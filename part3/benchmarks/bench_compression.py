@@ -0,0 +1,89 @@
+"""
+Octets économisés par la compression des réponses JSON, contre son coût
+CPU, pour chaque endpoint de liste (pages de MAX_PAGE_SIZE éléments).
+
+Pour chaque encodage disponible (gzip, et brotli si le paquet est
+installé): taille du corps, gain, temps CPU de compression par réponse et
+temps total de la requête comparé à la réponse non compressée.
+
+Usage (depuis part3/):
+    python -m benchmarks.bench_compression
+"""
+import time
+
+from app import create_app
+from app.compression import available_encodings, make_compressor
+from app.extensions import db
+from app.services import get_facade
+from config import TestingConfig
+
+PLACES = 200
+REVIEWERS = 5
+ROUNDS = 50
+
+
+def seed(app):
+    with app.app_context():
+        facade = get_facade()
+        owner = facade.user_facade.create_user({
+            'first_name': 'Bench', 'last_name': 'Owner',
+            'email': 'owner@example.com', 'password': 'benchpassword'})
+        results = facade.place_facade.create_places([
+            {'title': f'Flat {i} near the river', 'price': 60.0 + i % 90,
+             'description': 'Bright two-room flat, fully equipped kitchen, '
+                            'close to shops and public transport.',
+             'latitude': 48.85, 'longitude': 2.35, 'amenities': []}
+            for i in range(PLACES)], owner.id)
+        place_ids = [result['id'] for result in results]
+        for n in range(REVIEWERS):
+            reviewer = facade.user_facade.create_user({
+                'first_name': 'Guest', 'last_name': f'Number{n}',
+                'email': f'guest{n}@example.com', 'password': 'benchpassword'})
+            facade.review_facade.create_reviews([
+                {'place_id': place_id, 'rating': 1 + (n + i) % 5,
+                 'text': 'Lovely stay, the host was friendly and the flat was clean.'}
+                for i, place_id in enumerate(place_ids)], reviewer.id)
+        for name in ('Wifi', 'Kitchen', 'Parking', 'Washer', 'Balcony'):
+            facade.amenity_facade.create_amenity({'name': name})
+
+
+def timed_request(client, url, encoding):
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        response = client.get(url, headers={'Accept-Encoding': encoding})
+        response.get_data()
+    return (time.perf_counter() - start) / ROUNDS
+
+
+def compression_cpu(body, encoding, config):
+    start = time.process_time()
+    for _ in range(ROUNDS):
+        compressor = make_compressor(encoding, config)
+        compressed = compressor.compress(body) + compressor.finish()
+    return len(compressed), (time.process_time() - start) / ROUNDS
+
+
+if __name__ == '__main__':
+    app = create_app(TestingConfig)
+    with app.app_context():
+        db.create_all()
+    seed(app)
+    client = app.test_client()
+    limit = app.config['MAX_PAGE_SIZE']
+
+    print(f"{'endpoint':<22} {'encoding':<9} {'bytes':>9} {'saved':>7}"
+          f" {'cpu ms':>8} {'request ms':>11}")
+    for url in (f'/api/v1/places/?limit={limit}', f'/api/v1/reviews/?limit={limit}',
+                f'/api/v1/amenities/?limit={limit}'):
+        body = client.get(url, headers={'Accept-Encoding': 'identity'}).get_data()
+        identity_ms = timed_request(client, url, 'identity') * 1000
+        name = url.split('?')[0].replace('/api/v1', '')
+        print(f"{name:<22} {'identity':<9} {len(body):>9} {'':>7}"
+              f" {'':>8} {identity_ms:>11.2f}")
+        for encoding in available_encodings():
+            size, cpu = compression_cpu(body, encoding, app.config)
+            if len(body) < app.config['COMPRESS_MIN_SIZE']:
+                size, cpu = len(body), 0.0  # sous le seuil: envoyé tel quel
+            request_ms = timed_request(client, url, encoding) * 1000
+            print(f"{name:<22} {encoding:<9} {size:>9} {1 - size / len(body):>7.1%}"
+                  f" {cpu * 1000:>8.2f} {request_ms:>11.2f}")
@@ -0,0 +1,71 @@
+"""
+Pic mémoire de l'export NDJSON en flux (/export/places.ndjson) selon la
+taille de la table, comparé à la construction d'une seule liste JSON de
+toutes les lignes (ce que fait un endpoint de liste sans pagination).
+
+Usage (depuis part3/):
+    python -m benchmarks.bench_export
+"""
+import json
+import tracemalloc
+
+from flask_jwt_extended import create_access_token
+
+from app import create_app
+from app.commands import init_db, seed_admin
+from app.models.place import Place
+from app.services import get_facade
+from config import TestingConfig
+
+SIZES = (5000, 20000, 50000)
+BATCH = 1000
+
+
+def make_app(size):
+    app = create_app(TestingConfig)
+    with app.app_context():
+        init_db()
+        seed_admin()
+        facade = get_facade()
+        owner = facade.user_facade.create_user({
+            'first_name': 'Bench', 'last_name': 'Owner',
+            'email': 'bench@example.com', 'password': 'benchpassword'})
+        for first in range(0, size, BATCH):
+            facade.place_facade.create_places([
+                {'title': f'Place {i}', 'description': 'Exported for analytics',
+                 'price': 50.0 + i % 100, 'latitude': 45.0, 'longitude': 5.0,
+                 'amenities': []}
+                for i in range(first, min(first + BATCH, size))], owner.id)
+        admin = facade.user_facade.get_user_by_email('admin@example.com')
+        token = create_access_token(identity=admin.id, additional_claims={'is_admin': True})
+    return app, {'Authorization': f'Bearer {token}'}
+
+
+def peak_mib(func):
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / 1024 / 1024
+
+
+def export_stream(app, headers):
+    response = app.test_client().get('/api/v1/export/places.ndjson', headers=headers,
+                                     buffered=False)
+    lines = sum(chunk.count(b'\n') for chunk in response.response)
+    response.close()
+    return lines
+
+
+def one_json_list(app):
+    with app.app_context():
+        return len(json.dumps(Place.to_dict_many(Place.query.all())))
+
+
+if __name__ == '__main__':
+    print(f"{'rows':>7} {'ndjson stream MiB':>18} {'single list MiB':>16}")
+    for size in SIZES:
+        app, headers = make_app(size)
+        stream = peak_mib(lambda: export_stream(app, headers))
+        single = peak_mib(lambda: one_json_list(app))
+        print(f"{size:>7} {stream:>18.1f} {single:>16.1f}")
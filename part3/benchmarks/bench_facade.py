@@ -0,0 +1,56 @@
+"""
+Micro-benchmark du coût par requête de l'accès à la façade.
+
+Compare l'ancien comportement (un HBnBFacade construit à chaque appel de
+get_facade) à la façade partagée construite une fois dans create_app.
+
+Usage (depuis part3/):
+    python -m benchmarks.bench_facade
+"""
+import timeit
+
+from app import create_app
+from app.services import get_facade
+from app.services.facade import HBnBFacade
+from app.api.v1 import places as places_module
+from config import DevelopmentConfig
+
+ITERATIONS = 20000
+REQUESTS = 2000
+
+
+class BenchConfig(DevelopmentConfig):
+    DEBUG = False
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+
+
+def bench_lookup(app):
+    with app.app_context():
+        before = timeit.timeit(HBnBFacade, number=ITERATIONS)
+        after = timeit.timeit(get_facade, number=ITERATIONS)
+    print(f"facade lookup   before: {before / ITERATIONS * 1e6:8.2f} us/call"
+          f"   after: {after / ITERATIONS * 1e6:8.2f} us/call")
+
+
+def bench_requests(app):
+    client = app.test_client()
+
+    def run():
+        for _ in range(REQUESTS):
+            client.get('/api/v1/places/missing')
+
+    # Avant: l'endpoint reconstruit la façade à chaque requête
+    places_module.get_facade = HBnBFacade
+    try:
+        before = timeit.timeit(run, number=1)
+    finally:
+        places_module.get_facade = get_facade
+    after = timeit.timeit(run, number=1)
+    print(f"GET /places/<id> before: {before / REQUESTS * 1e6:8.2f} us/req"
+          f"   after: {after / REQUESTS * 1e6:8.2f} us/req")
+
+
+if __name__ == '__main__':
+    app = create_app(BenchConfig)
+    bench_lookup(app)
+    bench_requests(app)
@@ -0,0 +1,144 @@
+"""
+Débit de /auth/login selon la taille du pool de hachage bcrypt.
+
+Pour 0 (hachage sur le thread de la requête), 1, 2, 4 ... processus et
+jusqu'au nombre de cœurs: CLIENTS clients se connectent en boucle pendant
+DURATION secondes sur un serveur WSGI multi-threads, au coût de
+production (BCRYPT_LOG_ROUNDS = 12). Un client à part lit
+/api/v1/amenities/ pendant la rafale: sa latence montre si les autres
+endpoints restent servis. Les 503 sont les connexions refusées par la
+limite de file (PASSWORD_HASH_MAX_QUEUE).
+
+Usage (depuis part3/):
+    python -m benchmarks.bench_login
+"""
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+
+from werkzeug.serving import make_server
+
+from app import create_app
+from app.extensions import db
+from app.passwords import get_password_hasher
+from app.services import get_facade
+from config import Config
+
+CLIENTS = 16
+DURATION = 5.0
+ROUNDS = 12
+MAX_QUEUE = 8
+RETRY_AFTER = 1
+
+
+def pool_sizes():
+    cores = os.cpu_count() or 1
+    sizes = [0] + [n for n in (1, 2, 4, 8, 16) if n < cores] + [cores]
+    return sorted(set(sizes))
+
+
+def start_server(path, workers):
+    attrs = {'DEBUG': False, 'SQLALCHEMY_DATABASE_URI': f'sqlite:///{path}',
+             'SQLALCHEMY_TRACK_MODIFICATIONS': False, 'BCRYPT_LOG_ROUNDS': ROUNDS,
+             'PASSWORD_HASH_WORKERS': workers, 'PASSWORD_HASH_MAX_QUEUE': MAX_QUEUE,
+             'PASSWORD_HASH_RETRY_AFTER': RETRY_AFTER}
+    app = create_app(type('BenchLoginConfig', (Config,), attrs))
+    with app.app_context():
+        db.create_all()
+        get_facade().user_facade.create_user({
+            'first_name': 'Bench', 'last_name': 'Login',
+            'email': 'login@example.com', 'password': 'benchpassword'})
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return app, server, f'http://127.0.0.1:{server.server_port}'
+
+
+def request(url, body=None):
+    data = json.dumps(body).encode() if body is not None else None
+    req = urllib.request.Request(url, data=data,
+                                 headers={'Content-Type': 'application/json'})
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(req, timeout=60) as response:
+            response.read()
+            status = response.status
+    except urllib.error.HTTPError as error:
+        status = error.code
+    return status, time.perf_counter() - start
+
+
+def login_client(base_url, deadline, stats, lock):
+    ok = busy = 0
+    latencies = []
+    credentials = {'email': 'login@example.com', 'password': 'benchpassword'}
+    while time.perf_counter() < deadline:
+        status, elapsed = request(f'{base_url}/api/v1/auth/login', credentials)
+        if status == 200:
+            ok += 1
+            latencies.append(elapsed)
+        elif status == 503:
+            # Un client poli attend Retry-After avant de réessayer
+            busy += 1
+            time.sleep(RETRY_AFTER)
+    with lock:
+        stats['ok'] += ok
+        stats['busy'] += busy
+        stats['latencies'].extend(latencies)
+
+
+def read_client(base_url, deadline, latencies):
+    while time.perf_counter() < deadline:
+        latencies.append(request(f'{base_url}/api/v1/amenities/')[1])
+        time.sleep(0.05)
+
+
+def p95(values):
+    values = sorted(values)
+    return values[int(len(values) * 0.95)] if values else 0.0
+
+
+def run(base_url):
+    stats = {'ok': 0, 'busy': 0, 'latencies': []}
+    reads = []
+    lock = threading.Lock()
+    deadline = time.perf_counter() + DURATION
+    threads = [threading.Thread(target=login_client, args=(base_url, deadline, stats, lock))
+               for _ in range(CLIENTS)]
+    threads.append(threading.Thread(target=read_client, args=(base_url, deadline, reads)))
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return stats, reads
+
+
+if __name__ == '__main__':
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    print(f"cores: {os.cpu_count()}, clients: {CLIENTS}, rounds: {ROUNDS},"
+          f" max queue: {MAX_QUEUE}")
+    print(f"{'workers':>7} {'logins/s':>9} {'503':>6} {'login p95 ms':>13}"
+          f" {'queue wait ms':>14} {'hash ms':>8} {'read p95 ms':>12}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for workers in pool_sizes():
+            app, server, base_url = start_server(os.path.join(tmp, f'{workers}.db'), workers)
+            try:
+                # Démarre les processus du pool avant la mesure
+                request(f'{base_url}/api/v1/auth/login',
+                        {'email': 'login@example.com', 'password': 'benchpassword'})
+                stats, reads = run(base_url)
+                with app.app_context():
+                    hasher = get_password_hasher()
+                    hasher_stats = hasher.stats()
+                    hasher.shutdown()
+            finally:
+                server.shutdown()
+            print(f"{workers:>7} {stats['ok'] / DURATION:>9.1f} {stats['busy']:>6}"
+                  f" {p95(stats['latencies']) * 1000:>13.0f}"
+                  f" {hasher_stats['queue_wait']['avg_ms']:>14.0f}"
+                  f" {hasher_stats['hash_time']['avg_ms']:>8.0f}"
+                  f" {p95(reads) * 1000:>12.1f}")
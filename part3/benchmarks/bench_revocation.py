@@ -0,0 +1,63 @@
+"""
+Coût de la vérification de révocation d'un token (token_in_blocklist_loader).
+
+Avec REVOKED révocations en base: temps par vérification d'un token non
+révoqué (filtre de Bloom seul, cas courant), d'un token révoqué (filtre
+puis base), et d'une requête en base sans filtre; taux de faux positifs
+mesuré contre TOKEN_BLOOM_ERROR_RATE.
+
+Usage (depuis part3/):
+    python -m benchmarks.bench_revocation
+"""
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from app import create_app
+from app.extensions import db
+from app.models.revoked_token import RevokedToken
+from app.revocation import get_revocation_list
+from config import TestingConfig
+
+REVOKED = 50000
+CHECKS = 100000
+
+
+def per_call(func, keys):
+    start = time.perf_counter()
+    for key in keys:
+        func(key)
+    return (time.perf_counter() - start) / len(keys)
+
+
+if __name__ == '__main__':
+    app = create_app(TestingConfig)
+    with app.app_context():
+        db.create_all()
+        expires_at = datetime.utcnow() + timedelta(hours=1)
+        revoked = [str(uuid.uuid4()) for _ in range(REVOKED)]
+        db.session.bulk_save_objects(
+            [RevokedToken(jti, expires_at=expires_at) for jti in revoked])
+        db.session.commit()
+
+        revocation_list = get_revocation_list()
+        start = time.perf_counter()
+        revocation_list.sync()
+        load_ms = (time.perf_counter() - start) * 1000
+
+        valid = [str(uuid.uuid4()) for _ in range(CHECKS)]
+        bloom_s = per_call(revocation_list.is_revoked, valid)
+        false_positives = revocation_list.false_positives
+        revoked_s = per_call(revocation_list.is_revoked, revoked[:1000])
+        db_s = per_call(revocation_list.repo.is_revoked, valid[:1000])
+
+        stats = revocation_list.stats()
+        print(f"revoked tokens: {REVOKED}, filter: {stats['filter_bits'] // 8 // 1024} KiB,"
+              f" {stats['filter_hashes']} hashes, load {load_ms:.0f} ms")
+        print(f"{'check':<28} {'per call':>12}")
+        print(f"{'valid token (Bloom only)':<28} {bloom_s * 1e9:>9.0f} ns")
+        print(f"{'revoked token (Bloom + DB)':<28} {revoked_s * 1e6:>9.1f} us")
+        print(f"{'DB lookup without filter':<28} {db_s * 1e6:>9.1f} us")
+        print(f"false positives: {false_positives}/{CHECKS}"
+              f" ({false_positives / CHECKS:.3%}, target"
+              f" {app.config['TOKEN_BLOOM_ERROR_RATE']:.3%})")
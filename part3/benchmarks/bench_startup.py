@@ -0,0 +1,80 @@
+"""
+Temps de démarrage d'un processus, chaque mesure dans un interpréteur neuf
+(médiane de RUNS lancements): import du paquet app, démarrage d'un
+processus du pool de hachage (import app.passwords), create_app sans
+amorçage (worker de production) et avec BOOTSTRAP_ON_STARTUP (create_all
+et admin par défaut au coût de production, BCRYPT_LOG_ROUNDS = 12).
+
+Avec --budget-ms, sort en erreur si create_app sans amorçage dépasse le
+budget: garde-fou contre un import lourd ou une requête ajoutés au
+démarrage.
+
+Usage (depuis part3/):
+    python -m benchmarks.bench_startup [--budget-ms 500]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+RUNS = 5
+
+CREATE_APP = """
+import time
+start = time.perf_counter()
+from app import create_app
+from config import Config
+attrs = {{'SQLALCHEMY_DATABASE_URI': 'sqlite:///{path}',
+          'SQLALCHEMY_TRACK_MODIFICATIONS': False, 'BCRYPT_LOG_ROUNDS': 12,
+          'BOOTSTRAP_ON_STARTUP': {bootstrap}}}
+create_app(type('BenchStartupConfig', (Config,), attrs))
+print(time.perf_counter() - start)
+"""
+
+IMPORT = """
+import time
+start = time.perf_counter()
+import {module}
+print(time.perf_counter() - start)
+"""
+
+
+def measure(codes):
+    """Médiane en ms des temps affichés par les codes, un interpréteur chacun"""
+    times = []
+    for code in codes:
+        output = subprocess.run([sys.executable, '-c', code], check=True,
+                                capture_output=True, text=True).stdout
+        times.append(float(output.split()[-1]) * 1000)
+    return statistics.median(times)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--budget-ms', type=float,
+                        help='fail if create_app without bootstrap is slower')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        empty = os.path.join(tmp, 'empty.db')
+        results = [
+            ('import app', measure([IMPORT.format(module='app')] * RUNS)),
+            ('hash worker boot', measure([IMPORT.format(module='app.passwords')] * RUNS)),
+            ('create_app', measure(
+                [CREATE_APP.format(path=empty, bootstrap=False)] * RUNS)),
+            # Chaque lancement avec amorçage part d'une base vide
+            ('create_app + bootstrap', measure(
+                [CREATE_APP.format(path=os.path.join(tmp, f'{i}.db'), bootstrap=True)
+                 for i in range(RUNS)])),
+        ]
+
+    print(f"{'step':<24} {'median ms':>10}")
+    for name, ms in results:
+        print(f"{name:<24} {ms:>10.0f}")
+
+    startup_ms = results[2][1]
+    if args.budget_ms is not None and startup_ms > args.budget_ms:
+        print(f"create_app took {startup_ms:.0f} ms, budget {args.budget_ms:.0f} ms")
+        sys.exit(1)
@@ -0,0 +1,127 @@
+"""
+Test de charge lecture/écriture sur un serveur WSGI multi-threads.
+
+Compare, sur un fichier SQLite, la configuration par défaut (journal
+rollback, pas de PRAGMA, pool par défaut) au profil ProductionConfig (WAL,
+synchronous=NORMAL, busy_timeout, pool dimensionné). Chaque client envoie
+un mélange de GET /places (lecture paginée) et de POST /places (écriture).
+
+Usage (depuis part3/):
+    python -m benchmarks.load_test
+"""
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+
+from flask_jwt_extended import create_access_token
+from werkzeug.serving import make_server
+
+from app import create_app
+from app.extensions import db
+from app.services import get_facade
+from config import Config, ProductionConfig
+
+CONCURRENCY = (1, 4, 16)
+DURATION = 3.0
+# Une requête sur WRITE_EVERY est un POST
+WRITE_EVERY = 5
+SEED_PLACES = 200
+
+
+def make_profile(name, base, path):
+    attrs = {'DEBUG': False, 'SQLALCHEMY_DATABASE_URI': f'sqlite:///{path}',
+             'SQLALCHEMY_TRACK_MODIFICATIONS': False}
+    return type(name, (base,), attrs)
+
+
+def start_server(config_class):
+    app = create_app(config_class)
+    with app.app_context():
+        db.create_all()
+        facade = get_facade()
+        owner = facade.user_facade.create_user({
+            'first_name': 'Load', 'last_name': 'Test',
+            'email': 'load@example.com', 'password': 'loadpassword'})
+        facade.place_facade.create_places(
+            [listing(i) for i in range(SEED_PLACES)], owner.id)
+        token = create_access_token(identity=owner.id,
+                                    additional_claims={"is_admin": False})
+
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f'http://127.0.0.1:{server.server_port}', token
+
+
+def listing(i):
+    return {'title': f'Load {i}', 'price': 40.0 + i % 100,
+            'latitude': 45.0, 'longitude': 5.0, 'amenities': []}
+
+
+def worker(base_url, token, deadline, stats, lock):
+    reads = writes = errors = 0
+    latencies = []
+    n = 0
+    while time.perf_counter() < deadline:
+        n += 1
+        if n % WRITE_EVERY == 0:
+            request = urllib.request.Request(
+                f'{base_url}/api/v1/places/', data=json.dumps(listing(n)).encode(),
+                headers={'Content-Type': 'application/json',
+                         'Authorization': f'Bearer {token}'})
+        else:
+            request = urllib.request.Request(f'{base_url}/api/v1/places/?limit=20')
+        start = time.perf_counter()
+        try:
+            with urllib.request.urlopen(request, timeout=30) as response:
+                response.read()
+            if request.data:
+                writes += 1
+            else:
+                reads += 1
+        except (urllib.error.HTTPError, urllib.error.URLError, TimeoutError):
+            errors += 1
+        latencies.append(time.perf_counter() - start)
+    with lock:
+        stats['reads'] += reads
+        stats['writes'] += writes
+        stats['errors'] += errors
+        stats['latencies'].extend(latencies)
+
+
+def run(base_url, token, clients):
+    stats = {'reads': 0, 'writes': 0, 'errors': 0, 'latencies': []}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + DURATION
+    threads = [threading.Thread(target=worker, args=(base_url, token, deadline, stats, lock))
+               for _ in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    latencies = sorted(stats['latencies'])
+    p95 = latencies[int(len(latencies) * 0.95)] if latencies else 0
+    return stats, p95
+
+
+if __name__ == '__main__':
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    profiles = (('default', Config), ('production', ProductionConfig))
+    print(f"{'profile':<11} {'clients':>7} {'reads/s':>9} {'writes/s':>9}"
+          f" {'errors':>7} {'p95 ms':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, base in profiles:
+            for clients in CONCURRENCY:
+                path = os.path.join(tmp, f'{name}-{clients}.db')
+                server, base_url, token = start_server(make_profile(name, base, path))
+                try:
+                    stats, p95 = run(base_url, token, clients)
+                finally:
+                    server.shutdown()
+                print(f"{name:<11} {clients:>7} {stats['reads'] / DURATION:>9.0f}"
+                      f" {stats['writes'] / DURATION:>9.0f} {stats['errors']:>7}"
+                      f" {p95 * 1000:>8.1f}")
@@ -4,15 +4,146 @@ import os
 class Config:
     SECRET_KEY = os.getenv('SECRET_KEY', 'default_secret_key')
     DEBUG = False
+    # Création du schéma et de l'admin par défaut dans create_app; sinon
+    # flask hbnb init-db et flask hbnb seed-admin, lancés une fois au
+    # déploiement, et le démarrage d'un worker ne touche pas la base
+    BOOTSTRAP_ON_STARTUP = False
+    # Taille de page par défaut et maximale des endpoints de liste
+    PAGE_SIZE = 20
+    MAX_PAGE_SIZE = 100
+    # Rayon maximal accepté par /places/nearby
+    NEARBY_MAX_RADIUS_KM = 100
+    # Index bitmap en mémoire (par processus) pour filtrer les lieux par
+    # amenities. Il ne voit pas les écritures des autres workers: il est
+    # rechargé depuis la base toutes les AMENITY_BITMAP_RELOAD_INTERVAL
+    # secondes, le retard maximal d'un filtre par amenities
+    AMENITY_BITMAP_INDEX = False
+    AMENITY_BITMAP_RELOAD_INTERVAL = 30
+    # Nombre maximal d'éléments par opération des endpoints /bulk
+    BULK_MAX_ITEMS = 1000
+    # PRAGMA appliqués à chaque connexion SQLite (voir app/persistence/sqlite.py)
+    SQLITE_PRAGMAS = {}
+    # Type des transactions d'écriture SQLite (None: DEFERRED, défaut du driver)
+    SQLITE_BEGIN_MODE = None
+    # URLs des réplicas en lecture seule (voir app/persistence/routing.py)
+    SQLALCHEMY_REPLICA_URIS = []
+    # Cache des lectures par id (voir app/persistence/cache.py): taille du
+    # LRU du processus (0 le désactive), durée de vie des entrées en secondes
+    # et cache partagé optionnel ('local' ou URL redis://)
+    ENTITY_CACHE_SIZE = 10000
+    ENTITY_CACHE_TTL = 60
+    ENTITY_CACHE_SHARED_URL = None
+    # Cache des principaux des tokens JWT par jti (voir app/principals.py):
+    # taille du LRU (0 le désactive) et durée de vie maximale d'une entrée
+    # (une entrée expire aussi avec son token)
+    PRINCIPAL_CACHE_SIZE = 10000
+    PRINCIPAL_CACHE_TTL = 60
+    # Révocation des tokens (voir app/revocation.py): capacité et taux de
+    # faux positifs du filtre de Bloom de chaque processus, délai maximal
+    # de propagation d'une révocation aux autres processus (secondes) et
+    # store partagé optionnel ('local' ou URL redis://)
+    TOKEN_BLOOM_CAPACITY = 100000
+    TOKEN_BLOOM_ERROR_RATE = 0.001
+    TOKEN_REVOCATION_SYNC_INTERVAL = 5
+    TOKEN_REVOCATION_SHARED_URL = None
+    # Cache-Control des réponses GET avec ETag, par ressource ('default'
+    # pour les autres): no-cache impose une revalidation (304) à chaque vue
+    HTTP_CACHE_CONTROL = {
+        'default': 'no-cache',
+        'amenity': 'public, max-age=60',
+        'amenity_list': 'public, max-age=60'
+    }
+    # Compression des réponses JSON (voir app/compression.py): brotli si le
+    # paquet brotli est installé, gzip sinon; les corps de moins de
+    # COMPRESS_MIN_SIZE octets ne sont pas compressés, ceux de plus de
+    # COMPRESS_STREAM_MIN_SIZE sont compressés et envoyés en flux
+    COMPRESS_ENABLED = True
+    COMPRESS_MIMETYPES = ['application/json', 'application/x-ndjson']
+    COMPRESS_MIN_SIZE = 500
+    COMPRESS_STREAM_MIN_SIZE = 1024 * 1024
+    COMPRESS_LEVEL = 6
+    COMPRESS_BR_LEVEL = 5
+    # Lignes lues par lot (yield_per) et envoyées par paquet par /export
+    EXPORT_BATCH_SIZE = 1000
+    # Hachage des mots de passe (voir app/passwords.py): algorithme des
+    # nouveaux hachages ('bcrypt' ou 'scrypt') et son coût (log2 du nombre
+    # de tours bcrypt, log2(N) pour scrypt), les hachages existants étant
+    # recalculés à la connexion quand la politique change; durée cible d'un
+    # hachage (flask hbnb calibrate-password-hash); processus dédiés (0: sur
+    # le thread de la requête), calculs en attente admis avant de répondre
+    # 503, attente maximale d'un résultat et Retry-After du 503 (secondes)
+    PASSWORD_HASH_ALGORITHM = 'bcrypt'
+    BCRYPT_LOG_ROUNDS = 12
+    SCRYPT_LOG_N = 14
+    PASSWORD_HASH_SLO_MS = 250
+    PASSWORD_HASH_WORKERS = os.cpu_count() or 1
+    PASSWORD_HASH_MAX_QUEUE = 32
+    PASSWORD_HASH_TIMEOUT = 5
+    PASSWORD_HASH_RETRY_AFTER = 1
 
 
 class DevelopmentConfig(Config):
     DEBUG = True
+    # python run.py démarre sur une base prête à l'emploi
+    BOOTSTRAP_ON_STARTUP = True
     SQLALCHEMY_DATABASE_URI = 'sqlite:///development.db'
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    BCRYPT_LOG_ROUNDS = 10
+
+
+class ProductionConfig(Config):
+    SQLALCHEMY_DATABASE_URI = os.getenv('DATABASE_URL', 'sqlite:///production.db')
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # Réplicas en lecture: DATABASE_REPLICA_URLS="url1,url2"
+    SQLALCHEMY_REPLICA_URIS = [
+        url.strip() for url in os.getenv('DATABASE_REPLICA_URLS', '').split(',')
+        if url.strip()]
+    # Cache partagé entre les workers: ENTITY_CACHE_URL="redis://host:6379/0"
+    ENTITY_CACHE_SHARED_URL = os.getenv('ENTITY_CACHE_URL')
+    TOKEN_REVOCATION_SHARED_URL = os.getenv('TOKEN_REVOCATION_URL', os.getenv('ENTITY_CACHE_URL'))
+    # Politique de hachage et taille du pool, par déploiement
+    PASSWORD_HASH_ALGORITHM = os.getenv('PASSWORD_HASH_ALGORITHM', 'bcrypt')
+    BCRYPT_LOG_ROUNDS = int(os.getenv('BCRYPT_LOG_ROUNDS', 12))
+    SCRYPT_LOG_N = int(os.getenv('SCRYPT_LOG_N', 14))
+    PASSWORD_HASH_WORKERS = int(os.getenv('PASSWORD_HASH_WORKERS', os.cpu_count() or 1))
+    PASSWORD_HASH_MAX_QUEUE = int(os.getenv('PASSWORD_HASH_MAX_QUEUE', 32))
+    # Pool de connexions dimensionné pour un serveur WSGI multi-threads
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        'pool_size': int(os.getenv('DB_POOL_SIZE', 10)),
+        'max_overflow': int(os.getenv('DB_MAX_OVERFLOW', 20)),
+        'pool_timeout': 30,
+        # Vérifie la connexion avant usage et la renouvelle toutes les 30 min
+        'pool_pre_ping': True,
+        'pool_recycle': 1800
+    }
+    # WAL: les lectures ne bloquent plus l'écriture (et inversement);
+    # synchronous=NORMAL suffit en WAL (pas de corruption, fsync au checkpoint);
+    # busy_timeout fait attendre le verrou d'écriture au lieu d'échouer
+    SQLITE_PRAGMAS = {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'busy_timeout': 5000,
+        'mmap_size': 268435456,
+        'cache_size': -64000
+    }
+    # Le verrou d'écriture est pris dès BEGIN (en attendant busy_timeout): une
+    # transaction DEFERRED qui a déjà lu échoue sans attendre si un autre
+    # écrivain a commité entre-temps
+    SQLITE_BEGIN_MODE = 'IMMEDIATE'
+
+
+class TestingConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # Coût minimal et hachage sur le thread de la requête
+    BCRYPT_LOG_ROUNDS = 4
+    PASSWORD_HASH_WORKERS = 0
 
 
 config = {
     'development': DevelopmentConfig,
+    'production': ProductionConfig,
+    'testing': TestingConfig,
     'default': DevelopmentConfig
 }
@@ -1,11 +1,12 @@
+import os
 from app import create_app
-from app.extensions import db
+from config import config
 
-app = create_app()
+# HBNB_ENV=production pour le pool de connexions et les PRAGMA SQLite
+app = create_app(config[os.getenv('HBNB_ENV', 'default')])
 
-# Ceci crée toutes les tables si elles n'existent pas
-with app.app_context():
-    db.create_all()
+# Le schéma et l'admin sont créés au démarrage en développement seulement
+# (BOOTSTRAP_ON_STARTUP); ailleurs: flask --app run hbnb init-db / seed-admin
 
 if __name__ == '__main__':
     app.run(debug=True)
@@ -1,21 +1,39 @@
 import pytest
+import bcrypt
+import base64
+import gzip
 import json
-from flask_jwt_extended import create_access_token
+import shutil
+import sqlite3
+from sqlalchemy import event, inspect
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.engine import Engine
+from flask_jwt_extended import create_access_token, decode_token
 from app import create_app
+from config import TestingConfig, ProductionConfig
 from app.extensions import db
 from app.services import get_facade
+from app.commands import init_db, seed_admin
+from app.persistence.bitmap_index import AmenityBitmapIndex
+from app.passwords import PasswordHasher, get_password_hasher, parse_hash
+from app.persistence.cache import LRUCache
+from app.revocation import BloomFilter, RevocationList
+from app.services.repositories.revoked_token_repository import RevokedTokenRepository
+from app.models.place import Place
+from app.models.place_amenity import place_amenity
+
+# Un SAWarning (par exemple un objet rattaché à une relation avant d'être
+# dans la session) ou une API SQLAlchemy dépréciée (Query.get) fait
+# échouer le test qui le déclenche
+pytestmark = [pytest.mark.filterwarnings('error::sqlalchemy.exc.SAWarning'),
+              pytest.mark.filterwarnings('error::sqlalchemy.exc.LegacyAPIWarning')]
 
 # ============= FIXTURES =============
 
 
 @pytest.fixture
 def app():
-    app = create_app()
-    app.config.update({
-        "TESTING": True,
-        "DEBUG": False,
-        "SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:",
-    })
+    app = create_app(TestingConfig)
 
     with app.app_context():
         db.create_all()
@@ -27,6 +45,47 @@ def app():
         db.drop_all()
 
 
+# Schéma créé par la première version (create_all avant le backlog), pour
+# tester flask hbnb migrate sur une base existante
+BASELINE_SCHEMA = """
+CREATE TABLE users (first_name VARCHAR(50) NOT NULL, last_name VARCHAR(50) NOT NULL,
+    email VARCHAR(120) NOT NULL, password VARCHAR(128) NOT NULL, is_admin BOOLEAN,
+    id VARCHAR(36) NOT NULL, created_at DATETIME, updated_at DATETIME,
+    PRIMARY KEY (id), UNIQUE (email));
+CREATE TABLE amenities (name VARCHAR(50) NOT NULL, description VARCHAR(255),
+    id VARCHAR(36) NOT NULL, created_at DATETIME, updated_at DATETIME, PRIMARY KEY (id));
+CREATE TABLE places (title VARCHAR(100) NOT NULL, description TEXT, price FLOAT NOT NULL,
+    latitude FLOAT NOT NULL, longitude FLOAT NOT NULL, owner_id VARCHAR(36) NOT NULL,
+    id VARCHAR(36) NOT NULL, created_at DATETIME, updated_at DATETIME,
+    PRIMARY KEY (id), FOREIGN KEY(owner_id) REFERENCES users (id));
+CREATE TABLE place_amenity (place_id VARCHAR(36) NOT NULL, amenity_id VARCHAR(36) NOT NULL,
+    PRIMARY KEY (place_id, amenity_id), FOREIGN KEY(place_id) REFERENCES places (id),
+    FOREIGN KEY(amenity_id) REFERENCES amenities (id));
+CREATE TABLE reviews (text TEXT NOT NULL, rating INTEGER NOT NULL,
+    place_id VARCHAR(36) NOT NULL, user_id VARCHAR(36) NOT NULL,
+    id VARCHAR(36) NOT NULL, created_at DATETIME, updated_at DATETIME, PRIMARY KEY (id),
+    FOREIGN KEY(place_id) REFERENCES places (id), FOREIGN KEY(user_id) REFERENCES users (id));
+"""
+
+
+@pytest.fixture
+def baseline_app(tmp_path):
+    """Application sur une base au schéma d'origine, avec un utilisateur"""
+    path = tmp_path / 'baseline.db'
+    with sqlite3.connect(path) as connection:
+        connection.executescript(BASELINE_SCHEMA)
+        pw_hash = bcrypt.hashpw(b'oldpassword', bcrypt.gensalt(4)).decode()
+        connection.execute(
+            "INSERT INTO users (first_name, last_name, email, password, is_admin, id, "
+            "created_at, updated_at) VALUES ('Old', 'User', 'old@example.com', ?, 0, "
+            "'old-user', '2024-01-01 00:00:00', '2024-01-01 00:00:00')", (pw_hash,))
+
+    class BaselineConfig(TestingConfig):
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{path}'
+
+    return create_app(BaselineConfig)
+
+
 @pytest.fixture
 def client(app):
     return app.test_client()
@@ -119,6 +178,23 @@ def initialize_test_data():
     facade.user_facade.initialize_admin()
 
 
+# Helper function to count the SQL statements issued by a block of code
+def count_queries(app, func):
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        func()
+    finally:
+        event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+    return len(statements)
+
+
 # ============= AUTH TESTS =============
 
 def test_login_success(client, app):
@@ -148,6 +224,171 @@ def test_login_invalid_credentials(client, app):
     assert 'error' in response.get_json()
 
 
+def test_login_hash_metrics(client, app, admin_token):
+    """Test that login verifications are timed by the hashing pool"""
+    client.post('/api/v1/auth/login', json={
+        'email': 'admin@example.com', 'password': 'adminpassword'})
+    headers = {'Authorization': f'Bearer {admin_token}'}
+    stats = client.get('/api/v1/stats/passwords', headers=headers).get_json()
+    assert stats['algorithm'] == 'bcrypt'
+    assert stats['cost'] == TestingConfig.BCRYPT_LOG_ROUNDS
+    assert stats['completed'] >= 1 and stats['rejected'] == 0
+    assert stats['hash_time']['max_ms'] > 0
+
+
+def test_login_saturated_returns_503(client, app):
+    """Test that logins are refused fast when the hashing pool is full"""
+    hasher = get_password_hasher()
+    held = 0
+    while hasher._slots.acquire(blocking=False):
+        held += 1
+    try:
+        response = client.post('/api/v1/auth/login', json={
+            'email': 'admin@example.com', 'password': 'adminpassword'})
+    finally:
+        for _ in range(held):
+            hasher._slots.release()
+
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '1'
+    assert hasher.stats()['rejected'] == 1
+    response = client.post('/api/v1/auth/login', json={
+        'email': 'admin@example.com', 'password': 'adminpassword'})
+    assert response.status_code == 200
+
+
+def test_password_hasher_process_pool(app):
+    """Test hashing and verification in worker processes"""
+    hasher = PasswordHasher(cost=4, workers=1, max_queue=1, timeout=30)
+    try:
+        with app.test_request_context():
+            pw_hash = hasher.hash('secret')
+            assert pw_hash.startswith('$2b$04$')
+            assert hasher.check(pw_hash, 'secret')
+            assert not hasher.check(pw_hash, 'wrong')
+    finally:
+        hasher.shutdown()
+    assert hasher.stats()['completed'] == 3
+
+
+def test_login_rehashes_outdated_password_hash(client, app):
+    """Test that a hash with an old cost is upgraded on successful login"""
+    with app.app_context():
+        admin = get_facade().user_facade.get_user_by_email('admin@example.com')
+        admin.password = bcrypt.hashpw(b'adminpassword', bcrypt.gensalt(5)).decode()
+        admin.password_algorithm, admin.password_cost = 'bcrypt', 5
+        db.session.commit()
+
+    response = client.post('/api/v1/auth/login', json={
+        'email': 'admin@example.com', 'password': 'wrongpassword'})
+    assert response.status_code == 401
+    with app.app_context():
+        admin = get_facade().user_facade.get_user_by_email('admin@example.com')
+        assert admin.password.startswith('$2b$05$')
+
+    response = client.post('/api/v1/auth/login', json={
+        'email': 'admin@example.com', 'password': 'adminpassword'})
+    assert response.status_code == 200
+    with app.app_context():
+        db.session.expire_all()
+        admin = get_facade().user_facade.get_user_by_email('admin@example.com')
+        assert admin.password.startswith('$2b$04$')
+        assert (admin.password_algorithm, admin.password_cost) == ('bcrypt', 4)
+        assert get_facade().user_facade.count_password_hashes() == [('bcrypt', 4, 1)]
+    assert get_password_hasher().stats()['rehashed'] == 1
+
+
+def test_login_migrates_to_scrypt(client, app):
+    """Test moving every hash to scrypt without a password reset"""
+    app.extensions['hbnb_password_hasher'] = PasswordHasher(algorithm='scrypt', cost=10)
+    for _ in range(2):
+        response = client.post('/api/v1/auth/login', json={
+            'email': 'admin@example.com', 'password': 'adminpassword'})
+        assert response.status_code == 200
+    with app.app_context():
+        admin = get_facade().user_facade.get_user_by_email('admin@example.com')
+        assert admin.password.startswith('$scrypt$ln=10,')
+        assert parse_hash(admin.password) == ('scrypt', 10)
+        assert admin.password_algorithm == 'scrypt'
+    assert get_password_hasher().stats()['rehashed'] == 1
+    response = client.post('/api/v1/auth/login', json={
+        'email': 'admin@example.com', 'password': 'wrongpassword'})
+    assert response.status_code == 401
+
+
+def test_logout_revokes_token(client, app, admin_token):
+    """Test that a token can no longer be used once logged out"""
+    token = client.post('/api/v1/auth/login', json={
+        'email': 'admin@example.com', 'password': 'adminpassword'}).get_json()['access_token']
+    headers = {'Authorization': f'Bearer {token}'}
+    assert client.get('/api/v1/protected', headers=headers).status_code == 200
+
+    assert client.post('/api/v1/auth/logout', headers=headers).status_code == 200
+    assert client.get('/api/v1/protected', headers=headers).status_code == 401
+    assert client.post('/api/v1/auth/logout', headers=headers).status_code == 401
+
+    # Les autres tokens restent valides, sans lecture de la table
+    other = {'Authorization': f'Bearer {admin_token}'}
+    assert count_selects(app, 'revoked_tokens',
+                         lambda: client.get('/api/v1/protected', headers=other)) == 0
+    stats = client.get('/api/v1/stats/revocations', headers=other).get_json()
+    assert stats['revoked_in_filter'] == 1 and stats['local_hits'] == 2
+    assert stats['store_lookups'] == 0
+
+
+def test_revocation_propagates_to_other_workers(app):
+    """Test that another process sees a revocation at its next sync"""
+    with app.app_context():
+        other_worker = RevocationList(RevokedTokenRepository(), capacity=1000,
+                                      error_rate=0.01, sync_interval=60)
+        assert not other_worker.is_revoked('token-1')
+        get_facade().user_facade.revoke_token('token-1', expires_at=None)
+        assert not other_worker.is_revoked('token-1')
+        other_worker.sync()
+        assert other_worker.is_revoked('token-1')
+
+
+def test_revocation_reads_primary_with_replicas(tmp_path):
+    """Test a revocation counts at once even when the replica lags"""
+    primary, replica = tmp_path / 'primary.db', tmp_path / 'replica.db'
+
+    class ReplicaConfig(TestingConfig):
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{primary}'
+        SQLALCHEMY_REPLICA_URIS = [f'sqlite:///{replica}']
+
+    app = create_app(ReplicaConfig)
+    with app.app_context():
+        init_db()
+        seed_admin()
+    app.extensions['hbnb_replicas'][0].dispose()
+    shutil.copy(primary, replica)
+    client = app.test_client()
+
+    token = client.post('/api/v1/auth/login', json={
+        'email': 'admin@example.com', 'password': 'adminpassword'}).get_json()['access_token']
+    headers = {'Authorization': f'Bearer {token}'}
+    assert client.post('/api/v1/auth/logout', headers=headers).status_code == 200
+    # Le réplica n'a pas la révocation: ce processus la connaît déjà
+    assert client.get('/api/v1/protected', headers=headers).status_code == 401
+
+    # Un autre processus la lit sur la base principale à sa synchronisation
+    with app.test_request_context():
+        jti = decode_token(token)['jti']
+        other_worker = RevocationList(RevokedTokenRepository(), capacity=1000,
+                                      error_rate=0.01, sync_interval=60)
+        assert other_worker.is_revoked(jti)
+
+
+def test_bloom_filter_error_rate():
+    """Test that the Bloom filter has no false negatives and few false positives"""
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+    for i in range(1000):
+        bloom.add(f'revoked-{i}')
+    assert all(f'revoked-{i}' in bloom for i in range(1000))
+    false_positives = sum(f'valid-{i}' in bloom for i in range(10000))
+    assert false_positives < 300
+
+
 def test_access_protected_endpoint_without_token(client):
     """Test accessing protected endpoint without token"""
     response = client.get('/api/v1/protected')
@@ -184,7 +425,8 @@ def test_get_user_list(client, admin_token):
     response = client.get('/api/v1/users/', headers=headers)
 
     assert response.status_code == 200
-    assert isinstance(response.get_json(), list)
+    assert isinstance(response.get_json()['items'], list)
+    assert 'next_cursor' in response.get_json()
 
 
 def test_update_own_profile(client, user_token, app):
@@ -247,7 +489,239 @@ def test_get_place_list(client):
     response = client.get('/api/v1/places/')
 
     assert response.status_code == 200
-    assert isinstance(response.get_json(), list)
+    assert isinstance(response.get_json()['items'], list)
+    assert 'next_cursor' in response.get_json()
+
+
+def test_place_list_cursor_pagination(client, app, user_token):
+    """Test walking the place list page by page with next_cursor"""
+    with app.app_context():
+        facade = get_facade()
+        user = facade.user_facade.get_user_by_email("user@example.com")
+        created_ids = set()
+        for i in range(5):
+            place = facade.place_facade.create_place({
+                'title': f'Paged Place {i}',
+                'price': 50.0 + i,
+                'latitude': 10.0,
+                'longitude': 10.0,
+                'owner_id': user.id
+            })
+            created_ids.add(place.id)
+
+    seen_ids = []
+    cursor = None
+    while True:
+        url = '/api/v1/places/?limit=2'
+        if cursor:
+            url += f'&after={cursor}'
+        response = client.get(url)
+        assert response.status_code == 200
+        page = response.get_json()
+        assert len(page['items']) <= 2
+        seen_ids.extend(place['id'] for place in page['items'])
+        cursor = page['next_cursor']
+        if not cursor:
+            break
+
+    assert len(seen_ids) == len(set(seen_ids))
+    assert created_ids <= set(seen_ids)
+
+
+def test_place_list_price_filter_and_sort(client, app, user_token):
+    """Test price range filtering and price sorting across pages"""
+    with app.app_context():
+        facade = get_facade()
+        user = facade.user_facade.get_user_by_email("user@example.com")
+        for price in [30.0, 120.0, 80.0, 200.0, 50.0, 80.0]:
+            facade.place_facade.create_place({
+                'title': f'Priced {price}', 'price': price,
+                'latitude': 0.0, 'longitude': 0.0, 'owner_id': user.id
+            })
+
+    prices = []
+    url = '/api/v1/places/?min_price=50&max_price=150&sort=-price&limit=2'
+    cursor = None
+    while True:
+        response = client.get(url + (f'&after={cursor}' if cursor else ''))
+        assert response.status_code == 200
+        page = response.get_json()
+        prices.extend(p['price'] for p in page['items'])
+        cursor = page['next_cursor']
+        if not cursor:
+            break
+    assert prices == [120.0, 80.0, 80.0, 50.0]
+
+    response = client.get('/api/v1/places/?sort=-rating')
+    assert response.status_code == 200
+
+    response = client.get('/api/v1/places/?sort=distance')
+    assert response.status_code == 400
+
+
+def check_amenity_filter(app, client):
+    """Create places with amenity combinations and query them with AND/OR"""
+    with app.app_context():
+        facade = get_facade()
+        user = facade.user_facade.get_user_by_email("user@example.com")
+        wifi = facade.amenity_facade.create_amenity({'name': 'WiFi'}).id
+        pool = facade.amenity_facade.create_amenity({'name': 'Pool'}).id
+        ac = facade.amenity_facade.create_amenity({'name': 'AC'}).id
+        ids = {}
+        for title, amenities in [('Both', [wifi, pool]), ('Wifi only', [wifi]),
+                                 ('All three', [wifi, pool, ac]), ('None', [])]:
+            ids[title] = facade.place_facade.create_place({
+                'title': title, 'price': 60.0, 'latitude': 0.0,
+                'longitude': 0.0, 'owner_id': user.id, 'amenities': amenities
+            }).id
+        # update_place réinitialise les amenities: "Wifi only" gagne la piscine
+        facade.place_facade.update_place(ids['Wifi only'], {'amenities': [pool]})
+
+    def titles(query):
+        response = client.get(f'/api/v1/places/?{query}')
+        assert response.status_code == 200
+        return sorted(p['title'] for p in response.get_json()['items'])
+
+    assert titles(f'amenities={wifi},{pool}') == ['All three', 'Both']
+    assert titles(f'amenities={pool},{ac}') == ['All three']
+    assert titles(f'amenities={wifi},{ac}&amenities_match=any') == ['All three', 'Both']
+    assert titles(f'amenities={pool}') == ['All three', 'Both', 'Wifi only']
+
+
+def test_place_list_amenity_filter(client, app, user_token):
+    """Test filtering places by amenities with the SQL GROUP BY path"""
+    check_amenity_filter(app, client)
+
+
+def test_place_list_amenity_filter_with_bitmap_index():
+    """Test filtering places by amenities with the in-process bitmap index"""
+    class BitmapConfig(TestingConfig):
+        AMENITY_BITMAP_INDEX = True
+
+    app = create_app(BitmapConfig)
+    with app.app_context():
+        init_db()
+        get_facade().user_facade.create_user({
+            'first_name': 'Regular', 'last_name': 'User',
+            'email': 'user@example.com', 'password': 'userpassword'
+        })
+        # Charger l'index avant les écritures pour tester sa mise à jour
+        get_facade().place_facade._loaded_amenity_index()
+    check_amenity_filter(app, app.test_client())
+
+
+def test_amenity_bitmap_index_reloads_writes_of_other_workers():
+    """Test the bitmap index picks up links it was not told about"""
+    class BitmapConfig(TestingConfig):
+        AMENITY_BITMAP_INDEX = True
+        AMENITY_BITMAP_RELOAD_INTERVAL = 60
+
+    app = create_app(BitmapConfig)
+    client = app.test_client()
+    with app.app_context():
+        init_db()
+        facade = get_facade()
+        user = facade.user_facade.create_user({
+            'first_name': 'Regular', 'last_name': 'User',
+            'email': 'user@example.com', 'password': 'userpassword'})
+        wifi = facade.amenity_facade.create_amenity({'name': 'Wifi'}).id
+        place_id = facade.place_facade.create_place({
+            'title': 'Elsewhere', 'price': 60.0, 'latitude': 0.0,
+            'longitude': 0.0, 'owner_id': user.id, 'amenities': []}).id
+    assert client.get(f'/api/v1/places/?amenities={wifi}').get_json()['items'] == []
+
+    # Lien écrit par un autre worker, sans passer par cet index
+    with app.app_context():
+        db.session.execute(place_amenity.insert().values(
+            place_id=place_id, amenity_id=wifi))
+        db.session.commit()
+    assert client.get(f'/api/v1/places/?amenities={wifi}').get_json()['items'] == []
+    index = app.extensions['hbnb_facade'].place_facade.amenity_index
+    index.max_age = 0
+    items = client.get(f'/api/v1/places/?amenities={wifi}').get_json()['items']
+    assert [p['id'] for p in items] == [place_id]
+    assert index.reloads >= 1
+
+
+def test_amenity_bitmap_index_reuses_slots():
+    """Test that removed places free their bit for new places"""
+    index = AmenityBitmapIndex()
+    index.load([('p1', 'wifi'), ('p2', 'wifi'), ('p2', 'pool')])
+    index.remove_place('p1')
+    index.add_place_amenity('p3', 'pool')
+    assert sorted(index.query(['wifi', 'pool'], match_all=False)) == ['p2', 'p3']
+    assert index.query(['wifi', 'pool']) == ['p2']
+    assert index.query(['unknown']) == []
+
+
+def test_place_list_query_count_is_flat(client, app, user_token):
+    """Test that serializing a page of places does not issue N+1 queries"""
+    def create_places(count):
+        with app.app_context():
+            facade = get_facade()
+            user = facade.user_facade.get_user_by_email("user@example.com")
+            admin = facade.user_facade.get_user_by_email("admin@example.com")
+            amenity = facade.amenity_facade.create_amenity({'name': 'WiFi'})
+            for i in range(count):
+                place = facade.place_facade.create_place({
+                    'title': f'Batched Place {i}',
+                    'price': 80.0,
+                    'latitude': 20.0,
+                    'longitude': 20.0,
+                    'owner_id': user.id,
+                    'amenities': [amenity.id]
+                })
+                facade.review_facade.create_review({
+                    'text': 'Nice',
+                    'rating': 4,
+                    'user_id': admin.id,
+                    'place_id': place.id
+                })
+
+    def get_places():
+        response = client.get('/api/v1/places/?limit=100')
+        assert response.status_code == 200
+
+    create_places(2)
+    few = count_queries(app, get_places)
+    create_places(6)
+    many = count_queries(app, get_places)
+
+    assert many == few
+    places = client.get('/api/v1/places/?limit=100').get_json()['items']
+    assert all(len(p['amenities']) == 1 and len(p['reviews']) == 1
+               for p in places if p['title'].startswith('Batched'))
+
+
+def test_place_list_invalid_cursor(client):
+    """Test that a malformed cursor is rejected"""
+    response = client.get('/api/v1/places/?after=not-a-cursor')
+    assert response.status_code == 400
+
+
+def test_place_list_forged_cursor(client):
+    """Test that a cursor with values of the wrong type is rejected"""
+    def forge(payload):
+        raw = json.dumps(payload).encode('utf-8')
+        return base64.urlsafe_b64encode(raw).decode('ascii')
+
+    for url, payload in [
+            ('/api/v1/places/', {'s': 'created_at', 'v': 123, 'id': [1]}),
+            ('/api/v1/places/', {'s': 'created_at', 'v': 123, 'dt': False, 'id': 'x'}),
+            ('/api/v1/places/', {'s': 'created_at', 'v': '2024-01-01', 'dt': False, 'id': 'x'}),
+            ('/api/v1/places/?sort=price', {'s': 'price', 'v': 'cheap', 'dt': False, 'id': 'x'}),
+            ('/api/v1/places/?sort=price', {'s': 'price', 'v': 10, 'dt': False, 'id': 7}),
+            ('/api/v1/places/?sort=-rating', {'s': 'rating_score', 'v': True, 'dt': False,
+                                              'id': 'x'}),
+            ('/api/v1/places/search?q=cozy', {'s': 'search', 'v': {'a': 1}, 'dt': False,
+                                              'id': 'x'}),
+            ('/api/v1/users/', {'s': 'created_at', 'v': [], 'dt': True, 'id': 'x'})]:
+        separator = '&' if '?' in url else '?'
+        response = client.get(f'{url}{separator}after={forge(payload)}')
+        assert response.status_code == 400, payload
+
+    valid = forge({'s': 'price', 'v': 10, 'dt': False, 'id': 'x'})
+    assert client.get(f'/api/v1/places/?sort=price&after={valid}').status_code == 200
 
 
 def test_update_own_place(client, user_token, sample_place_id):
@@ -267,6 +741,235 @@ def test_update_own_place(client, user_token, sample_place_id):
     assert response.get_json().get('title') == 'Updated Place'
 
 
+def test_places_search(client, app, user_token):
+    """Test full-text search ranking, snippets, pagination and index sync"""
+    with app.app_context():
+        facade = get_facade()
+        user = facade.user_facade.get_user_by_email("user@example.com")
+        ids = {}
+        for title, description in [
+                ('Cozy loft', 'A quiet apartment near the canal'),
+                ('Seaside villa', 'Large villa with a view on the sea, cozy rooms'),
+                ('Mountain chalet', 'Wooden chalet close to the ski lifts'),
+                ('Cozy studio', 'Small but cozy studio downtown')]:
+            ids[title] = facade.place_facade.create_place({
+                'title': title, 'description': description, 'price': 70.0,
+                'latitude': 0.0, 'longitude': 0.0, 'owner_id': user.id
+            }).id
+
+    response = client.get('/api/v1/places/search?q=cozy&limit=2')
+    assert response.status_code == 200
+    page = response.get_json()
+    # Le titre pèse plus que la description: la villa arrive en dernier
+    assert {p['title'] for p in page['items']} == {'Cozy loft', 'Cozy studio'}
+    assert '<mark>Cozy</mark>' in page['items'][0]['snippets']['title']
+    response = client.get(f"/api/v1/places/search?q=cozy&after={page['next_cursor']}")
+    assert [p['title'] for p in response.get_json()['items']] == ['Seaside villa']
+    assert response.get_json()['next_cursor'] is None
+
+    # Préfixe sur le dernier mot, syntaxe FTS neutralisée
+    response = client.get('/api/v1/places/search?q=chal')
+    assert [p['title'] for p in response.get_json()['items']] == ['Mountain chalet']
+    response = client.get('/api/v1/places/search?q="ski OR')
+    assert response.status_code == 200
+
+    with app.app_context():
+        facade = get_facade()
+        facade.place_facade.update_place(ids['Mountain chalet'], {'title': 'Alpine hut'})
+        facade.place_facade.delete_place(ids['Cozy loft'])
+
+    titles = [p['title'] for p in client.get(
+        '/api/v1/places/search?q=cozy').get_json()['items']]
+    assert titles == ['Cozy studio', 'Seaside villa']
+    assert client.get('/api/v1/places/search?q=alpine').get_json()['items'][0]['id'] \
+        == ids['Mountain chalet']
+    assert client.get('/api/v1/places/search?q=chalet').get_json()['items'][0]['title'] \
+        == 'Alpine hut'
+
+
+def test_places_search_snippets_escape_markup(client, app, user_token):
+    """Test search snippets escape HTML from titles and descriptions"""
+    with app.app_context():
+        facade = get_facade()
+        user = facade.user_facade.get_user_by_email("user@example.com")
+        facade.place_facade.create_place({
+            'title': 'Evil <img src=x onerror=alert(1)> flat',
+            'description': '<script>alert(2)</script> evil twin',
+            'price': 70.0, 'latitude': 0.0, 'longitude': 0.0, 'owner_id': user.id
+        })
+
+    snippets = client.get('/api/v1/places/search?q=evil').get_json()['items'][0]['snippets']
+    assert snippets['title'] == \
+        '<mark>Evil</mark> &lt;img src=x onerror=alert(1)&gt; flat'
+    assert '<script>' not in snippets['description']
+    assert '<mark>evil</mark>' in snippets['description']
+
+
+def test_places_nearby(client, app, user_token):
+    """Test the proximity search filters by radius and sorts by distance"""
+    with app.app_context():
+        facade = get_facade()
+        user = facade.user_facade.get_user_by_email("user@example.com")
+        # Autour de Paris: ~0 km, ~3.6 km, ~10 km, et Lyon (~390 km)
+        for title, lat, lng in [('Louvre', 48.8606, 2.3376),
+                                ('Montmartre', 48.8867, 2.3431),
+                                ('Chatelet', 48.8584, 2.3470),
+                                ('Versailles', 48.8049, 2.1204),
+                                ('Lyon', 45.7640, 4.8357)]:
+            facade.place_facade.create_place({
+                'title': title, 'price': 90.0, 'latitude': lat,
+                'longitude': lng, 'owner_id': user.id
+            })
+
+    response = client.get(
+        '/api/v1/places/nearby?lat=48.8600&lng=2.3400&radius_km=5')
+    assert response.status_code == 200
+    items = response.get_json()['items']
+    assert [p['title'] for p in items] == ['Louvre', 'Chatelet', 'Montmartre']
+    distances = [p['distance_km'] for p in items]
+    assert distances == sorted(distances)
+    assert all(d <= 5 for d in distances)
+
+    response = client.get(
+        '/api/v1/places/nearby?lat=48.8600&lng=2.3400&radius_km=50&limit=4')
+    assert [p['title'] for p in response.get_json()['items']][-1] == 'Versailles'
+
+
+def test_places_bulk(client, app, user_token, admin_token, sample_amenity_id):
+    """Test bulk create/update/delete of places with per-item results"""
+    headers = {'Authorization': f'Bearer {user_token}'}
+    admin_headers = {'Authorization': f'Bearer {admin_token}'}
+    create = [{'title': f'Bulk {i}', 'price': 10.0 + i, 'latitude': 1.0,
+               'longitude': 2.0, 'amenities': [sample_amenity_id]} for i in range(50)]
+    create.append({'title': 'No price', 'latitude': 1.0, 'longitude': 2.0})
+
+    statements = []
+
+    def run():
+        statements.append(client.post('/api/v1/places/bulk',
+                                      json={'create': create}, headers=headers))
+    query_count = count_queries(app, run)
+    response = statements[0]
+    assert response.status_code == 200
+    results = response.get_json()['create']
+    assert [result['status'] for result in results] == [201] * 50 + [400]
+    # Une transaction et des INSERT groupés, pas une requête par lieu
+    assert query_count < 20
+
+    ids = [result['id'] for result in results[:50]]
+    place = client.get(f'/api/v1/places/{ids[0]}').get_json()
+    assert place['amenities'][0]['id'] == sample_amenity_id
+
+    response = client.post('/api/v1/places/bulk', json={
+        'update': [{'id': ids[0], 'price': 99.0, 'amenities': []},
+                   {'id': 'missing', 'price': 5.0},
+                   {'id': ids[1], 'price': -1}],
+        'delete': ids[2:4]
+    }, headers=headers)
+    results = response.get_json()
+    assert [r['status'] for r in results['update']] == [200, 404, 400]
+    # La suppression est réservée aux admins
+    assert [r['status'] for r in results['delete']] == [403, 403]
+
+    place = client.get(f'/api/v1/places/{ids[0]}').get_json()
+    assert place['price'] == 99.0
+    assert place['amenities'] == []
+
+    response = client.post('/api/v1/places/bulk', json={
+        'delete': [ids[2], 'missing']}, headers=admin_headers)
+    assert [r['status'] for r in response.get_json()['delete']] == [200, 404]
+    assert client.get(f'/api/v1/places/{ids[2]}').status_code == 404
+
+    response = client.post('/api/v1/places/bulk', json={'create': {}}, headers=headers)
+    assert response.status_code == 400
+
+
+def test_places_bulk_validates_each_item(client, user_token, sample_amenity_id):
+    """Test bulk items follow the Place validation rules, with per-item 400s"""
+    headers = {'Authorization': f'Bearer {user_token}'}
+    response = client.post('/api/v1/places/bulk', json={'create': [
+        {'title': 'Valid', 'price': 10.0, 'latitude': 1.0, 'longitude': 2.0,
+         'amenities': [sample_amenity_id]},
+        {'title': 'Bad amenities', 'price': 10.0, 'latitude': 1.0, 'longitude': 2.0,
+         'amenities': 'ab'},
+        {'title': 'Bad latitude', 'price': 10.0, 'latitude': 500, 'longitude': 2.0},
+    ]}, headers=headers)
+    assert response.status_code == 200
+    results = response.get_json()['create']
+    assert [result['status'] for result in results] == [201, 400, 400]
+    place_id = results[0]['id']
+
+    response = client.post('/api/v1/places/bulk', json={'update': [
+        {'id': place_id, 'title': None},
+        {'id': place_id, 'latitude': 'abc'},
+        {'id': place_id, 'latitude': 500},
+        {'id': place_id, 'longitude': -181},
+        {'id': place_id, 'title': 'x' * 101},
+        {'id': place_id, 'price': 'free'},
+        {'id': place_id, 'amenities': 'ab'},
+        {'id': place_id, 'amenities': [sample_amenity_id, 3]},
+    ]}, headers=headers)
+    assert response.status_code == 200
+    assert [result['status'] for result in response.get_json()['update']] == [400] * 8
+
+    place = client.get(f'/api/v1/places/{place_id}').get_json()
+    assert (place['title'], place['latitude']) == ('Valid', 1.0)
+    assert [amenity['id'] for amenity in place['amenities']] == [sample_amenity_id]
+
+
+def test_places_nearby_invalid_coordinates(client):
+    """Test the proximity search rejects out of range coordinates"""
+    response = client.get('/api/v1/places/nearby?lat=120&lng=2.34')
+    assert response.status_code == 400
+    for radius in ('nan', 'inf', '-inf', '0', '-5', '20000'):
+        response = client.get(f'/api/v1/places/nearby?lat=48.86&lng=2.34&radius_km={radius}')
+        assert response.status_code == 400, radius
+
+
+def test_place_sparse_fieldsets(client, app, admin_token, sample_place_id, sample_amenity_id):
+    """Test ?fields= and ?include= trim places and skip unrequested relationships"""
+    client.post(f'/api/v1/places/{sample_place_id}/reviews', json={'text': 'Nice', 'rating': 5},
+                headers={'Authorization': f'Bearer {admin_token}'})
+
+    def get_pins():
+        response = client.get('/api/v1/places/?fields=id,latitude,longitude,price')
+        assert response.status_code == 200
+        assert response.get_json()['items'] == [{
+            'id': sample_place_id, 'latitude': 40.712776,
+            'longitude': -74.005974, 'price': 100.0}]
+    assert count_selects(app, 'reviews', get_pins) == 0
+    assert count_selects(app, 'place_amenity', get_pins) == 0
+
+    place = client.get(f'/api/v1/places/{sample_place_id}?include=reviews').get_json()
+    assert 'amenities' not in place and len(place['reviews']) == 1
+    assert place['title'] == 'Test Place'
+
+    place = client.get(f'/api/v1/places/{sample_place_id}?fields=title,amenities').get_json()
+    assert place == {'title': 'Test Place', 'amenities': []}
+
+    assert client.get('/api/v1/places/?fields=id,secret').status_code == 400
+    assert client.get(f'/api/v1/places/{sample_place_id}?include=owner').status_code == 400
+    review = client.get(f'/api/v1/places/{sample_place_id}/reviews?fields=rating').get_json()
+    assert review == [{'rating': 5}]
+
+
+def test_amenity_list_takes_one_query(client, app):
+    """Test the amenity list cost does not grow with the number of amenities"""
+    def create_amenities(names):
+        with app.app_context():
+            for name in names:
+                get_facade().amenity_facade.create_amenity({'name': name})
+
+    def get_amenities():
+        assert client.get('/api/v1/amenities/').status_code == 200
+
+    create_amenities(['Pool', 'Gym'])
+    few = count_queries(app, get_amenities)
+    create_amenities([f'Extra {i}' for i in range(8)])
+    assert count_queries(app, get_amenities) == few
+    assert count_selects(app, 'place_amenity', get_amenities) == 0
+
+
 # ============= REVIEW TESTS =============
 
 def test_create_review(client, admin_token, sample_place_id):
@@ -313,6 +1016,128 @@ def test_cannot_review_own_place(client, user_token, sample_place_id):
     assert 'error' in response.get_json()
 
 
+def test_cannot_review_place_twice(client, admin_token, sample_place_id):
+    """Test that a second review of the same place is rejected"""
+    headers = {'Authorization': f'Bearer {admin_token}'}
+    review_data = {'text': 'Great place!', 'rating': 5}
+
+    first = client.post(f'/api/v1/places/{sample_place_id}/reviews',
+                        json=review_data, headers=headers)
+    second = client.post(f'/api/v1/places/{sample_place_id}/reviews',
+                         json=review_data, headers=headers)
+    assert first.status_code == 201
+    assert second.status_code == 400
+
+
+def test_duplicate_review_blocked_by_unique_index(app, sample_place_id):
+    """Test the unique index rejects a duplicate that skipped the EXISTS check"""
+    with app.app_context():
+        facade = get_facade()
+        admin = facade.user_facade.get_user_by_email("admin@example.com")
+        review_data = {'text': 'Twice', 'rating': 2,
+                       'user_id': admin.id, 'place_id': sample_place_id}
+        facade.review_facade.create_review(dict(review_data))
+
+        with pytest.raises(ValueError):
+            facade.review_facade.create_review(dict(review_data))
+
+        place = facade.place_facade.get_place(sample_place_id)
+        assert place.review_count == 1
+
+
+def test_rating_aggregates_follow_reviews(client, app, admin_token, sample_place_id):
+    """Test review_count/avg_rating are maintained on create, update and delete"""
+    headers = {'Authorization': f'Bearer {admin_token}'}
+    response = client.post(f'/api/v1/places/{sample_place_id}/reviews',
+                           json={'text': 'Good', 'rating': 4}, headers=headers)
+    review_id = response.get_json()['id']
+
+    place = client.get(f'/api/v1/places/{sample_place_id}').get_json()
+    assert place['review_count'] == 1
+    assert place['avg_rating'] == 4
+
+    client.put(f'/api/v1/reviews/{review_id}',
+               json={'text': 'Perfect', 'rating': 5}, headers=headers)
+    place = client.get(f'/api/v1/places/{sample_place_id}').get_json()
+    assert place['avg_rating'] == 5
+
+    client.delete(f'/api/v1/reviews/{review_id}', headers=headers)
+    place = client.get(f'/api/v1/places/{sample_place_id}').get_json()
+    assert place['review_count'] == 0
+    assert place['avg_rating'] is None
+
+
+def test_recompute_ratings_command(app, admin_token, sample_place_id):
+    """Test the repair command rebuilds the aggregates from the reviews"""
+    with app.app_context():
+        facade = get_facade()
+        admin = facade.user_facade.get_user_by_email("admin@example.com")
+        facade.review_facade.create_review({
+            'text': 'Fine', 'rating': 3,
+            'user_id': admin.id, 'place_id': sample_place_id
+        })
+        place = facade.place_facade.get_place(sample_place_id)
+        place.review_count = 42
+        place.rating_sum = 0
+        db.session.commit()
+
+    result = app.test_cli_runner().invoke(args=['hbnb', 'recompute-ratings'])
+    assert result.exit_code == 0
+
+    with app.app_context():
+        place = get_facade().place_facade.get_place(sample_place_id)
+        assert place.review_count == 1
+        assert place.avg_rating == 3
+
+
+def test_reviews_bulk_maintains_aggregates(client, app, admin_token, user_token):
+    """Test bulk reviews follow the single-review rules and keep aggregates right"""
+    headers = {'Authorization': f'Bearer {user_token}'}
+    admin_headers = {'Authorization': f'Bearer {admin_token}'}
+    places = [{'title': f'Reviewed {i}', 'price': 50.0, 'latitude': 1.0,
+               'longitude': 2.0} for i in range(3)]
+    results = client.post('/api/v1/places/bulk', json={'create': places},
+                          headers=headers).get_json()['create']
+    place_ids = [result['id'] for result in results]
+
+    response = client.post('/api/v1/reviews/bulk', json={'create': [
+        {'text': 'Great', 'rating': 5, 'place_id': place_ids[0]},
+        {'text': 'Okay', 'rating': 3, 'place_id': place_ids[1]},
+        {'text': 'Again', 'rating': 1, 'place_id': place_ids[0]},
+        {'text': 'Bad rating', 'rating': 9, 'place_id': place_ids[2]},
+        {'text': 'Nowhere', 'rating': 4, 'place_id': 'missing'}
+    ]}, headers=admin_headers)
+    results = response.get_json()['create']
+    assert [r['status'] for r in results] == [201, 201, 400, 400, 404]
+
+    # Le propriétaire ne peut pas noter ses propres lieux
+    response = client.post('/api/v1/reviews/bulk', json={'create': [
+        {'text': 'Mine', 'rating': 5, 'place_id': place_ids[2]}]}, headers=headers)
+    assert response.get_json()['create'][0]['status'] == 400
+
+    review_ids = [results[0]['id'], results[1]['id']]
+    response = client.post('/api/v1/reviews/bulk', json={
+        'update': [{'id': review_ids[0], 'text': 'Still great', 'rating': 4}],
+        'delete': [review_ids[1]]
+    }, headers=headers)
+    results = response.get_json()
+    assert results['update'][0]['status'] == 403
+    assert results['delete'][0]['status'] == 403
+
+    response = client.post('/api/v1/reviews/bulk', json={
+        'update': [{'id': review_ids[0], 'text': 'Still great', 'rating': 4}],
+        'delete': [review_ids[1]]
+    }, headers=admin_headers)
+    results = response.get_json()
+    assert results['update'][0]['status'] == 200
+    assert results['delete'][0]['status'] == 200
+
+    first = client.get(f'/api/v1/places/{place_ids[0]}').get_json()
+    second = client.get(f'/api/v1/places/{place_ids[1]}').get_json()
+    assert (first['review_count'], first['avg_rating']) == (1, 4)
+    assert (second['review_count'], second['avg_rating']) == (0, None)
+
+
 # ============= AMENITY TESTS =============
 
 def test_create_amenity_as_admin(client, admin_token):
@@ -342,12 +1167,37 @@ def test_create_amenity_as_regular_user(client, user_token):
     assert response.status_code == 403
 
 
+def test_amenities_bulk(client, admin_token, user_token):
+    """Test bulk amenity creation and update (admin only)"""
+    headers = {'Authorization': f'Bearer {admin_token}'}
+    response = client.post('/api/v1/amenities/bulk', json={'create': [
+        {'name': 'Sauna'}, {'name': 'Jacuzzi', 'description': 'Hot tub'}, {'name': ''}
+    ]}, headers=headers)
+    results = response.get_json()['create']
+    assert [r['status'] for r in results] == [201, 201, 400]
+
+    response = client.post('/api/v1/amenities/bulk', json={'update': [
+        {'id': results[0]['id'], 'name': 'Finnish sauna'}, {'id': 'missing', 'name': 'X'}
+    ]}, headers=headers)
+    assert [r['status'] for r in response.get_json()['update']] == [200, 404]
+    amenity = client.get(f"/api/v1/amenities/{results[0]['id']}").get_json()
+    assert amenity['name'] == 'Finnish sauna'
+
+    response = client.post('/api/v1/amenities/bulk', json={'delete': [results[0]['id']]},
+                           headers=headers)
+    assert response.status_code == 400
+
+    response = client.post('/api/v1/amenities/bulk', json={'create': [{'name': 'Pool'}]},
+                           headers={'Authorization': f'Bearer {user_token}'})
+    assert response.status_code == 403
+
+
 def test_get_amenity_list(client):
     """Test getting list of amenities"""
     response = client.get('/api/v1/amenities/')
 
     assert response.status_code == 200
-    assert isinstance(response.get_json(), list)
+    assert isinstance(response.get_json()['items'], list)
 
 
 def test_add_amenity_to_place(client, user_token, sample_place_id, sample_amenity_id):
@@ -375,6 +1225,648 @@ def test_add_amenity_to_place(client, user_token, sample_place_id, sample_amenit
     assert sample_amenity_id in amenity_ids
 
 
+def test_amenity_places_count_follows_links(client, app, admin_token, user_token):
+    """Test places_count is kept up to date by place creation, update and deletion"""
+    headers = {'Authorization': f'Bearer {user_token}'}
+    with app.app_context():
+        wifi, pool = (get_facade().amenity_facade.create_amenity({'name': name}).id
+                      for name in ('Wifi', 'Pool'))
+
+    def counts():
+        return {item['id']: item['places_count'] for item
+                in client.get('/api/v1/amenities/').get_json()['items']}
+
+    place_id = client.post('/api/v1/places/', json={
+        'title': 'Counted', 'price': 80.0, 'latitude': 1.0, 'longitude': 1.0,
+        'amenities': [wifi, pool]}, headers=headers).get_json()['id']
+    assert counts() == {wifi: 1, pool: 1}
+
+    client.put(f'/api/v1/places/{place_id}', json={'amenities': [pool]}, headers=headers)
+    assert counts() == {wifi: 0, pool: 1}
+
+    client.post('/api/v1/places/bulk', json={
+        'create': [{'title': 'Bulk', 'price': 50.0, 'latitude': 1.0, 'longitude': 1.0,
+                    'amenities': [wifi]}],
+        'update': [{'id': place_id, 'amenities': [wifi]}]}, headers=headers)
+    assert counts() == {wifi: 2, pool: 0}
+
+    client.delete(f'/api/v1/places/{place_id}',
+                  headers={'Authorization': f'Bearer {admin_token}'})
+    assert counts() == {wifi: 1, pool: 0}
+
+    with app.app_context():
+        get_facade().amenity_facade.get_amenity(wifi).places_count = 7
+        db.session.commit()
+    result = app.test_cli_runner().invoke(args=['hbnb', 'recompute-amenity-counts'])
+    assert result.exit_code == 0
+    assert counts() == {wifi: 1, pool: 0}
+
+
+# ============= TRANSACTION TESTS =============
+
+def count_commits(app, func):
+    commits = []
+    with app.app_context():
+        engine = db.engine
+    listener = lambda conn: commits.append(conn)
+    event.listen(engine, 'commit', listener)
+    try:
+        func()
+    finally:
+        event.remove(engine, 'commit', listener)
+    return len(commits)
+
+
+def test_facade_transaction_is_atomic(app, user_token):
+    """Test facade.transaction() commits once and rolls back everything on error"""
+    with app.app_context():
+        facade = get_facade()
+        user = facade.user_facade.get_user_by_email("user@example.com")
+
+        def create_two():
+            with facade.transaction():
+                facade.amenity_facade.create_amenity({'name': 'Tx wifi'})
+                facade.place_facade.create_place({
+                    'title': 'Tx place', 'price': 10.0, 'latitude': 1.0,
+                    'longitude': 1.0, 'owner_id': user.id, 'amenities': []})
+        assert count_commits(app, create_two) == 1
+
+        with pytest.raises(RuntimeError):
+            with facade.transaction():
+                facade.amenity_facade.create_amenity({'name': 'Rolled back'})
+                raise RuntimeError("boom")
+        names = [amenity.name for amenity in facade.amenity_facade.get_all_amenities()]
+        assert 'Tx wifi' in names
+        assert 'Rolled back' not in names
+
+
+def test_request_commits_once(client, app, user_token, sample_place_id, sample_amenity_id):
+    """Test a write request is committed once at the end of the request"""
+    headers = {'Authorization': f'Bearer {user_token}'}
+
+    def update():
+        response = client.put(f'/api/v1/places/{sample_place_id}', json={
+            'title': 'Renamed', 'price': 120.0, 'amenities': [sample_amenity_id]
+        }, headers=headers)
+        assert response.status_code == 200
+    assert count_commits(app, update) == 1
+
+
+def test_failed_request_is_rolled_back(app):
+    """Test writes of a request answering with an error status are discarded"""
+    def create_then_fail():
+        get_facade().amenity_facade.create_amenity({'name': 'Half written'})
+        return {'error': 'later step failed'}, 400
+
+    app.add_url_rule('/test/half-write', 'half_write', create_then_fail, methods=['POST'])
+    assert app.test_client().post('/test/half-write').status_code == 400
+
+    with app.app_context():
+        names = [amenity.name for amenity in get_facade().amenity_facade.get_all_amenities()]
+        assert 'Half written' not in names
+
+
+# ============= CACHE TESTS =============
+
+def count_selects(app, table, func):
+    statements = []
+    with app.app_context():
+        engine = db.engine
+
+    def listener(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().startswith('SELECT') and f'FROM {table}' in statement:
+            statements.append(statement)
+    event.listen(engine, 'before_cursor_execute', listener)
+    try:
+        func()
+    finally:
+        event.remove(engine, 'before_cursor_execute', listener)
+    return len(statements)
+
+
+def test_entity_cache_read_through(client, app, admin_token, sample_amenity_id):
+    """Test repeated lookups are served by the cache and writes invalidate it"""
+    headers = {'Authorization': f'Bearer {admin_token}'}
+    url = f'/api/v1/amenities/{sample_amenity_id}'
+    assert client.get(url).status_code == 200
+    assert count_selects(app, 'amenities', lambda: client.get(url)) == 0
+
+    response = client.put(url, json={'name': 'Fibre'}, headers=headers)
+    assert response.status_code == 200
+    assert client.get(url).get_json()['name'] == 'Fibre'
+
+    stats = client.get('/api/v1/stats/cache', headers=headers).get_json()
+    assert stats['enabled']
+    assert stats['local']['hits'] >= 1
+    assert stats['invalidations'] >= 1
+
+
+def test_entity_cache_invalidated_by_bulk_statements(app, sample_place_id):
+    """Test set-based UPDATE/DELETE drop the cached rows of the table"""
+    with app.app_context():
+        facade = get_facade()
+        facade.place_facade.get_place(sample_place_id)
+    with app.app_context():
+        facade = get_facade()
+        db.session.execute(db.update(Place).values(title='Bulk renamed'))
+        db.session.commit()
+    with app.app_context():
+        place = get_facade().place_facade.get_place(sample_place_id)
+        assert place.title == 'Bulk renamed'
+        get_facade().place_facade.delete_places([sample_place_id], is_admin=True)
+    with app.app_context():
+        assert get_facade().place_facade.get_place(sample_place_id) is None
+
+
+def test_entity_cache_not_filled_from_replica(tmp_path):
+    """Test a lagging replica read does not outlive the replication in the cache"""
+    primary, replica = tmp_path / 'primary.db', tmp_path / 'replica.db'
+
+    class ReplicaConfig(TestingConfig):
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{primary}'
+        SQLALCHEMY_REPLICA_URIS = [f'sqlite:///{replica}']
+
+    app = create_app(ReplicaConfig)
+
+    def replicate():
+        app.extensions['hbnb_replicas'][0].dispose()
+        shutil.copy(primary, replica)
+
+    with app.app_context():
+        init_db()
+        amenity_id = get_facade().amenity_facade.create_amenity({'name': 'Old'}).id
+    replicate()
+    client = app.test_client()
+    url = f'/api/v1/amenities/{amenity_id}'
+    assert client.get(url).get_json()['name'] == 'Old'
+
+    # Écriture sur la base principale, réplica pas encore à jour
+    with app.app_context():
+        get_facade().amenity_facade.update_amenity(amenity_id, {'name': 'New'})
+    assert client.get(url).get_json()['name'] == 'Old'
+    replicate()
+    assert client.get(url).get_json()['name'] == 'New'
+
+
+def test_entity_cache_skips_set_after_invalidation(app):
+    """Test a read started before an invalidation does not fill the cache"""
+    cache = app.extensions['hbnb_entity_cache']
+    generation = cache.generation
+    cache.invalidate(['amenities:1'])
+    cache.set('amenities:1', {'name': 'Old'}, generation)
+    assert cache.get('amenities:1') is None
+    cache.set('amenities:1', {'name': 'New'}, cache.generation)
+    assert cache.get('amenities:1') == {'name': 'New'}
+
+
+def test_entity_cache_shared_backend():
+    """Test the shared tier serves a process whose local LRU is cold"""
+    class SharedCacheConfig(TestingConfig):
+        ENTITY_CACHE_SHARED_URL = 'local'
+
+    app = create_app(SharedCacheConfig)
+    with app.app_context():
+        init_db()
+        seed_admin()
+        cache = app.extensions['hbnb_entity_cache']
+        admin = get_facade().user_facade.get_user_by_email('admin@example.com')
+        admin_id = admin.id
+    with app.app_context():
+        get_facade().user_facade.get_user(admin_id)
+    cache.local.clear()
+    with app.app_context():
+        user = get_facade().user_facade.get_user(admin_id)
+        assert user.email == 'admin@example.com'
+        assert user.created_at is not None
+    assert cache.shared.stats()['hits'] == 1
+
+
+def test_lru_cache_eviction_and_ttl():
+    """Test the LRU evicts the least recently used entry and honours the TTL"""
+    lru = LRUCache(max_entries=2, ttl=60)
+    lru.set('a', 1)
+    lru.set('b', 2)
+    lru.get('a')
+    lru.set('c', 3)
+    assert lru.get('b') is None
+    assert lru.get('a') == 1
+    assert lru.stats()['evictions'] == 1
+
+    expired = LRUCache(max_entries=2, ttl=0)
+    expired.set('a', 1)
+    assert expired.get('a') is None
+    assert expired.stats()['expirations'] == 1
+
+
+def test_place_conditional_get(client, admin_token, sample_place_id):
+    """Test place detail answers 304 to a matching If-None-Match until a review changes it"""
+    url = f'/api/v1/places/{sample_place_id}'
+    response = client.get(url)
+    etag = response.headers['ETag']
+    assert response.headers['Cache-Control'] == 'no-cache'
+
+    response = client.get(url, headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.data == b''
+    assert response.headers['ETag'] == etag
+
+    client.post(f'{url}/reviews', json={'text': 'Lovely', 'rating': 4},
+                headers={'Authorization': f'Bearer {admin_token}'})
+    response = client.get(url, headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+    assert response.get_json()['review_count'] == 1
+
+
+def test_list_and_amenity_conditional_get(client, app, admin_token, sample_amenity_id):
+    """Test list endpoints and amenities honour If-None-Match and the configured Cache-Control"""
+    for url in ('/api/v1/places/', '/api/v1/reviews/', '/api/v1/amenities/',
+                f'/api/v1/amenities/{sample_amenity_id}'):
+        etag = client.get(url).headers['ETag']
+        assert client.get(url, headers={'If-None-Match': etag}).status_code == 304
+
+    url = f'/api/v1/amenities/{sample_amenity_id}'
+    response = client.get(url)
+    assert response.headers['Cache-Control'] == app.config['HTTP_CACHE_CONTROL']['amenity']
+    client.put(url, json={'name': 'Sauna'},
+               headers={'Authorization': f'Bearer {admin_token}'})
+    assert client.get(url, headers={'If-None-Match': response.headers['ETag']}).status_code == 200
+
+
+def test_principal_cache_skips_database(client, app, user_token):
+    """Test that a cached token principal needs no query"""
+    headers = {'Authorization': f'Bearer {user_token}'}
+    assert client.get('/api/v1/protected', headers=headers).status_code == 200
+    assert count_queries(app, lambda: client.get('/api/v1/protected', headers=headers)) == 0
+    stats = app.extensions['hbnb_principal_cache'].stats()
+    assert stats['hits'] == 1 and stats['misses'] == 1
+
+
+def test_principal_cache_invalidated_on_admin_change(client, app, admin_token):
+    """Test that demoting an admin takes effect on tokens already in use"""
+    headers = {'Authorization': f'Bearer {admin_token}'}
+    assert client.get('/api/v1/stats/principals', headers=headers).status_code == 200
+    with app.app_context():
+        facade = get_facade()
+        admin_id = facade.user_facade.get_user_by_email('admin@example.com').id
+        facade.user_facade.update_user(admin_id, {'first_name': 'Still'})
+    assert app.extensions['hbnb_principal_cache'].stats()['invalidations'] == 0
+
+    with app.app_context():
+        facade.user_facade.update_user(admin_id, {'is_admin': False})
+    response = client.get('/api/v1/stats/principals', headers=headers)
+    assert response.status_code == 403
+
+
+def test_token_of_deleted_user_is_rejected(client, app):
+    """Test that a token whose user no longer exists answers 401"""
+    with app.app_context():
+        token = create_access_token(identity='no-such-user',
+                                    additional_claims={'is_admin': True})
+    response = client.get('/api/v1/protected',
+                          headers={'Authorization': f'Bearer {token}'})
+    assert response.status_code == 401
+
+
+# ============= EXPORT TESTS =============
+
+def test_ndjson_export_streams_and_resumes(client, app, admin_token, user_token):
+    """Test /export/<table>.ndjson streams every row by id and resumes after an id"""
+    with app.app_context():
+        owner = get_facade().user_facade.get_user_by_email('user@example.com')
+        get_facade().place_facade.create_places([
+            {'title': f'Export {i}', 'price': 10.0 + i, 'latitude': 1.0,
+             'longitude': 1.0, 'amenities': []} for i in range(5)], owner.id)
+    app.config['EXPORT_BATCH_SIZE'] = 2
+    headers = {'Authorization': f'Bearer {admin_token}'}
+
+    response = client.get('/api/v1/export/places.ndjson', headers=headers)
+    assert response.status_code == 200
+    assert response.is_streamed
+    assert response.mimetype == 'application/x-ndjson'
+    rows = [json.loads(line) for line in response.data.decode().splitlines()]
+    ids = [row['id'] for row in rows]
+    assert len(rows) == 5 and ids == sorted(ids)
+    assert rows[0]['title'].startswith('Export')
+
+    resumed = client.get(f'/api/v1/export/places.ndjson?after={ids[1]}', headers=headers)
+    assert [json.loads(line)['id'] for line in resumed.data.decode().splitlines()] == ids[2:]
+
+    users = client.get('/api/v1/export/users.ndjson', headers=headers).data.decode()
+    assert 'user@example.com' in users and 'password' not in users
+
+    assert client.get('/api/v1/export/secrets.ndjson', headers=headers).status_code == 404
+    assert client.get('/api/v1/export/places.ndjson', headers={
+        'Authorization': f'Bearer {user_token}'}).status_code == 403
+
+
+# ============= COMPRESSION TESTS =============
+
+def test_gzip_compression_is_negotiated(client, app):
+    """Test JSON lists are gzipped for clients that accept it, and 304 still works"""
+    with app.app_context():
+        admin = get_facade().user_facade.get_user_by_email('admin@example.com')
+        get_facade().place_facade.create_places([
+            {'title': f'Gzip {i}', 'description': 'Same words again and again',
+             'price': 50.0, 'latitude': 1.0, 'longitude': 1.0, 'amenities': []}
+            for i in range(5)], admin.id)
+
+    plain = client.get('/api/v1/places/')
+    assert 'Content-Encoding' not in plain.headers
+    assert 'Accept-Encoding' in plain.headers['Vary']
+
+    response = client.get('/api/v1/places/', headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert len(response.data) < len(plain.data)
+    assert gzip.decompress(response.data) == plain.data
+
+    # L'ETag devient faible mais reste accepté par If-None-Match
+    etag = response.headers['ETag']
+    assert etag.startswith('W/')
+    assert client.get('/api/v1/places/', headers={
+        'Accept-Encoding': 'gzip', 'If-None-Match': etag}).status_code == 304
+
+    refused = client.get('/api/v1/places/', headers={'Accept-Encoding': 'gzip;q=0'})
+    assert 'Content-Encoding' not in refused.headers
+    small = client.get('/api/v1/amenities/', headers={'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in small.headers
+
+
+def test_vary_accept_encoding_on_every_compressible_response(client):
+    """Test 304, HEAD and small responses carry the same Vary as the compressed 200"""
+    response = client.get('/api/v1/places/', headers={'Accept-Encoding': 'gzip'})
+    etag = response.headers['ETag']
+
+    not_modified = client.get('/api/v1/places/', headers={
+        'Accept-Encoding': 'gzip', 'If-None-Match': etag})
+    assert not_modified.status_code == 304
+    assert not_modified.headers.get_all('Vary') == ['Accept-Encoding']
+
+    head = client.head('/api/v1/places/', headers={'Accept-Encoding': 'gzip'})
+    assert 'Accept-Encoding' in head.headers['Vary']
+    small = client.get('/api/v1/amenities/', headers={'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in small.headers
+    assert 'Accept-Encoding' in small.headers['Vary']
+
+
+def test_large_bodies_are_compressed_as_a_stream(app):
+    """Test bodies above COMPRESS_STREAM_MIN_SIZE are sent as a compressed stream"""
+    payload = [{'index': index, 'text': 'lorem ipsum ' * 10} for index in range(2000)]
+    app.add_url_rule('/test/large', 'large', lambda: payload)
+    app.config['COMPRESS_STREAM_MIN_SIZE'] = 64 * 1024
+
+    response = app.test_client().get('/test/large', headers={'Accept-Encoding': 'gzip'})
+    assert response.is_streamed
+    assert 'Content-Length' not in response.headers
+    assert json.loads(gzip.decompress(response.data)) == payload
+
+
+
+def test_production_sqlite_pragmas(tmp_path):
+    """Test the production profile applies WAL and the pool options"""
+    class FileProductionConfig(ProductionConfig):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'prod.db'}"
+
+    app = create_app(FileProductionConfig)
+    with app.app_context():
+        assert db.session.execute(db.text('PRAGMA journal_mode')).scalar() == 'wal'
+        assert db.session.execute(db.text('PRAGMA synchronous')).scalar() == 1
+        assert db.session.execute(db.text('PRAGMA busy_timeout')).scalar() == 5000
+        assert db.engine.pool.size() == ProductionConfig.SQLALCHEMY_ENGINE_OPTIONS['pool_size']
+
+    class BadPragmaConfig(TestingConfig):
+        SQLITE_PRAGMAS = {'journal_mode; DROP TABLE users': 'WAL'}
+
+    with pytest.raises(ValueError):
+        create_app(BadPragmaConfig)
+
+
+def test_reads_are_routed_to_replicas(tmp_path):
+    """Test reads go to the replica and stick to the primary after a write"""
+    primary, replica = tmp_path / 'primary.db', tmp_path / 'replica.db'
+
+    class ReplicaConfig(TestingConfig):
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{primary}'
+        SQLALCHEMY_REPLICA_URIS = [f'sqlite:///{replica}']
+
+    app = create_app(ReplicaConfig)
+    with app.app_context():
+        init_db()
+
+    def replicate():
+        app.extensions['hbnb_replicas'][0].dispose()
+        shutil.copy(primary, replica)
+
+    def write_then_read():
+        facade = get_facade()
+        amenity = facade.amenity_facade.create_amenity({'name': 'Sauna'})
+        names = [a.name for a in facade.amenity_facade.get_all_amenities()]
+        return {'id': amenity.id, 'names': names}, 201
+
+    app.add_url_rule('/test/write-then-read', 'write_then_read',
+                     write_then_read, methods=['POST'])
+    replicate()
+    client = app.test_client()
+
+    # Dans la requête qui écrit, les lectures suivantes voient l'écriture
+    response = client.post('/test/write-then-read')
+    assert 'Sauna' in response.get_json()['names']
+    amenity_id = response.get_json()['id']
+
+    # Requête suivante: lecture sur le réplica, pas encore répliqué
+    assert client.get(f'/api/v1/amenities/{amenity_id}').status_code == 404
+    replicate()
+    assert client.get(f'/api/v1/amenities/{amenity_id}').status_code == 200
+
+
+# ============= STARTUP TESTS =============
+
+def test_create_app_runs_no_sql(tmp_path):
+    """Test creating the app issues no statement and creates no table"""
+    class StartupConfig(TestingConfig):
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{tmp_path / "startup.db"}'
+
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(Engine, 'before_cursor_execute', record)
+    try:
+        app = create_app(StartupConfig)
+    finally:
+        event.remove(Engine, 'before_cursor_execute', record)
+    assert statements == []
+    with app.app_context():
+        assert inspect(db.engine).get_table_names() == []
+
+
+def test_init_db_and_seed_admin_commands(tmp_path):
+    """Test the CLI creates the schema, then the admin once"""
+    class StartupConfig(TestingConfig):
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{tmp_path / "startup.db"}'
+
+    app = create_app(StartupConfig)
+    runner = app.test_cli_runner()
+    result = runner.invoke(args=['hbnb', 'init-db'])
+    assert result.exit_code == 0
+    assert 'Database schema created' in result.output
+    result = runner.invoke(args=['hbnb', 'seed-admin'])
+    assert 'Admin account created' in result.output
+    result = runner.invoke(args=['hbnb', 'seed-admin'])
+    assert 'Admin account already exists' in result.output
+    with app.app_context():
+        admin = get_facade().user_facade.get_user_by_email('admin@example.com')
+        assert admin.is_admin
+
+
+def test_migrate_adds_missing_columns(tmp_path):
+    """Test migrate upgrades a database created before the geohash column"""
+    class StartupConfig(TestingConfig):
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{tmp_path / "old.db"}'
+
+    app = create_app(StartupConfig)
+    with app.app_context():
+        init_db()
+        user = get_facade().user_facade.create_user({
+            'first_name': 'Old', 'last_name': 'Schema',
+            'email': 'old@example.com', 'password': 'oldpassword'})
+        get_facade().place_facade.create_place({
+            'title': 'Old place', 'price': 50.0, 'latitude': 48.8566,
+            'longitude': 2.3522, 'owner_id': user.id})
+        with db.engine.begin() as connection:
+            connection.exec_driver_sql("DROP INDEX ix_places_geohash")
+            connection.exec_driver_sql("ALTER TABLE places DROP COLUMN geohash")
+
+    runner = app.test_cli_runner()
+    result = runner.invoke(args=['hbnb', 'migrate'])
+    assert result.exit_code == 0, result.output
+    assert 'Column places.geohash added' in result.output
+    assert 'Geohash computed for 1 place(s)' in result.output
+    with app.app_context():
+        indexes = {index['name'] for index in inspect(db.engine).get_indexes('places')}
+        assert 'ix_places_geohash' in indexes
+        assert db.session.scalar(db.select(Place.geohash)).startswith('u09')
+    # Relancée, la mise à niveau ne change rien
+    result = runner.invoke(args=['hbnb', 'migrate'])
+    assert result.output.strip() == 'Database schema up to date'
+
+
+def test_migrate_fills_aggregates_and_creates_revocations(tmp_path):
+    """Test migrate adds the counters and revoked_tokens, then repairs the counters"""
+    class StartupConfig(TestingConfig):
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{tmp_path / "old.db"}'
+
+    app = create_app(StartupConfig)
+    with app.app_context():
+        init_db()
+        facade = get_facade()
+        owner, guest = [facade.user_facade.create_user({
+            'first_name': 'Old', 'last_name': 'Schema', 'email': email,
+            'password': 'oldpassword'})
+            for email in ('owner@example.com', 'guest@example.com')]
+        wifi = facade.amenity_facade.create_amenity({'name': 'Old WiFi'})
+        place = facade.place_facade.create_place({
+            'title': 'Old place', 'price': 50.0, 'latitude': 48.8566,
+            'longitude': 2.3522, 'owner_id': owner.id, 'amenities': [wifi.id]})
+        facade.review_facade.create_review({
+            'text': 'Fine', 'rating': 4, 'user_id': guest.id, 'place_id': place.id})
+        place_id, wifi_id = place.id, wifi.id
+        with db.engine.begin() as connection:
+            connection.exec_driver_sql("DROP TABLE revoked_tokens")
+            for table, column in [('places', 'review_count'), ('places', 'rating_sum'),
+                                  ('amenities', 'places_count')]:
+                connection.exec_driver_sql(f"ALTER TABLE {table} DROP COLUMN {column}")
+
+    result = app.test_cli_runner().invoke(args=['hbnb', 'migrate'])
+    assert result.exit_code == 0, result.output
+    assert 'Table revoked_tokens created' in result.output
+    assert 'Column amenities.places_count added' in result.output
+    assert 'Rating aggregates recomputed for 1 place(s)' in result.output
+    assert 'Place counts recomputed for 1 amenity(ies)' in result.output
+    with app.app_context():
+        assert 'revoked_tokens' in inspect(db.engine).get_table_names()
+        migrated = db.session.get(Place, place_id)
+        assert (migrated.review_count, migrated.rating_sum) == (1, 4)
+        assert get_facade().amenity_facade.get_amenity(wifi_id).places_count == 1
+
+
+def test_migrate_baseline_database_allows_login(baseline_app):
+    """Test a database created by the first version logs in after migrate"""
+    result = baseline_app.test_cli_runner().invoke(args=['hbnb', 'migrate'])
+    assert result.exit_code == 0, result.output
+    assert 'Column users.password_algorithm added' in result.output
+    with baseline_app.app_context():
+        user = get_facade().user_facade.get_user_by_email('old@example.com')
+        assert (user.password_algorithm, user.password_cost) == ('bcrypt', 4)
+
+    response = baseline_app.test_client().post('/api/v1/auth/login', json={
+        'email': 'old@example.com', 'password': 'oldpassword'})
+    assert response.status_code == 200
+
+
+def test_migrate_baseline_database_creates_model_indexes(baseline_app):
+    """Test migrate creates every model index missing from an existing table"""
+    result = baseline_app.test_cli_runner().invoke(args=['hbnb', 'migrate'])
+    assert result.exit_code == 0, result.output
+    with baseline_app.app_context():
+        inspector = inspect(db.engine)
+        for table in db.metadata.sorted_tables:
+            existing = {index['name'] for index in inspector.get_indexes(table.name)}
+            assert {index.name for index in table.indexes} <= existing, table.name
+        assert 'ix_place_amenity_amenity_id_place_id' in {
+            index['name'] for index in inspector.get_indexes('place_amenity')}
+    assert 'Index uq_reviews_place_id_user_id created' in result.output
+    assert 'Index ix_users_created_at_id created' in result.output
+
+
+def test_migrate_baseline_database_installs_search_index(baseline_app):
+    """Test migrate creates and fills places_fts when places already existed"""
+    with baseline_app.app_context(), db.engine.begin() as connection:
+        connection.exec_driver_sql(
+            "INSERT INTO places (title, description, price, latitude, longitude, owner_id, "
+            "id, created_at, updated_at) VALUES ('Old loft', 'Quiet', 80, 45.76, 4.83, "
+            "'old-user', 'old-place', '2024-01-01 00:00:00', '2024-01-01 00:00:00')")
+
+    result = baseline_app.test_cli_runner().invoke(args=['hbnb', 'migrate'])
+    assert result.exit_code == 0, result.output
+    assert 'Search index rebuilt for 1 place(s)' in result.output
+    client = baseline_app.test_client()
+    response = client.get('/api/v1/places/search?q=loft')
+    assert response.status_code == 200
+    assert [item['id'] for item in response.get_json()['items']] == ['old-place']
+
+
+def test_migrate_removes_duplicate_reviews_before_unique_index(baseline_app):
+    """Test migrate keeps the earliest of duplicate reviews, then enforces uniqueness"""
+    with baseline_app.app_context(), db.engine.begin() as connection:
+        connection.exec_driver_sql(
+            "INSERT INTO users (first_name, last_name, email, password, is_admin, id) "
+            "VALUES ('Guest', 'User', 'guest@example.com', 'x', 0, 'guest')")
+        connection.exec_driver_sql(
+            "INSERT INTO places (title, price, latitude, longitude, owner_id, id) "
+            "VALUES ('Old place', 80, 45.76, 4.83, 'old-user', 'old-place')")
+        for review_id, rating, created_at in [('late', 1, '2024-03-01'),
+                                              ('early', 5, '2024-01-01'),
+                                              ('middle', 2, '2024-02-01')]:
+            connection.exec_driver_sql(
+                "INSERT INTO reviews (text, rating, place_id, user_id, id, created_at) "
+                f"VALUES ('Review', {rating}, 'old-place', 'guest', '{review_id}', "
+                f"'{created_at}')")
+
+    result = baseline_app.test_cli_runner().invoke(args=['hbnb', 'migrate'])
+    assert result.exit_code == 0, result.output
+    assert '2 duplicate review(s) removed' in result.output
+    with baseline_app.app_context():
+        assert db.session.execute(db.text("SELECT id FROM reviews")).scalars().all() == ['early']
+        place = db.session.get(Place, 'old-place')
+        assert (place.review_count, place.rating_sum) == (1, 5)
+        with pytest.raises(IntegrityError), db.engine.begin() as connection:
+            connection.exec_driver_sql(
+                "INSERT INTO reviews (text, rating, place_id, user_id, id) "
+                "VALUES ('Again', 3, 'old-place', 'guest', 'again')")
+
+
 # ============= INTEGRATION TESTS =============
 
 def test_full_user_flow(client, app):